@@ -1,21 +1,190 @@
 from argparse import ArgumentParser
 import re
+import sys
 
 ASPECT_RATIO_PAT = re.compile(r'(\d+):(\d+)')
+SIZE_PAT = re.compile(r'^\d+(\.\d+)?(pt|px)?$', re.I)
+DEFAULT_SIMILARITY = 0.8
 
-def visualize(entropy, ar_width, ar_height, fontsize):
-    print(f'Entropy: {entropy}')
-    print(f'Width: {ar_width}')
-    print(f'Height: {ar_height}')
+# What each kind of run is called in errors, and the options each one uses;
+# any other option given is an error rather than silently ignored.
+MODE_NAMES = {'scan': '--scan', 'gallery': '--gallery', 'confusable': '--confusable', 'batch': '--batch',
+              'diff': '--diff', 'png': '--png', 'svg': 'a single SVG'}
+OPTION_MODES = [
+    ('ar', '--ar', {'batch', 'diff', 'png', 'svg'}),
+    ('fs', '--fs', {'batch', 'diff', 'png', 'svg'}),
+    ('similarity', '--similarity', {'confusable'}),
+    ('out_dir', '--out-dir', {'batch', 'gallery'}),
+    ('archive', '--archive', {'batch'}),
+    ('workers', '--workers', {'batch', 'confusable'}),
+    ('sizes', '--sizes', {'batch'}),
+    ('use_defs', '--use-defs', {'batch', 'svg'}),
+    ('png', '--png', {'png'}),
+    ('diff', '--diff', {'diff'}),
+    ('json', '--json', {'diff', 'scan', 'confusable'}),
+    ('cache_dir', '--cache-dir', {'batch', 'png', 'svg'}),
+    ('strict', '--strict', {'batch', 'diff', 'png', 'svg', 'scan'}),
+]
+
+def mode_of(args) -> str:
+    for mode in ('scan', 'gallery', 'confusable', 'batch', 'diff', 'png'):
+        if getattr(args, mode):
+            return mode
+    return 'svg'
+
+def visualize(entropy, ar_width, ar_height, fontsize, use_defs=False):
+    # Rendering (and lxml) is only loaded once there is something to render,
+    # so --help and argument errors return quickly.
+    from .render import to_svg
+    sys.stdout.write(to_svg(entropy, ar_width, ar_height, fontsize, use_defs))
+    sys.stdout.write('\n')
+
+def visualize_png(entropy, ar_width, ar_height, fontsize):
+    from .raster import to_png
+    sys.stdout.buffer.write(to_png(entropy, ar_width, ar_height, fontsize))
+    sys.stdout.flush()
+
+def compare(old, new, ar_width, ar_height, fontsize, as_json):
+    from .diff import diff, diff_svg, differences_json
+    if as_json:
+        import json
+        json.dump(differences_json(diff(old, new, ar_width, ar_height)), sys.stdout, indent=2)
+    else:
+        sys.stdout.write(diff_svg(old, new, ar_width, ar_height, fontsize))
+    sys.stdout.write('\n')
+
+def scan(source, strict, as_json):
+    from .scan import scan_file, scan_stream
+    found = scan_stream(sys.stdin.buffer, strict) if source == '-' else scan_file(source, strict)
+    for f in found:
+        if as_json:
+            import json
+            sys.stdout.write(json.dumps(dict(offset=f.offset, text=f.text, **f.parsed._asdict())) + '\n')
+        else:
+            sys.stdout.write(f'{f.offset}\t{f.parsed.type}\t{f.text}\n')
+
+def confusable(source, threshold, workers, as_json):
+    from .confusable import build_index
+    from .entropy import read_entropies
+    def report(entropy):
+        sys.stderr.write(f'entviz: nothing to visualize in {entropy!r}\n')
+    index = build_index(read_entropies(sys.stdin if source == '-' else source), workers, report=report,
+                        threshold=threshold)
+    for m in index.matches():
+        if as_json:
+            import json
+            sys.stdout.write(json.dumps(m._asdict()) + '\n')
+        else:
+            sys.stdout.write(f'{m.similarity:.3f}\t{m.first}\t{m.second}\n')
+
+def gallery(source, out_dir):
+    from .entropy import read_entropies
+    from .gallery import write_html, write_svg_pages
+    entropies = read_entropies(sys.stdin if source == '-' else source)
+    if out_dir:
+        pages = write_svg_pages(entropies, out_dir)
+        sys.stderr.write(f'entviz: wrote {pages} pages\n')
+    else:
+        write_html(entropies, sys.stdout)
+
+def batch(source, out_dir, archive, ar_width, ar_height, fontsize, workers, use_defs=False, cache_dir=None,
+          sizes=None, strict=False):
+    from .batch import DirectoryWriter, TarWriter, ZipWriter, run_batch
+    from .entropy import read_entropies
+    if out_dir:
+        writer = DirectoryWriter(out_dir)
+    elif archive == '-':
+        writer = TarWriter(sys.stdout.buffer)
+    elif archive.lower().endswith('.zip'):
+        writer = ZipWriter(archive)
+    else:
+        writer = TarWriter(archive)
+    def report(result):
+        sys.stderr.write(f'entviz: line {result.line}: {result.error}\n')
+    entropies = read_entropies(sys.stdin if source == '-' else source, numbered=True)
+    rendered, failed = run_batch(entropies, writer, ar_width, ar_height, fontsize, workers, report, use_defs,
+                                 cache_dir, sizes, numbered=True, strict=strict)
+    sys.stderr.write(f'entviz: rendered {rendered}, failed {failed}\n')
+    if failed:
+        sys.exit(1)
 
 def main():
     parser = ArgumentParser(
         prog='entviz',
         description='Visualize entropy as an SVG file.')
-    parser.add_argument('entropy')
-    parser.add_argument('--ar', '--aspectratio', metavar='RATIO', default='1:1')
-    parser.add_argument('--fs', '--fontsize', metavar='POINT', default=12, type=int)
+    parser.add_argument('entropy', nargs='?')
+    parser.add_argument('--ar', '--aspectratio', metavar='RATIO', help='The aspect ratio (default 1:1).')
+    parser.add_argument('--fs', '--fontsize', metavar='POINT', type=int, help='The font size (default 12).')
+    parser.add_argument('--batch', metavar='FILE',
+        help='Render each line of FILE (- for stdin) instead of a single entropy.')
+    parser.add_argument('--scan', metavar='FILE',
+        help='List the entropy values found anywhere in FILE (- for stdin): byte offset, type and text.')
+    parser.add_argument('--gallery', metavar='FILE',
+        help='Write an HTML page of labeled entvizes for each line of FILE (- for stdin), in pages of tiles.')
+    parser.add_argument('--confusable', metavar='FILE',
+        help='List the pairs of lines of FILE (- for stdin) whose entvizes look nearly alike, with their similarity.')
+    parser.add_argument('--similarity', metavar='FRACTION', type=float,
+        help='With --confusable, how alike a pair must be to be listed (default 0.8).')
+    parser.add_argument('--out-dir', metavar='DIR',
+        help='With --batch, write one SVG per input into DIR, named by hash of the input. '
+             'With --gallery, write one SVG per page into DIR instead of HTML.')
+    parser.add_argument('--archive', metavar='FILE',
+        help='With --batch, write the SVGs into a .zip or .tar file (- for a tar stream on stdout).')
+    parser.add_argument('--workers', metavar='N', type=int,
+        help='With --batch or --confusable, the number of processes to use (default: one per CPU).')
+    parser.add_argument('--sizes', metavar='LIST',
+        help='With --batch, write each input at every size in LIST (e.g. 16px,12pt,24pt), '
+             'named by hash and size. pt sizes are font sizes; px is the longer side.')
+    parser.add_argument('--use-defs', action='store_true',
+        help='Define each repeated edge shape once and place copies with <use>, for smaller SVG.')
+    parser.add_argument('--png', action='store_true',
+        help='Write a PNG (without token text) instead of SVG. Needs NumPy.')
+    parser.add_argument('--diff', metavar='NEW',
+        help='Compare entropy with NEW, drawing only the cells that differ.')
+    parser.add_argument('--json', action='store_true',
+        help='With --diff, list the differences as JSON instead of drawing them. '
+             'With --scan, write one JSON object per value found. With --confusable, one per pair.')
+    parser.add_argument('--cache-dir', metavar='DIR',
+        help='Keep renders in DIR and reuse them across runs (shared by --batch workers).')
+    parser.add_argument('--strict', action='store_true',
+        help='Refuse an address whose checksum is wrong, instead of drawing it '
+             '(with --scan, skip it; with --batch, report it as failed).')
+    parser.add_argument('--plugins', action='store_true',
+        help='Also recognize the types of parsers installed as "entviz.parsers" entry points.')
+    parser.add_argument('--profile', action='store_true',
+        help='Print the time and allocations of each stage to stderr when done. '
+             '(With --batch, only stages run in this process count; use --workers 1.)')
     args = parser.parse_args()
+    if args.scan:
+        if args.entropy or args.batch:
+            parser.error('--scan reads its values from FILE; give no entropy value or --batch.')
+    elif args.gallery:
+        if args.entropy or args.batch:
+            parser.error('--gallery reads its values from FILE; give no entropy value or --batch.')
+    elif args.confusable:
+        if args.entropy or args.batch:
+            parser.error('--confusable reads its values from FILE; give no entropy value or --batch.')
+        if args.similarity is not None and not 0 < args.similarity <= 1:
+            parser.error('--similarity must be more than 0 and at most 1.')
+    elif args.batch:
+        if args.entropy:
+            parser.error('Give either an entropy value or --batch, not both.')
+        if bool(args.out_dir) == bool(args.archive):
+            parser.error('--batch needs exactly one of --out-dir or --archive.')
+        if args.png or args.diff:
+            parser.error('--png and --diff work only with a single entropy value.')
+    elif not args.entropy:
+        parser.error('Give an entropy value to visualize, or --batch.')
+    mode = mode_of(args)
+    for dest, flag, modes in OPTION_MODES:
+        if getattr(args, dest) not in (None, False) and mode not in modes:
+            parser.error(f'{flag} does not work with {MODE_NAMES[mode]}.')
+    if args.sizes:
+        sizes = [size.strip() for size in args.sizes.split(',')]
+        if not all(SIZE_PAT.match(size) and float(size.lower().rstrip('ptx')) > 0 for size in sizes):
+            parser.error('Invalid sizes; give a comma-separated list like 16px,12pt,24pt.')
+        if args.fs is not None:
+            parser.error('--sizes sets the font sizes; give no --fs.')
     ar_width, ar_height = 1, 1
     fontsize = 12
     if args.ar:
@@ -24,16 +193,51 @@ def main():
             ar_width, ar_height = map(int, match.groups())
             if ar_width < 1 or ar_height < 1 or ar_width > 100 or ar_height > 100:
                 parser.error('Invalid aspect ratio.')
-    if args.fs:
+    if args.fs is not None:
         fontsize = args.fs
         if fontsize < 6 or fontsize > 30:
             parser.error('Invalid font size.')
+    if args.plugins:
+        from .entropy import load_plugins
+        load_plugins()
+    if args.strict and not args.scan:
+        from .checksums import failed_checksum
+        for value in (args.entropy, args.diff):
+            kind = value and failed_checksum(value)
+            if kind:
+                parser.error(f'{value} is not a valid {kind} address (bad checksum).')
+    if args.profile:
+        from . import instrument
+        instrument.enable()
     try:
-        visualize(args.entropy, ar_width, ar_height, fontsize)
+        if args.cache_dir and not args.batch:
+            from .cache import use_disk_cache
+            use_disk_cache(args.cache_dir)
+        if args.scan:
+            scan(args.scan, args.strict, args.json)
+        elif args.gallery:
+            gallery(args.gallery, args.out_dir)
+        elif args.confusable:
+            similarity = DEFAULT_SIMILARITY if args.similarity is None else args.similarity
+            confusable(args.confusable, similarity, args.workers, args.json)
+        elif args.batch:
+            batch(args.batch, args.out_dir, args.archive, ar_width, ar_height, fontsize, args.workers, args.use_defs,
+                  args.cache_dir, args.sizes and sizes, args.strict)
+        elif args.diff:
+            compare(args.entropy, args.diff, ar_width, ar_height, fontsize, args.json)
+        elif args.png:
+            visualize_png(args.entropy, ar_width, ar_height, fontsize)
+        else:
+            visualize(args.entropy, ar_width, ar_height, fontsize, args.use_defs)
+    except SystemExit:
+        raise
     except:
-        import sys, traceback
+        import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        if args.profile:
+            sys.stderr.write(instrument.report() + '\n')
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,134 @@
+"""
+Render many entvizes in one run: newline-delimited entropy in, one SVG per
+input out, in parallel across a worker pool. Each SVG is named by a hash of
+its (stripped) input, and lands in a directory or in a tar or zip archive.
+A bad input is reported and skipped; it doesn't stop the run. Given sizes,
+each input gets one SVG per size instead, all drawn from one plan.
+"""
+from collections import namedtuple
+import contextlib
+import hashlib
+import io
+import os
+import tarfile
+import time
+import zipfile
+
+from . import cache
+from .checksums import failed_checksum
+from .parallel import map_chunks
+from .render import export_sizes, to_svg
+
+# With sizes, svg is a dict of SVG text by size.
+BatchResult = namedtuple('BatchResult', ['line', 'entropy', 'name', 'svg', 'error'])
+# One input and its options, as sent to a worker.
+BatchJob = namedtuple('BatchJob', ['line', 'entropy', 'ar_width', 'ar_height', 'fontsize', 'use_defs', 'cache_dir',
+                                   'sizes', 'strict'])
+
+def output_name(entropy: str) -> str:
+    return hashlib.sha256(entropy.strip().encode('utf-8')).hexdigest() + '.svg'
+
+def sized_name(name: str, size) -> str:
+    return f"{name[:-len('.svg')]}-{size}.svg"
+
+def _render_chunk(chunk):
+    # Every job in a chunk has the same options, cache_dir included.
+    cache_dir = chunk[0].cache_dir
+    with cache.using_disk_cache(cache_dir) if cache_dir else contextlib.nullcontext():
+        return [_render_one(job) for job in chunk]
+
+def _render_one(job: BatchJob) -> BatchResult:
+    entropy = job.entropy
+    try:
+        if job.strict:
+            kind = failed_checksum(entropy)
+            if kind:
+                raise ValueError(f"not a valid {kind} address (bad checksum)")
+        if job.sizes:
+            svg = export_sizes(entropy, job.sizes, job.ar_width, job.ar_height, job.use_defs)
+        else:
+            svg = to_svg(entropy, job.ar_width, job.ar_height, job.fontsize, job.use_defs)
+        return BatchResult(job.line, entropy, output_name(entropy), svg, None)
+    except Exception as e:
+        return BatchResult(job.line, entropy, None, None, f"{type(e).__name__}: {e}")
+
+def render_many(entropies, ar_width: int=1, ar_height: int=1, fontsize=12, workers: int=None, chunk_size: int=64,
+                use_defs: bool=False, cache_dir: str=None, sizes=None, numbered: bool=False, strict: bool=False):
+    """
+    Render each entropy string, yielding a BatchResult per input in input
+    order. Failures come back with error set instead of raising. With
+    cache_dir, every worker shares a DiskCache there, open while it renders
+    a chunk. With sizes (see render.scale_of()), fontsize is ignored and
+    each input is exported at every size. With numbered, entropies are (line number, text) pairs, as
+    from read_entropies(..., numbered=True); otherwise lines count inputs.
+    With strict, an address whose checksum is wrong fails instead of being
+    drawn.
+    """
+    if not numbered:
+        entropies = enumerate(entropies, 1)
+    jobs = (BatchJob(line, entropy, ar_width, ar_height, fontsize, use_defs, cache_dir, sizes, strict)
+            for line, entropy in entropies)
+    return map_chunks(_render_chunk, jobs, workers, chunk_size)
+
+class DirectoryWriter:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+    def add(self, name: str, svg: str):
+        with open(os.path.join(self.path, name), 'wt', encoding='utf-8') as f:
+            f.write(svg)
+    def close(self):
+        pass
+
+class TarWriter:
+    """
+    Writes a tar stream, so the output can be a pipe (e.g. sys.stdout.buffer).
+    Given a path instead of a file object, it opens and closes the file.
+    """
+    def __init__(self, fileobj):
+        if isinstance(fileobj, (str, os.PathLike)):
+            self.tar = tarfile.open(fileobj, mode='w|')
+        else:
+            self.tar = tarfile.open(fileobj=fileobj, mode='w|')
+    def add(self, name: str, svg: str):
+        data = svg.encode('utf-8')
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        self.tar.addfile(info, io.BytesIO(data))
+    def close(self):
+        self.tar.close()
+
+class ZipWriter:
+    def __init__(self, fileobj):
+        self.zip = zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_DEFLATED)
+    def add(self, name: str, svg: str):
+        self.zip.writestr(name, svg)
+    def close(self):
+        self.zip.close()
+
+def run_batch(entropies, writer, ar_width: int=1, ar_height: int=1, fontsize=12, workers: int=None, report=None,
+              use_defs: bool=False, cache_dir: str=None, sizes=None, numbered: bool=False, strict: bool=False):
+    """
+    Render every input into writer, and close it, even if the run stops
+    early. Call report(result) for each failure. Returns (rendered count,
+    failed count).
+    """
+    rendered = failed = 0
+    try:
+        for result in render_many(entropies, ar_width, ar_height, fontsize, workers, use_defs=use_defs,
+                                  cache_dir=cache_dir, sizes=sizes, numbered=numbered, strict=strict):
+            if result.error:
+                failed += 1
+                if report:
+                    report(result)
+            elif sizes:
+                for size, svg in result.svg.items():
+                    writer.add(sized_name(result.name, size), svg)
+                rendered += 1
+            else:
+                writer.add(result.name, result.svg)
+                rendered += 1
+    finally:
+        writer.close()
+    return rendered, failed
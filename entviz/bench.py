@@ -0,0 +1,225 @@
+"""
+Benchmarks for each stage of entviz, across entropy types and sizes.
+
+    python -m entviz.bench [--filter TEXT] [--min-time SECONDS] [--output FILE]
+
+Results are written as JSON (to stdout by default), so runs on the same
+hardware can be compared across releases.
+"""
+from argparse import ArgumentParser
+from collections import namedtuple
+import base64
+import datetime
+from fractions import Fraction
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import timeit
+
+from . import cache, entropy, layout
+from .entropy import parse_funcs, to_EIP55_address
+from .layout import GridGeometry, cell_size
+from .order_stats import order_statistics
+from .render import Entviz, export_sizes, render, stream_svg
+from .shapes import etree
+from .tokens import tokenize, encoding_of
+
+Case = namedtuple('Case', ['name', 'stage', 'size', 'func'])
+
+def rsa_ssh_key(bits: int) -> str:
+    """
+    A well-formed (but not real) ssh-rsa public key body with a modulus of
+    the given size, always the same for the same size.
+    """
+    def field(data: bytes) -> bytes:
+        return len(data).to_bytes(4, 'big') + data
+    modulus = b'\x00' + random.Random(bits).randbytes(bits // 8)
+    blob = field(b'ssh-rsa') + field(b'\x01\x00\x01') + field(modulus)
+    return base64.b64encode(blob).decode('ascii')
+
+# Representative inputs from smallest to largest.
+SIZES = {
+    "uuid": "087f9afc-5e79-4c14-98eb-3217e477242c",
+    "ethereum": "0x32Be343B94f860124dC4fEe278FDCBD38C102D88",
+    "did": "did:key:z6MkhaXgBZDvotDkL5257faiztiGiC2QtKLGpbnnEGta2doK",
+    "ssh-ed25519": "AAAAC3NzaC1lZDI1NTE5AAAAIB0UIIW091sZULC1ojG1x7N+/SybeFJMu9dGGKCBRiR+",
+    "ssh-rsa-2048": rsa_ssh_key(2048),
+    "ssh-rsa-4096": rsa_ssh_key(4096),
+}
+
+# Inputs that match nothing, so parse() has to rule out every candidate.
+NO_MATCH = ["notAValidAddress12345", "b" + "1" * 60, "A" * 44 + "!"]
+
+# Cold-start cases, each run in a fresh interpreter. "python" is the floor
+# that every other case pays too.
+STARTUP = {
+    "python": ["-c", "pass"],
+    "entviz.entropy": ["-c", "import entviz.entropy"],
+    "entviz.render": ["-c", "import entviz.render"],
+    "entviz.app": ["-c", "import entviz.app"],
+    "cli-help": ["-m", "entviz.app", "--help"],
+    "cli-parse": ["-c", "import entviz.entropy; entviz.entropy.parse('did:key:z6MkhaXgBZDvotDkL5257faiztiGiC2QtKLGpbnnEGta2doK')"],
+}
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def startup(args):
+    def run():
+        subprocess.run([sys.executable] + args, cwd=PACKAGE_ROOT, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return run
+
+def corpus():
+    from .tests.test_entropy import expected_parsers
+    return [text for text, _ in expected_parsers if text]
+
+def clear_caches():
+    """
+    Forget every memoized parse, plan, render, grid and geometry.
+    """
+    cache.invalidate()
+    layout.grid_candidates.cache_clear()
+    layout.best_grid.cache_clear()
+    layout.grid_geometry.cache_clear()
+
+def cold(func):
+    """
+    func, made to do all of its work on every call: caches are cleared first.
+    """
+    def run():
+        clear_caches()
+        return func()
+    return run
+
+def per_item(func, items):
+    def run():
+        for item in items:
+            func(item)
+    return run
+
+def cases():
+    try:
+        from . import raster
+    except ImportError:
+        raster = None
+    texts = corpus()
+    found = []
+    for func in parse_funcs:
+        found.append(Case(f"parse/{func.__name__}", "parse", "corpus", per_item(func, texts)))
+    found.append(Case("parse/dispatch", "parse", "corpus", per_item(entropy._parse, texts)))
+    found.append(Case("parse/no-match", "parse", "no-match", per_item(entropy._parse, NO_MATCH)))
+    # The whole dispatch, for the inputs of each type (as told by the parser
+    # that answers them).
+    by_type = {}
+    for text in texts:
+        func = next((f for f in parse_funcs if f(text)), None)
+        kind = func.__name__.replace("parse_", "") if func else "bits"
+        by_type.setdefault(kind, []).append(text)
+    for kind, items in sorted(by_type.items()):
+        found.append(Case(f"parse/type/{kind}", "parse", kind, per_item(entropy._parse, items)))
+    found.append(Case("parse/EIP-55", "parse", "ethereum", lambda: to_EIP55_address(SIZES["ethereum"])))
+    from .scan import scan
+    document = ' \n'.join(texts) * 10
+    found.append(Case("scan/corpus", "scan", "corpus", lambda: sum(1 for _ in scan(document))))
+    from .confusable import build_index
+    found.append(Case("confusable/corpus", "confusable", "corpus",
+                      cold(lambda: build_index(texts, workers=1).matches())))
+    from .checksums import is_valid
+    checked = [(entropy.parse(text).type, text.strip()) for text in texts if entropy.parse(text)]
+    found.append(Case("parse/checksums", "parse", "corpus",
+                      per_item(lambda pair: is_valid(*pair), checked)))
+    for size, text in SIZES.items():
+        parsed = entropy.normalize(text)
+        encoding = encoding_of(parsed.type)
+        tokens = tokenize(parsed.core, encoding)
+        entviz = Entviz(text)
+        found.append(Case(f"parse/{size}", "parse", size, lambda t=text: entropy._parse(t)))
+        found.append(Case(f"tokenize/{size}", "tokenize", size, lambda c=parsed.core, e=encoding: tokenize(c, e)))
+        found.append(Case(f"order_stats/{size}", "order_stats", size, lambda t=tokens: order_statistics(t)))
+        found.append(Case(f"layout/{size}", "layout", size,
+                          lambda n=len(tokens): layout.best_grid.__wrapped__(n, Fraction(16, 9))))
+        found.append(Case(f"geometry/{size}", "layout", size, lambda g=entviz.grid: GridGeometry(g, cell_size(12))))
+        found.append(Case(f"plan/{size}", "plan", size, cold(lambda t=text: Entviz(t))))
+        found.append(Case(f"svg/{size}", "svg", size,
+                          cold(lambda t=text: etree.tostring(render(t), encoding='unicode'))))
+        found.append(Case(f"svg-stream/{size}", "svg", size, cold(lambda t=text: stream_svg(t, io.StringIO()))))
+        found.append(Case(f"svg-defs/{size}", "svg", size,
+                          cold(lambda t=text: etree.tostring(render(t, use_defs=True), encoding='unicode'))))
+        found.append(Case(f"svg-sizes/{size}", "svg", size, cold(lambda t=text: export_sizes(t))))
+        if raster:
+            found.append(Case(f"png/{size}", "png", size,
+                              cold(lambda t=text, fb=raster.Framebuffer(): raster.to_png(t, framebuffer=fb))))
+    for name, args in STARTUP.items():
+        found.append(Case(f"import-time/{name}", "import-time", name, startup(args)))
+    for token_count in [1000, 10000]:
+        found.append(Case(f"layout/{token_count}-tokens", "layout", f"{token_count}-tokens",
+                          lambda n=token_count: (layout.grid_candidates.__wrapped__(n),
+                                                 layout.best_grid.__wrapped__(n, Fraction(16, 9)))))
+    return found
+
+def time_case(case: Case, min_time: float=0.2, repeat: int=5):
+    """
+    Time a case, returning a dict with the best per-call time over several
+    repeats of a loop that runs for at least min_time.
+    """
+    timer = timeit.Timer(case.func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time / repeat or number >= 1 << 24:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / repeat / elapsed) + 1))
+    best = min([elapsed] + timer.repeat(repeat - 1, number)) / number
+    return {
+        "name": case.name,
+        "stage": case.stage,
+        "size": case.size,
+        "iterations": number,
+        "seconds_per_call": best,
+        "calls_per_second": 1 / best if best else None,
+    }
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "system": platform.system(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    }
+
+def run(name_filter: str=None, min_time: float=0.2, repeat: int=5, progress=None):
+    results = []
+    for case in cases():
+        if name_filter and name_filter not in case.name:
+            continue
+        result = time_case(case, min_time, repeat)
+        if progress:
+            progress(result)
+        results.append(result)
+    return {"environment": environment(), "results": results}
+
+def main(argv=None):
+    parser = ArgumentParser(prog='python -m entviz.bench', description='Benchmark entviz stages.')
+    parser.add_argument('--filter', metavar='TEXT', help='Only run cases whose name contains TEXT.')
+    parser.add_argument('--min-time', metavar='SECONDS', type=float, default=0.2)
+    parser.add_argument('--repeat', metavar='N', type=int, default=5)
+    parser.add_argument('--output', metavar='FILE', help='Write JSON here instead of stdout.')
+    parser.add_argument('--quiet', action='store_true', help="Don't print progress to stderr.")
+    args = parser.parse_args(argv)
+    def progress(result):
+        sys.stderr.write(f"{result['name']:32} {result['seconds_per_call'] * 1e6:12.2f} us\n")
+    report = run(args.filter, args.min_time, args.repeat, None if args.quiet else progress)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'wt') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+from collections import OrderedDict, namedtuple
+import contextlib
+import os
+import threading
+
+CacheStats = namedtuple('CacheStats', ['hits', 'misses', 'evictions', 'entries', 'bytes'])
+
+_MISSING = object()
+
+def approximate_size(value) -> int:
+    """
+    A rough count of the bytes a cached value holds: the length of any
+    strings in it, plus a little per container. Good enough for a budget.
+    """
+    if value is None:
+        return 0
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, (tuple, list)):
+        return 8 * len(value) + sum(approximate_size(x) for x in value)
+    return 8
+
+class LRUCache:
+    """
+    A thread-safe least-recently-used cache, bounded by entry count and
+    (optionally) by the approximate size of its values in bytes. Setting
+    max_entries to 0 turns the cache off.
+    """
+    def __init__(self, max_entries: int=1024, max_bytes: int=None, sizeof=approximate_size):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    def __len__(self):
+        return len(self._items)
+    def __contains__(self, key):
+        return key in self._items
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(self.hits, self.misses, self.evictions, len(self._items), self._bytes)
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._items.get(key, _MISSING)
+            if item is _MISSING:
+                self.misses += 1
+                return default
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+    def put(self, key, value):
+        if not self.max_entries:
+            return
+        size = self.sizeof(value)
+        with self._lock:
+            old = self._items.pop(key, _MISSING)
+            if old is not _MISSING:
+                self._bytes -= old[1]
+            # Too big to keep; the old value (now gone) would be stale.
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._items[key] = (value, size)
+            self._bytes += size
+            self._trim()
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value for key, calling compute() to fill it on a miss.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+    def invalidate(self, key=_MISSING):
+        """
+        Drop one key, or everything if no key is given.
+        """
+        with self._lock:
+            if key is _MISSING:
+                self._items.clear()
+                self._bytes = 0
+            else:
+                old = self._items.pop(key, _MISSING)
+                if old is not _MISSING:
+                    self._bytes -= old[1]
+    def invalidate_matching(self, predicate):
+        """
+        Drop every key for which predicate(key) is true.
+        """
+        with self._lock:
+            for key in [k for k in self._items if predicate(k)]:
+                self._bytes -= self._items.pop(key)[1]
+    def resize(self, max_entries: int=None, max_bytes: int=None):
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            self._trim()
+    def reset_stats(self):
+        self.hits = self.misses = self.evictions = 0
+    def _trim(self):
+        while self._items and (len(self._items) > self.max_entries or
+                (self.max_bytes is not None and self._bytes > self.max_bytes)):
+            _, (_, size) = self._items.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+parse_cache = LRUCache(max_entries=4096)
+render_cache = LRUCache(max_entries=256, max_bytes=16 * 1024 * 1024)
+# Entviz plans (everything but the drawing), for comparing values.
+plan_cache = LRUCache(max_entries=1024)
+# A disk_cache.DiskCache behind render_cache, if use_disk_cache() was called.
+disk_cache = None
+
+def parse_key(entropy: str):
+    return entropy.strip()
+
+def render_key(entropy: str, ar_width, ar_height, fontsize, use_defs: bool=False):
+    return (entropy.strip(), ar_width, ar_height, fontsize, use_defs)
+
+def plan_key(entropy: str, ar_width, ar_height):
+    return (entropy.strip(), ar_width, ar_height)
+
+def use_disk_cache(directory, **options):
+    """
+    Have to_svg() and to_png() look in (and fill) a DiskCache in directory
+    when render_cache misses, or stop if directory is None. options go to
+    DiskCache. Calling again with the same directory keeps the open cache.
+    """
+    global disk_cache
+    if disk_cache is not None:
+        if directory is not None and os.path.expanduser(directory) == disk_cache.directory:
+            return disk_cache
+        disk_cache.close()
+        disk_cache = None
+    if directory is not None:
+        from .disk_cache import DiskCache
+        disk_cache = DiskCache(directory, **options)
+    return disk_cache
+
+@contextlib.contextmanager
+def using_disk_cache(directory, **options):
+    """
+    use_disk_cache() for the length of a with block. Whatever cache was in
+    use before is put back afterwards (and left open); one opened here is
+    closed.
+    """
+    global disk_cache
+    previous = disk_cache
+    if previous is not None and os.path.expanduser(directory) == previous.directory:
+        yield previous
+        return
+    from .disk_cache import DiskCache
+    disk = disk_cache = DiskCache(directory, **options)
+    try:
+        yield disk
+    finally:
+        disk_cache = previous
+        disk.close()
+
+def invalidate(entropy: str=None):
+    """
+    Forget cached parses, plans and renders of one entropy value, or of
+    everything. The disk cache is keyed by content (and RENDER_VERSION), so
+    it never holds anything stale and is left alone.
+    """
+    if entropy is None:
+        parse_cache.invalidate()
+        plan_cache.invalidate()
+        render_cache.invalidate()
+        return
+    key = parse_key(entropy)
+    parse_cache.invalidate(key)
+    plan_cache.invalidate_matching(lambda k: k[0] == key)
+    render_cache.invalidate_matching(lambda k: k[0] == key)
@@ -1,24 +1,140 @@
-from .layout import Cell
-from .shapes import *
-
-def edge_triangle(svg, cell: Cell, edge: int, fill_color: str):
-    size = Size(cell.edge_width, cell.edge_height)
-    inside = cell.edge_rect(edge)
-    if edge in [3, 4]:
-        where = Rect(cell.edge_rect)
-    if rotation == 0:
-        points = f"{where.top_left} {where.bottom_left} {where.bottom_right}"
-    elif rotation == 90:
-        points = f"{where.top_left} {where.top_right} {where.bottom_left}"
-    elif rotation == 180:
-        points = f"{where.top_left} {where.top_right} {where.bottom_right}"
-    elif rotation == 270:
-        points = f"{where.bottom_left} {where.top_right} {where.bottom_right}"
-    else:
-
-    points = f"{where.top_left} {where.bottom_left} {where.bottom_right}"
-    return etree.SubElement(svg, 'polygon', points=points, fill=fill_color)
-
-def edge_rect(svg: etree.Element, cell: Cell, edge: int, fill_color: str="brown"):
-    return rect(svg, cell.edge_rect(edge), fill_color)
+import collections
 
+from . import shapes
+from .layout import Cell, Point, Size, Rect
+
+# Edge shapes are drawn from primitives laid out on a grid where the edge size
+# (the short side of every edge rect) is 8 units. A primitive is either
+# ("rect", x, y, width, height) or ("triangle", x, y, rotation): a 45-degree
+# right triangle filling the 8x8 square at x, y, with a rotation that
+# shapes.right_triangle understands.
+EDGE_UNITS = 8
+
+# Horizontal forms fill a 24x8 edge rect with the nucleus below (edges 0 and 1);
+# vertical forms fill an 8x16 edge rect with the nucleus to the left (edge 2).
+# Edges 3 and 4, and edge 5, are the same forms turned 180 degrees.
+HORIZONTAL_BOX = Size(24, 8)
+VERTICAL_BOX = Size(8, 16)
+
+EDGE_SHAPES = {
+    "triangle": (
+        [("triangle", 0, 0, 0)],
+        [("triangle", 0, 0, 90)]),
+    "hook": (
+        [("rect", 0, 6, 20, 2), ("rect", 20, 0, 4, 8)],
+        [("rect", 0, 0, 2, 12), ("rect", 0, 12, 8, 4)]),
+    "rect": (
+        [("rect", 0, 0, 24, 8)],
+        [("rect", 0, 0, 8, 16)]),
+    "box": (
+        [("rect", 8, 0, 8, 8)],
+        [("rect", 0, 4, 8, 8)]),
+    "slant": (
+        [("triangle", 0, 0, 90), ("triangle", 16, 0, 270)],
+        [("triangle", 0, 0, 180), ("triangle", 0, 8, 0)]),
+    "hammer": (
+        [("rect", 2, 0, 4, 8), ("rect", 6, 3, 18, 2)],
+        [("rect", 0, 2, 8, 4), ("rect", 3, 6, 2, 10)]),
+    "pyramid": (
+        [("triangle", 2, 0, 270), ("rect", 10, 0, 4, 8), ("triangle", 14, 0, 0)],
+        [("triangle", 0, 0, 0), ("triangle", 0, 8, 90)]),
+    "double bars": (
+        [("rect", 6, 0, 2, 8), ("rect", 16, 0, 2, 8)],
+        [("rect", 0, 2, 8, 2), ("rect", 0, 12, 8, 2)]),
+}
+EDGE_SHAPES_0 = ["triangle", "hook", "rect", "box"]
+EDGE_SHAPES_1 = ["slant", "hammer", "pyramid", "double bars"]
+
+def _turn_180(primitives, box: Size):
+    turned = []
+    for p in primitives:
+        if p[0] == "rect":
+            _, x, y, w, h = p
+            turned.append(("rect", box.width - x - w, box.height - y - h, w, h))
+        else:
+            _, x, y, rotation = p
+            turned.append(("triangle", box.width - x - EDGE_UNITS, box.height - y - EDGE_UNITS, (rotation + 180) % 360))
+    return turned
+
+def _orient(horizontal, vertical):
+    h180 = _turn_180(horizontal, HORIZONTAL_BOX)
+    v180 = _turn_180(vertical, VERTICAL_BOX)
+    return [horizontal, horizontal, vertical, h180, h180, v180]
+
+# ORIENTED_SHAPES[shape][edge] -> primitives in the frame of that edge's rect.
+ORIENTED_SHAPES = {name: _orient(*forms) for name, forms in EDGE_SHAPES.items()}
+
+def edge_primitives(shape: str, edge: int):
+    if edge < 0 or edge > 5:
+        raise ValueError("Edge must be 0 to 5")
+    return ORIENTED_SHAPES[shape][edge]
+
+def _draw_primitives(svg, primitives, left, top, scale, fill_color, backend):
+    square = Size(EDGE_UNITS * scale, EDGE_UNITS * scale)
+    for p in primitives:
+        top_left = Point(left + p[1] * scale, top + p[2] * scale)
+        if p[0] == "rect":
+            backend.rect(svg, Rect(top_left, Size(p[3] * scale, p[4] * scale)), fill_color)
+        else:
+            backend.right_triangle(svg, Rect(top_left, square), p[3], fill_color)
+
+def edge_shape(svg, cell: Cell, edge: int, shape: str, fill_color: str, backend=shapes):
+    """
+    Draw one of the named EDGE_SHAPES into an edge rect of a cell, using the
+    rect/right_triangle functions of backend (shapes or svg_stream).
+    """
+    where = cell.edge_rect(edge)
+    _draw_primitives(svg, edge_primitives(shape, edge), where.left, where.top, cell.edge_width / EDGE_UNITS, fill_color, backend)
+
+# Edges 0 and 1 draw the same form of a shape, as do edges 3 and 4, so each
+# shape has 4 forms. FORM_OF_EDGE[edge] -> which one.
+FORM_OF_EDGE = [0, 0, 1, 2, 2, 3]
+
+def symbol_id(shape: str, edge: int, edge_width) -> str:
+    """
+    The id of a form drawn at an edge width. A form's geometry depends only
+    on that width, so the same id always means the same shape, even across
+    documents inlined into one page (where <use> finds the first definition).
+    """
+    width = f"{edge_width:.6g}".replace('.', '_')
+    return f"{shape.replace(' ', '-')}-{FORM_OF_EDGE[edge]}-w{width}"
+
+def define_edge_shapes(svg, used, edge_width, backend=shapes, min_uses: int=2):
+    """
+    Add a <defs> holding each form of the (shape, edge) pairs in used that
+    turns up at least min_uses times, drawn once at the origin with no fill,
+    for edge_shape_use to place. Returns the ids of the forms defined.
+    """
+    counts = collections.Counter(symbol_id(shape, edge, edge_width) for shape, edge in used)
+    shared = {id for id, count in counts.items() if count >= min_uses}
+    if not shared:
+        return shared
+    scale = edge_width / EDGE_UNITS
+    defined = set()
+    with backend.group(svg, 'defs') as defs:
+        for shape, edge in used:
+            id = symbol_id(shape, edge, edge_width)
+            if id in shared and id not in defined:
+                defined.add(id)
+                with backend.group(defs, 'g', [("id", id)]) as g:
+                    _draw_primitives(g, edge_primitives(shape, edge), 0, 0, scale, None, backend)
+    return shared
+
+def define_all_edge_shapes(svg, edge_width, backend=shapes):
+    """
+    Add a <defs> holding every form of every shape, for documents (such as a
+    gallery) whose entvizes are drawn later and all share it. Returns the ids.
+    """
+    return define_edge_shapes(svg, [(shape, edge) for shape in EDGE_SHAPES for edge in range(6)],
+                              edge_width, backend, min_uses=1)
+
+def edge_shape_use(svg, cell: Cell, edge: int, shape: str, fill_color: str, backend=shapes):
+    """
+    Like edge_shape, but place the form added by define_edge_shapes with a
+    <use> instead of drawing it again.
+    """
+    where = cell.edge_rect(edge)
+    backend.use(svg, symbol_id(shape, edge, cell.edge_width), Point(where.left, where.top), fill_color)
+
+def edge_rect(svg, cell: Cell, edge: int, fill_color: str="brown"):
+    return shapes.rect(svg, cell.edge_rect(edge), fill_color)
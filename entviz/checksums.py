@@ -0,0 +1,300 @@
+"""
+Decode addresses far enough to check their checksums: base58check (Bitcoin,
+Litecoin, Ripple), bech32/bech32m (SegWit, Cardano Shelley), CashAddr,
+Cardano Byron CRC32, Stellar CRC16 and Ethereum's EIP-55 mixed case.
+entropy.parse(..., strict=True) uses these to reject values that merely have
+the right shape.
+
+Alphabets are decoded with bytes.translate() tables, and base58 goes through
+a single Python int instead of byte-array carries.
+"""
+import base64
+import hashlib
+import zlib
+
+from .entropy import BASE58_ALPHABET, BASE58_CHECK_LENGTH, parse
+
+RIPPLE_ALPHABET = "rpshnaf39wBUDNEGHJKLM4PQRST7VWXYZ2bcdeCg65jkm8oFqi1tuvAxyz"
+BECH32_CHARSET = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
+BECH32_CONST = 1
+BECH32M_CONST = 0x2bc830a3
+STELLAR_ACCOUNT_VERSION = 6 << 3
+INVALID = 0xff
+
+def _table(alphabet: str, either_case: bool=False) -> bytes:
+    table = bytearray([INVALID] * 256)
+    for value, c in enumerate(alphabet):
+        table[ord(c)] = value
+        if either_case:
+            table[ord(c.upper())] = value
+    return bytes(table)
+
+BASE58_TABLE = _table(BASE58_ALPHABET)
+RIPPLE_TABLE = _table(RIPPLE_ALPHABET)
+BECH32_TABLE = _table(BECH32_CHARSET, either_case=True)
+
+def _digits(text: str, table: bytes):
+    """
+    text as a bytes of digit values, or None if any character is not in
+    the alphabet.
+    """
+    try:
+        digits = text.encode('ascii').translate(table)
+    except UnicodeEncodeError:
+        return None
+    return None if INVALID in digits else digits
+
+def base58_decode(text: str, alphabet_table: bytes=BASE58_TABLE) -> bytes:
+    """
+    Decode base58 (each leading zero digit is a zero byte), or None if text
+    isn't base58 in that alphabet.
+    """
+    digits = _digits(text, alphabet_table)
+    if digits is None:
+        return None
+    n = 0
+    for d in digits:
+        n = n * 58 + d
+    zeros = len(digits) - len(digits.lstrip(b'\0'))
+    return b'\0' * zeros + n.to_bytes((n.bit_length() + 7) // 8, 'big')
+
+def base58check_payload(text: str, alphabet_table: bytes=BASE58_TABLE, length: int=BASE58_CHECK_LENGTH) -> bytes:
+    """
+    The version byte and payload of a base58check string of the given decoded
+    length, or None if it doesn't decode or the checksum is wrong.
+    """
+    raw = base58_decode(text, alphabet_table)
+    if raw is None or len(raw) != length:
+        return None
+    payload, checksum = raw[:-4], raw[-4:]
+    if hashlib.sha256(hashlib.sha256(payload).digest()).digest()[:4] != checksum:
+        return None
+    return payload
+
+def bech32_polymod(values) -> int:
+    generator = (0x3b6a57b2, 0x26508e6d, 0x1ea119fa, 0x3d4233dd, 0x2a1462b3)
+    check = 1
+    for v in values:
+        top = check >> 25
+        check = (check & 0x1ffffff) << 5 ^ v
+        for i in range(5):
+            if (top >> i) & 1:
+                check ^= generator[i]
+    return check
+
+def bech32_decode(text: str, max_length: int=90):
+    """
+    Split a bech32 or bech32m string into (hrp, data values without the
+    checksum, encoding constant), or None if it is malformed or the checksum
+    is wrong. Cardano uses bech32 beyond BIP 173's 90 characters, so the
+    length limit is a parameter.
+    """
+    if len(text) > max_length or (text.lower() != text and text.upper() != text):
+        return None
+    text = text.lower()
+    separator = text.rfind('1')
+    if separator < 1 or separator + 7 > len(text):
+        return None
+    hrp = text[:separator]
+    if any(not 33 <= ord(c) <= 126 for c in hrp):
+        return None
+    data = _digits(text[separator + 1:], BECH32_TABLE)
+    if data is None:
+        return None
+    expanded = [ord(c) >> 5 for c in hrp] + [0] + [ord(c) & 31 for c in hrp]
+    const = bech32_polymod(expanded + list(data))
+    if const not in (BECH32_CONST, BECH32M_CONST):
+        return None
+    return hrp, data[:-6], const
+
+def is_valid_segwit(text: str) -> bool:
+    decoded = bech32_decode(text)
+    if decoded is None:
+        return False
+    hrp, data, const = decoded
+    if hrp not in ('bc', 'tb') or not data or data[0] > 16:
+        return False
+    # Witness version 0 uses bech32; versions 1 and up use bech32m (BIP 350).
+    return const == (BECH32_CONST if data[0] == 0 else BECH32M_CONST)
+
+def is_valid_cardano_shelley(text: str) -> bool:
+    decoded = bech32_decode(text, max_length=1023)
+    return decoded is not None and decoded[2] == BECH32_CONST
+
+def cashaddr_polymod(values) -> int:
+    generator = (0x98f2bc8e61, 0x79b76d99e2, 0xf33e5fb3c4, 0xae2eabe2a8, 0x1e4f43e470)
+    check = 1
+    for v in values:
+        top = check >> 35
+        check = ((check & 0x07ffffffff) << 5) ^ v
+        for i in range(5):
+            if (top >> i) & 1:
+                check ^= generator[i]
+    return check ^ 1
+
+def is_valid_cashaddr(text: str) -> bool:
+    if text.lower() != text and text.upper() != text:
+        return False
+    text = text.lower()
+    prefix, _, payload = text.rpartition(':')
+    data = _digits(payload, BECH32_TABLE)
+    if data is None:
+        return False
+    prefixes = [prefix] if prefix else ['bitcoincash', 'bchtest']
+    return any(cashaddr_polymod([ord(c) & 31 for c in p] + [0] + list(data)) == 0 for p in prefixes)
+
+def is_valid_cardano_byron(text: str) -> bool:
+    """
+    A Byron address is base58 of the CBOR array [tag 24 (bytes), crc32 of
+    those bytes].
+    """
+    raw = base58_decode(text)
+    if raw is None or raw[:3] != b'\x82\xd8\x18':
+        return False
+    head, rest = raw[3], raw[4:]
+    if head == 0x58:
+        length, rest = rest[0], rest[1:]
+    elif head == 0x59:
+        length, rest = int.from_bytes(rest[:2], 'big'), rest[2:]
+    elif 0x40 <= head <= 0x57:
+        length = head - 0x40
+    else:
+        return False
+    payload, crc = rest[:length], rest[length:]
+    if len(payload) != length or len(crc) != 5 or crc[0] != 0x1a:
+        return False
+    return zlib.crc32(payload) == int.from_bytes(crc[1:], 'big')
+
+def crc16_xmodem(data: bytes) -> int:
+    crc = 0
+    for byte in data:
+        crc ^= byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021 if crc & 0x8000 else crc << 1) & 0xffff
+    return crc
+
+def is_valid_stellar(text: str) -> bool:
+    try:
+        raw = base64.b32decode(text.upper())
+    except ValueError:
+        return False
+    if len(raw) != 35 or raw[0] != STELLAR_ACCOUNT_VERSION:
+        return False
+    return crc16_xmodem(raw[:-2]) == int.from_bytes(raw[-2:], 'little')
+
+_keccak = None
+
+def keccak_256(data: bytes) -> bytes:
+    """
+    Keccak-256 as Ethereum uses it (not NIST SHA3-256, which pads
+    differently). Uses pycryptodome or pysha3 if installed.
+    """
+    global _keccak
+    if _keccak is None:
+        try:
+            from Crypto.Hash import keccak
+            _keccak = lambda data: keccak.new(data=data, digest_bits=256).digest()
+        except ImportError:
+            try:
+                import sha3
+                _keccak = lambda data: sha3.keccak_256(data).digest()
+            except ImportError:
+                _keccak = _keccak_256
+    return _keccak(data)
+
+_KECCAK_ROUND_CONSTANTS = [
+    0x0000000000000001, 0x0000000000008082, 0x800000000000808A, 0x8000000080008000,
+    0x000000000000808B, 0x0000000080000001, 0x8000000080008081, 0x8000000000008009,
+    0x000000000000008A, 0x0000000000000088, 0x0000000080008009, 0x000000008000000A,
+    0x000000008000808B, 0x800000000000008B, 0x8000000000008089, 0x8000000000008003,
+    0x8000000000008002, 0x8000000000000080, 0x000000000000800A, 0x800000008000000A,
+    0x8000000080008081, 0x8000000000008080, 0x0000000080000001, 0x8000000080008008,
+]
+# Rotation of lane (x, y), indexed x + 5 * y.
+_KECCAK_ROTATIONS = [
+    0, 1, 62, 28, 27,
+    36, 44, 6, 55, 20,
+    3, 10, 43, 25, 39,
+    41, 45, 15, 21, 8,
+    18, 2, 61, 56, 14,
+]
+# Where rho-pi moves lane i: (x, y) -> (y, 2x + 3y).
+_KECCAK_DESTINATIONS = [y + 5 * ((2 * x + 3 * y) % 5) for y in range(5) for x in range(5)]
+_MASK64 = (1 << 64) - 1
+
+def _keccak_f(lanes):
+    for rc in _KECCAK_ROUND_CONSTANTS:
+        c = [lanes[x] ^ lanes[x + 5] ^ lanes[x + 10] ^ lanes[x + 15] ^ lanes[x + 20] for x in range(5)]
+        d = [c[(x - 1) % 5] ^ (((c[(x + 1) % 5] << 1) | (c[(x + 1) % 5] >> 63)) & _MASK64) for x in range(5)]
+        b = [0] * 25
+        for i in range(25):
+            v = lanes[i] ^ d[i % 5]
+            r = _KECCAK_ROTATIONS[i]
+            b[_KECCAK_DESTINATIONS[i]] = ((v << r) | (v >> (64 - r))) & _MASK64 if r else v
+        lanes = [b[i] ^ (~b[i - i % 5 + (i + 1) % 5] & b[i - i % 5 + (i + 2) % 5]) for i in range(25)]
+        lanes[0] ^= rc
+    return lanes
+
+def _keccak_256(data: bytes) -> bytes:
+    rate = 136
+    padded = bytearray(data) + b'\x01' + b'\0' * (-(len(data) + 1) % rate)
+    padded[-1] |= 0x80
+    lanes = [0] * 25
+    for offset in range(0, len(padded), rate):
+        for i in range(rate // 8):
+            lanes[i] ^= int.from_bytes(padded[offset + 8 * i:offset + 8 * i + 8], 'little')
+        lanes = _keccak_f(lanes)
+    return b''.join(lane.to_bytes(8, 'little') for lane in lanes[:4])
+
+def eip55_checksummed(address: str) -> str:
+    """
+    The EIP-55 mixed-case form of a 40-hex-digit address (without 0x).
+    """
+    address = address.lower()
+    digest = int.from_bytes(keccak_256(address.encode('ascii')), 'big')
+    # Upper-case a letter when the high bit of its nibble of the hash is set.
+    return ''.join(c.upper() if (digest >> (255 - 4 * i)) & 1 else c for i, c in enumerate(address))
+
+def is_valid_ethereum(text: str) -> bool:
+    """
+    All-lower and all-upper addresses carry no checksum; mixed case must be
+    exactly EIP-55.
+    """
+    digits = text[2:] if text[:2] in ('0x', '0X') else text
+    if digits.lower() == digits or digits.upper() == digits:
+        return True
+    return eip55_checksummed(digits) == digits
+
+def is_valid_bitcoin_legacy(text: str) -> bool:
+    return base58check_payload(text) is not None
+
+def is_valid_ripple(text: str) -> bool:
+    return base58check_payload(text, RIPPLE_TABLE) is not None
+
+# Parsed.type -> a check of the (stripped) original text. Types that aren't
+# here have no checksum to check.
+VALIDATORS = {
+    "Bitcoin legacy": is_valid_bitcoin_legacy,
+    "Bitcoin SegWit": is_valid_segwit,
+    "Litecoin legacy": is_valid_bitcoin_legacy,
+    "Ripple": is_valid_ripple,
+    "Bitcoin Cash": is_valid_cashaddr,
+    "Cardano Byron": is_valid_cardano_byron,
+    "Cardano Shelley": is_valid_cardano_shelley,
+    "Stellar": is_valid_stellar,
+    "Ethereum": is_valid_ethereum,
+}
+
+def is_valid(parsed_type: str, text: str) -> bool:
+    validator = VALIDATORS.get(parsed_type)
+    return validator is None or validator(text)
+
+def failed_checksum(entropy: str) -> str:
+    """
+    The type of entropy if it parses as a type with a checksum but fails
+    that checksum, else None.
+    """
+    parsed = parse(entropy)
+    if parsed and not is_valid(parsed.type, entropy.strip()):
+        return parsed.type
+    return None
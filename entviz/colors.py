@@ -1,3 +1,20 @@
+def gamma_correction(c: float) -> float:
+    """
+    Linearize one sRGB channel value in [0, 1].
+    """
+    if c <= 0.04045:
+        return c / 12.92
+    else:
+        return ((c + 0.055) / 1.055) ** 2.4
+
+# LINEAR[v] is gamma_correction(v / 255) for every 8-bit channel value.
+LINEAR = tuple(gamma_correction(v / 255) for v in range(256))
+
+def _linear(v) -> float:
+    if type(v) is int and 0 <= v < 256:
+        return LINEAR[v]
+    return gamma_correction(v / 255)
+
 def relative_luminance(rgb):
     """
     Calculate the gamma-corrected luminance of an RGB color value. This is the luminance value
@@ -14,19 +31,58 @@ def relative_luminance(rgb):
     This method fixes that problem and gives a more realistic idea of what the perceived luminance of
     a color is, for a typical human eye. 
     """
-    rs = rgb[0] / 255
-    gs = rgb[1] / 255
-    bs = rgb[2] / 255
+    return (0.2126 * _linear(rgb[0])) + (0.7152 * _linear(rgb[1])) + (0.0722 * _linear(rgb[2]))
 
-    def gamma_correction(c):
-        if c <= 0.04045:
-            return c / 12.92
-        else:
-            return ((c + 0.055) / 1.055) ** 2.4
+WHITE = "#ffffff"
+BLACK = "#000000"
 
-    rs_gamma = gamma_correction(rs)
-    gs_gamma = gamma_correction(gs)
-    bs_gamma = gamma_correction(bs)
+# White, gold, red, blue, black -- in the order given by the algorithm.
+POSSIBLE_EDGE_COLORS = [WHITE, "#ffd966", "#ffdf2f", "#2f3fbf", BLACK]
 
-    Y = (0.2126 * rs_gamma) + (0.7152 * gs_gamma) + (0.0722 * bs_gamma)
-    return Y
+def quant_to_rgb(quant: int):
+    """
+    Convert a 24-bit quant to an (r, g, b) tuple, red in the low-order byte.
+    """
+    return (quant & 0xff, (quant >> 8) & 0xff, (quant >> 16) & 0xff)
+
+def hex_color(rgb) -> str:
+    return f"#{rgb[0]:02x}{rgb[1]:02x}{rgb[2]:02x}"
+
+def lightness(rgb) -> float:
+    """
+    HLS lightness, computed exactly as colorsys.rgb_to_hls does.
+    """
+    r, g, b = rgb[0] / 255, rgb[1] / 255, rgb[2] / 255
+    return (max(r, g, b) + min(r, g, b)) / 2.0
+
+def foreground_color(rgb) -> str:
+    """
+    Pick white or black text for a background, based on its HLS lightness.
+    """
+    return WHITE if lightness(rgb) < 0.5 else BLACK
+
+# Batch versions for NumPy arrays of 24-bit quants. Each gives the same
+# float64 values, element by element, as the functions above.
+
+_linear_array = None
+
+def luminances(quants):
+    global _linear_array
+    import numpy as np
+    from .quants import quant_rgb
+    if _linear_array is None:
+        _linear_array = np.array(LINEAR, dtype=np.float64)
+    rgb = quant_rgb(quants)
+    linear = _linear_array[rgb]
+    return (0.2126 * linear[..., 0]) + (0.7152 * linear[..., 1]) + (0.0722 * linear[..., 2])
+
+def lightnesses(quants):
+    from .quants import quant_rgb
+    rgb = quant_rgb(quants) / 255
+    return (rgb.max(axis=-1) + rgb.min(axis=-1)) / 2.0
+
+def foreground_colors(quants):
+    """
+    A list of WHITE or BLACK per quant.
+    """
+    return [WHITE if dark else BLACK for dark in (lightnesses(quants) < 0.5).tolist()]
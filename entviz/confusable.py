@@ -0,0 +1,180 @@
+"""
+Find keys whose entvizes look nearly alike, among hundreds of thousands of
+them, without comparing every pair:
+
+    index = build_index(read_entropies('inventory.txt'))
+    for match in index.matches():
+        print(f"{match.similarity:.2f} {match.first} {match.second}")
+
+Each value gets a visual Signature from its Entviz. The key part must be equal
+for two entvizes to look alike at a glance: background color, grid, and the
+cells holding the median and quartile marks. The features part is compared
+position by position: for every cell, a coarse nucleus color and the shape and
+color of each of its 6 edges. Similarity is the fraction of positions that
+agree.
+
+Signatures are bucketed by locality-sensitive hashing (bit sampling): each of
+BANDS bands looks at ROWS positions picked at random, so two signatures with
+similarity s share some band's bucket with probability 1 - (1 - s**ROWS)**BANDS.
+A bucket is just a hash in a flat array, sorted when pairs are wanted, so an
+index costs a little over BANDS * 8 bytes per value beyond its signatures.
+Only the pairs that meet in a bucket are compared, so the work grows with the
+number of values (times its log) plus the number of near-alike pairs, not with
+its square.
+
+Values are keyed by entropy.normalize(), so spellings of the same value (a
+UUID with or without braces, bech32 in either case) are one entry, not a
+confusable pair.
+"""
+from array import array
+from collections import namedtuple
+import random
+
+from .cell_shapes import EDGE_SHAPES_0, EDGE_SHAPES_1
+from .colors import POSSIBLE_EDGE_COLORS, quant_to_rgb
+from .entropy import normalize
+from .parallel import map_chunks
+from .render import Entviz
+
+Signature = namedtuple('Signature', ['key', 'features'])
+Match = namedtuple('Match', ['first', 'second', 'similarity'])
+
+DEFAULT_THRESHOLD = 0.8
+# At 0.8 similarity, a pair shares a bucket 95% of the time; at 0.5, 6%.
+BANDS = 16
+ROWS = 8
+# The features of a cell with no token.
+BLANK = 255
+
+SHAPE_CODES = {shape: i for i, shape in enumerate(EDGE_SHAPES_0 + EDGE_SHAPES_1)}
+COLOR_CODES = {color: i for i, color in enumerate(POSSIBLE_EDGE_COLORS)}
+
+def coarse_color(quant: int) -> int:
+    """
+    The nucleus color of a quant, 2 bits per channel: colors this close are
+    hard to tell apart at a glance.
+    """
+    r, g, b = quant_to_rgb(quant)
+    return (r >> 6) << 4 | (g >> 6) << 2 | (b >> 6)
+
+def signature(entviz: Entviz) -> Signature:
+    grid = entviz.grid
+    cell_of = entviz.cells
+    key = (entviz.background, grid.columns, grid.rows, cell_of[entviz.median.index],
+           tuple(cell_of[t.index] if t else None for t in entviz.quartiles))
+    features = bytearray([BLANK]) * (7 * grid.columns * grid.rows)
+    for token, cell, token_edges in zip(entviz.tokens, cell_of, entviz.edges):
+        features[7 * cell] = coarse_color(token.quant)
+        for edge, (shape, color) in enumerate(token_edges):
+            features[7 * cell + 1 + edge] = SHAPE_CODES[shape] * len(COLOR_CODES) + COLOR_CODES[color]
+    return Signature(key, bytes(features))
+
+def similarity(a: Signature, b: Signature) -> float:
+    """
+    The fraction of features two signatures share; 0 if their keys differ.
+    """
+    if a.key != b.key:
+        return 0.0
+    return sum(x == y for x, y in zip(a.features, b.features)) / len(a.features)
+
+def _signature_chunk(chunk):
+    results = []
+    for entropy in chunk:
+        try:
+            results.append((entropy, normalize(entropy), signature(Entviz(entropy))))
+        except ValueError:
+            results.append((entropy, None, None))
+    return results
+
+class ConfusabilityIndex:
+    """
+    Signatures of distinct values, bucketed for finding near-alike pairs.
+    """
+    def __init__(self, threshold: float=DEFAULT_THRESHOLD, bands: int=BANDS, rows: int=ROWS, seed: int=0):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        self.seed = seed
+        self.labels = []
+        self.signatures = []
+        self._ids = {}
+        # The bucket hash of each band of each value: value id * bands + band.
+        self._hashes = array('q')
+        self._samples = {}
+    def __len__(self):
+        return len(self.signatures)
+    def _sample(self, length: int):
+        # The positions each band looks at, the same for every signature of
+        # this length (that is, every grid of this size).
+        positions = self._samples.get(length)
+        if positions is None:
+            rand = random.Random(self.seed * 1000003 + length)
+            positions = self._samples[length] = [
+                [rand.randrange(length) for _ in range(self.rows)] for _ in range(self.bands)]
+        return positions
+    def add(self, entropy: str, parsed=None, sig: Signature=None) -> int:
+        """
+        Index a value (its normalized Parsed and Signature, if already known),
+        returning its id. A value already indexed keeps its id and first label.
+        """
+        if parsed is None:
+            parsed = normalize(entropy)
+        index = self._ids.get(parsed)
+        if index is not None:
+            return index
+        if sig is None:
+            sig = signature(Entviz(entropy))
+        index = self._ids[parsed] = len(self.signatures)
+        self.labels.append(entropy.strip())
+        self.signatures.append(sig)
+        features = sig.features
+        for band, positions in enumerate(self._sample(len(features))):
+            self._hashes.append(hash((sig.key, band, bytes(features[p] for p in positions))))
+        return index
+    def candidates(self):
+        """
+        Each pair of ids (lower first) that share a bucket, once.
+        """
+        hashes = self._hashes
+        order = sorted(range(len(hashes)), key=hashes.__getitem__)
+        seen = set()
+        start = 0
+        for end in range(1, len(order) + 1):
+            if end < len(order) and hashes[order[end]] == hashes[order[start]]:
+                continue
+            if end - start > 1:
+                ids = sorted({order[k] // self.bands for k in range(start, end)})
+                for i, first in enumerate(ids):
+                    for second in ids[i + 1:]:
+                        if (first, second) not in seen:
+                            seen.add((first, second))
+                            yield first, second
+            start = end
+    def matches(self):
+        """
+        A Match for each candidate pair at least threshold alike, most alike
+        first.
+        """
+        found = []
+        for first, second in self.candidates():
+            alike = similarity(self.signatures[first], self.signatures[second])
+            if alike >= self.threshold:
+                found.append(Match(self.labels[first], self.labels[second], alike))
+        found.sort(key=lambda m: (-m.similarity, m.first, m.second))
+        return found
+
+def build_index(entropies, workers: int=None, chunk_size: int=1000, report=None, **options) -> ConfusabilityIndex:
+    """
+    Index an iterable of entropy strings, computing signatures in chunks
+    across workers as for parse_many(). options go to ConfusabilityIndex.
+    Values that can't be drawn are passed to report(entropy), if given, and
+    left out.
+    """
+    index = ConfusabilityIndex(**options)
+    for entropy, parsed, sig in map_chunks(_signature_chunk, entropies, workers, chunk_size):
+        if sig is None:
+            if report:
+                report(entropy)
+        else:
+            index.add(entropy, parsed, sig)
+    return index
@@ -0,0 +1,106 @@
+"""
+Compare the entvizes of two entropy values: what differs, cell by cell, and
+an overlay SVG that draws only the cells that differ. Plans come from
+render.plan() and geometry from layout.grid_geometry(), so comparing one old
+value against many new ones (or re-checking a pair) doesn't redo that work.
+Cells that are the same in both aren't drawn at all, so no part of a full
+render of either value is needed, or made.
+"""
+from collections import namedtuple
+
+from . import shapes
+from .render import plan, draw, canvas_size
+
+# kind is one of:
+#   "type"       -- where None; old/new are the parsed types
+#   "grid"       -- where None; old/new are the Grids (nothing else is compared)
+#   "background" -- where None; old/new are colors
+#   "blank"      -- where is a cell index; old/new say whether it is blank
+#   "token"      -- where is a cell index; old/new are token text
+#   "edge"       -- where is (cell index, edge); old/new are (shape, color)
+#   "quartile"   -- where is a corner (0-3); old/new are the marked cell
+#                   index, or None for a quarter of blanks
+Difference = namedtuple('Difference', ['kind', 'where', 'old', 'new'])
+
+EntvizDiff = namedtuple('EntvizDiff', ['old', 'new', 'differences'])
+
+def _quartile_cell(entviz, corner: int):
+    token = entviz.quartiles[corner]
+    return entviz.cells[token.index] if token else None
+
+def differences(old, new):
+    """
+    Everything that looks different between two Entviz plans, in O(tokens).
+    Tokens are aligned by the cell they land in.
+    """
+    found = []
+    if old.parsed.type != new.parsed.type:
+        found.append(Difference("type", None, old.parsed.type, new.parsed.type))
+    if old.grid != new.grid:
+        found.append(Difference("grid", None, old.grid, new.grid))
+        return found
+    if old.background != new.background:
+        found.append(Difference("background", None, old.background, new.background))
+    old_tokens = dict(zip(old.cells, range(len(old.cells))))
+    new_cells = set(new.cells)
+    for cell in range(new.grid.columns * new.grid.rows):
+        if (cell in old_tokens) != (cell in new_cells):
+            found.append(Difference("blank", cell, cell not in old_tokens, cell not in new_cells))
+    for i, cell in enumerate(new.cells):
+        j = old_tokens.get(cell)
+        if j is None:
+            continue
+        old_token, new_token = old.tokens[j], new.tokens[i]
+        if old_token.text != new_token.text or old_token.quant != new_token.quant:
+            found.append(Difference("token", cell, old_token.text, new_token.text))
+        old_edges, new_edges = old.edges[j], new.edges[i]
+        if old_edges != new_edges:
+            for edge in range(6):
+                if old_edges[edge] != new_edges[edge]:
+                    found.append(Difference("edge", (cell, edge), old_edges[edge], new_edges[edge]))
+    for corner in range(4):
+        old_cell, new_cell = _quartile_cell(old, corner), _quartile_cell(new, corner)
+        if old_cell != new_cell or old.edge_colors[corner] != new.edge_colors[corner]:
+            found.append(Difference("quartile", corner, old_cell, new_cell))
+    return found
+
+def diff(old_entropy: str, new_entropy: str, ar_width: int=1, ar_height: int=1) -> EntvizDiff:
+    old = plan(old_entropy, ar_width, ar_height)
+    new = plan(new_entropy, ar_width, ar_height)
+    return EntvizDiff(old, new, differences(old, new))
+
+def changed_cells(d: EntvizDiff):
+    """
+    The cells of the new entviz that must be drawn to show every difference,
+    or None if everything must be (the grid or background changed).
+    """
+    cells = set()
+    for difference in d.differences:
+        if difference.kind in ("grid", "background"):
+            return None
+        if difference.kind in ("blank", "token"):
+            cells.add(difference.where)
+        elif difference.kind == "edge":
+            cells.add(difference.where[0])
+        elif difference.kind == "quartile":
+            cells.update(c for c in (difference.old, difference.new) if c is not None)
+    return cells
+
+def diff_svg(old_entropy: str, new_entropy: str, ar_width: int=1, ar_height: int=1, fontsize=12) -> str:
+    """
+    SVG text of the new entviz with only the differing cells drawn; the rest
+    is background. Identical values give an empty (background-only) picture.
+    """
+    d = diff(old_entropy, new_entropy, ar_width, ar_height)
+    svg = shapes.canvas(canvas_size(d.new, fontsize))
+    draw(svg, d.new, fontsize, only_cells=changed_cells(d))
+    return shapes.etree.tostring(svg, encoding='unicode')
+
+def differences_json(d: EntvizDiff):
+    """
+    The differences as plain lists and dicts, ready for json.dumps.
+    """
+    def plain(value):
+        return list(value) if isinstance(value, tuple) else value
+    return [{"kind": x.kind, "where": plain(x.where), "old": plain(x.old), "new": plain(x.new)}
+            for x in d.differences]
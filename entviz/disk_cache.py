@@ -0,0 +1,244 @@
+"""
+A persistent, content-addressed cache of rendered entvizes that several
+processes (batch workers, service restarts) can share:
+
+    cache = DiskCache('~/.cache/entviz')
+    svg = cache.get_or_compute(key, lambda: render(...))
+
+A cache directory holds three files:
+
+    index -- a header, then a fixed number of 40-byte slots, each a 16-byte
+             key digest, the offset, length and CRC32 of its value in data,
+             and when it was last used. Memory-mapped and probed linearly, so
+             a lookup is a few reads of shared memory and one read of data.
+    data  -- the values, appended one after another.
+    lock  -- flock()ed, shared for lookups and exclusive for writes.
+
+When the data outgrows max_bytes, or the index gets three quarters full, the
+most recently used half (by bytes) is copied to a new data file and the index
+is rebuilt; the other processes notice from a generation number in the
+header. A value whose CRC doesn't match (say, after a crash mid-write) is a
+miss, never a wrong answer.
+
+Without fcntl (on Windows), only threads within one process are kept apart.
+"""
+from contextlib import contextmanager
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from .cache import CacheStats
+
+MAGIC = b'ENTVIZC1'
+# magic, format version, slots, generation, end of data, entries
+HEADER = struct.Struct('<8sIIQQQ')
+HEADER_SIZE = 64
+# key digest, offset, length, crc32, last used (ns)
+RECORD = struct.Struct('<16sQIIQ')
+FORMAT_VERSION = 1
+EMPTY = bytes(16)
+
+def digest(key) -> bytes:
+    if isinstance(key, str):
+        key = key.encode('utf-8')
+    return hashlib.sha256(key).digest()[:16]
+
+class DiskCache:
+    """
+    Bytes values under str or bytes keys, in directory (created if needed).
+    slots only matters when the directory is new; it bounds the number of
+    entries.
+    """
+    def __init__(self, directory, max_bytes: int=256 * 1024 * 1024, slots: int=16384):
+        self.directory = os.path.expanduser(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._thread_lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock_file = open(os.path.join(self.directory, 'lock'), 'a+b')
+        with self._exclusive():
+            index_path = os.path.join(self.directory, 'index')
+            fd = os.open(index_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                header = os.read(fd, HEADER.size)
+                if len(header) < HEADER.size or header[:8] != MAGIC or \
+                        HEADER.unpack(header)[1] != FORMAT_VERSION:
+                    os.ftruncate(fd, 0)
+                    os.ftruncate(fd, HEADER_SIZE + slots * RECORD.size)
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    os.write(fd, HEADER.pack(MAGIC, FORMAT_VERSION, slots, 0, 0, 0))
+                    open(os.path.join(self.directory, 'data'), 'wb').close()
+                self._index = mmap.mmap(fd, 0)
+            finally:
+                os.close(fd)
+            self.slots = self._header()[2]
+            self._open_data()
+
+    def close(self):
+        with self._thread_lock:
+            self._index.close()
+            self._data.close()
+            self._lock_file.close()
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    @contextmanager
+    def _locked(self, mode):
+        # flock() doesn't exclude threads sharing our file, hence both.
+        with self._thread_lock:
+            if fcntl:
+                fcntl.flock(self._lock_file, mode)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+    def _shared(self):
+        return self._locked(fcntl and fcntl.LOCK_SH)
+    def _exclusive(self):
+        return self._locked(fcntl and fcntl.LOCK_EX)
+
+    def _header(self):
+        return HEADER.unpack_from(self._index, 0)
+    def _set_header(self, generation: int, end: int, entries: int):
+        HEADER.pack_into(self._index, 0, MAGIC, FORMAT_VERSION, self.slots, generation, end, entries)
+    def _open_data(self):
+        self._data = open(os.path.join(self.directory, 'data'), 'r+b')
+        self._generation = self._header()[3]
+    def _check_generation(self):
+        # Another process compacted: our data file is the old one.
+        if self._header()[3] != self._generation:
+            self._data.close()
+            self._open_data()
+
+    def _find(self, key_digest: bytes):
+        """
+        The slot holding key_digest, or else the empty slot where it would go,
+        as (slot, record or None).
+        """
+        slot = int.from_bytes(key_digest[:8], 'little') % self.slots
+        for _ in range(self.slots):
+            record = RECORD.unpack_from(self._index, HEADER_SIZE + slot * RECORD.size)
+            if record[0] == key_digest:
+                return slot, record
+            if record[0] == EMPTY:
+                return slot, None
+            slot = (slot + 1) % self.slots
+        return None, None
+
+    def _read(self, record) -> bytes:
+        _, offset, length, crc, _ = record
+        self._data.seek(offset)
+        value = self._data.read(length)
+        if len(value) != length or zlib.crc32(value) != crc:
+            return None
+        return value
+
+    def get(self, key, default=None) -> bytes:
+        key_digest = digest(key)
+        with self._shared():
+            self._check_generation()
+            slot, record = self._find(key_digest)
+            value = self._read(record) if record else None
+            if value is not None:
+                # Racy across processes, but it's only a recency hint.
+                struct.pack_into('<Q', self._index, HEADER_SIZE + slot * RECORD.size + 32, time.time_ns())
+        if value is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def put(self, key, value: bytes):
+        if len(value) > self.max_bytes // 2:
+            return
+        key_digest = digest(key)
+        with self._exclusive():
+            self._check_generation()
+            slot, record = self._find(key_digest)
+            if record and self._read(record) is not None:
+                return
+            _, generation, end, entries = self._header()[2:]
+            if entries + 1 > self.slots * 3 // 4 or end + len(value) > self.max_bytes:
+                self._compact()
+                _, generation, end, entries = self._header()[2:]
+                slot, record = self._find(key_digest)
+            self._data.seek(end)
+            self._data.write(value)
+            self._data.flush()
+            RECORD.pack_into(self._index, HEADER_SIZE + slot * RECORD.size,
+                             key_digest, end, len(value), zlib.crc32(value), time.time_ns())
+            self._set_header(generation, end + len(value), entries + (record is None))
+
+    def get_or_compute(self, key, compute) -> bytes:
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def _records(self):
+        for slot in range(self.slots):
+            record = RECORD.unpack_from(self._index, HEADER_SIZE + slot * RECORD.size)
+            if record[0] != EMPTY:
+                yield record
+
+    def _compact(self):
+        """
+        Keep the most recently used entries that fit in half of max_bytes and
+        half of the slots. Call with the exclusive lock held.
+        """
+        records = sorted(self._records(), key=lambda r: r[4], reverse=True)
+        kept = []
+        total = 0
+        for record in records[:self.slots // 2]:
+            if total + record[2] > self.max_bytes // 2:
+                break
+            value = self._read(record)
+            if value is not None:
+                kept.append((record, value))
+                total += len(value)
+        self.evictions += len(records) - len(kept)
+        path = os.path.join(self.directory, 'data')
+        with open(path + '.new', 'wb') as f:
+            for _, value in kept:
+                f.write(value)
+        os.replace(path + '.new', path)
+        self._index[HEADER_SIZE:] = bytes(len(self._index) - HEADER_SIZE)
+        offset = 0
+        for (key_digest, _, length, crc, used), _ in kept:
+            slot, _ = self._find(key_digest)
+            RECORD.pack_into(self._index, HEADER_SIZE + slot * RECORD.size, key_digest, offset, length, crc, used)
+            offset += length
+        self._set_header(self._header()[3] + 1, offset, len(kept))
+        self._data.close()
+        self._open_data()
+
+    def clear(self):
+        with self._exclusive():
+            self._check_generation()
+            self._data.truncate(0)
+            self._index[HEADER_SIZE:] = bytes(len(self._index) - HEADER_SIZE)
+            self._set_header(self._generation, 0, 0)
+
+    def __len__(self):
+        return self._header()[5]
+
+    @property
+    def stats(self) -> CacheStats:
+        _, _, _, _, end, entries = self._header()
+        return CacheStats(self.hits, self.misses, self.evictions, entries, end)
@@ -1,6 +1,32 @@
+import base64
 import collections
 import re
-import hashlib
+import sys
+import time
+
+from . import instrument
+from .cache import parse_cache, parse_key as cache_key
+from .parallel import map_chunks
+
+class LazyRegex:
+    """
+    A regex that isn't compiled until it is first used, so importing this
+    module doesn't pay for patterns that a given input never reaches. After
+    the first use, match() and friends are the compiled pattern's own methods.
+    """
+    METHODS = ('match', 'fullmatch', 'search', 'findall', 'finditer', 'sub', 'split')
+
+    def __init__(self, pattern: str, flags: int=0):
+        self.pattern = pattern
+        self.flags = flags
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        compiled = re.compile(self.pattern, self.flags)
+        for method in self.METHODS:
+            setattr(self, method, getattr(compiled, method))
+        return getattr(compiled, name)
 
 Parsed = collections.namedtuple('Parsed', ['type', 'prefix', 'core', 'suffix'])
 
@@ -8,26 +34,27 @@ BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
 BASE32_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ234567"
 BASE32_ALPHABET_EITHER_CASE = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ234567"
 BASE58_CHECK_LENGTH = 25  # Expected length of Base58Check encoded Bitcoin addresses
+UPPER_NIBBLES = frozenset('89abcdef')
 
-UUID_REGEX = re.compile(r'^\{?[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}\}?$', re.I)
-DID_REGEX = re.compile(r'^(did:[a-z0-9]+:)((?:[a-zA-Z0-9_.-]|%[a-fA-F0-9]{2})+)((/[^?]*)?([?].*)?)$')
-STELLAR_REGEX = re.compile(r'^(G|g)([' + BASE32_ALPHABET_EITHER_CASE + ']{55})$')
-IPFS_CIDV0_REGEX = re.compile(r'^(Qm)([' + BASE58_ALPHABET + ']{44})$')
-IPFS_CIDV1_REGEX = re.compile(r'^(b)([' + BASE32_ALPHABET_EITHER_CASE + ']{58,112})$')
-EOS_REGEX = re.compile(r"(^[a-z1-5.]{1,11}[a-z1-5]$)|(^[a-z1-5.]{12}[a-j1-5]$)")
-CARDANO_SHORT_BYRON_REGEX = re.compile(r'^(Ae2)([' + BASE58_ALPHABET + ']{50})([' + BASE58_ALPHABET + ']{6})$')
-CARDANO_LONG_BYRON_REGEX = re.compile(r'^(DdzFF)([' + BASE58_ALPHABET + ']{65})([' + BASE58_ALPHABET + ']{6})$')
-CARDANO_SHELLEY_REGEX = re.compile(r'^((?:addr|stake)(?:_test)?)(1[' + BASE32_ALPHABET_EITHER_CASE + ']{50,100})([' + BASE32_ALPHABET_EITHER_CASE + ']{6})$')
-BITCOIN_CASH_REGEX = re.compile(r'^((?:bitcoincash|bchtest):)?([pq][' + BASE32_ALPHABET + ']{41})', re.I)
-LITECOIN_LEGACY_REGEX = re.compile(r'^(t?L)([' + BASE58_ALPHABET + ']{33})$')
-LITECOIN_REGEX = re.compile(r'^(ltc)([' + BASE58_ALPHABET + ']{42,62})$')
-ETHEREUM_REGEX = re.compile(r'^(0x)?([a-fA-F0-9]{32})([a-fA-F0-9]{8})$')
-RIPPLE_REGEX = re.compile(r'^(r)([' + BASE58_ALPHABET + ']{33})$')
-BITCOIN_LEGACY_REGEX = re.compile(r'^([123mn])([' + BASE58_ALPHABET + ']{21,30})([' + BASE58_ALPHABET + ']{4})$')
-BITCOIN_SEGWIT_REGEX = re.compile(r'^(bc1|tb1)([' + BASE32_ALPHABET_EITHER_CASE + ']{39,69})$', re.I)
-SSH_KEY_REGEX = re.compile(r'(AAAA)([0-9A-Za-z+/]+={0,3})')
-HEX_REGEX = re.compile(r'^[a-fA-F0-9]+$')
-BASE64URL_NO_PAD_REGEX = re.compile(r'^[A-Za-z0-9-_]+$') # used by CESR
+UUID_REGEX = LazyRegex(r'^\{?[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}\}?$', re.I)
+DID_REGEX = LazyRegex(r'^(did:[a-z0-9]+:)((?:[a-zA-Z0-9_.-]|%[a-fA-F0-9]{2})+)((/[^?]*)?([?].*)?)$')
+STELLAR_REGEX = LazyRegex(r'^(G|g)([' + BASE32_ALPHABET_EITHER_CASE + ']{55})$')
+IPFS_CIDV0_REGEX = LazyRegex(r'^(Qm)([' + BASE58_ALPHABET + ']{44})$')
+IPFS_CIDV1_REGEX = LazyRegex(r'^(b)([' + BASE32_ALPHABET_EITHER_CASE + ']{58,112})$')
+EOS_REGEX = LazyRegex(r"(^[a-z1-5.]{1,11}[a-z1-5]$)|(^[a-z1-5.]{12}[a-j1-5]$)")
+CARDANO_SHORT_BYRON_REGEX = LazyRegex(r'^(Ae2)([' + BASE58_ALPHABET + ']{50})([' + BASE58_ALPHABET + ']{6})$')
+CARDANO_LONG_BYRON_REGEX = LazyRegex(r'^(DdzFF)([' + BASE58_ALPHABET + ']{65})([' + BASE58_ALPHABET + ']{6})$')
+CARDANO_SHELLEY_REGEX = LazyRegex(r'^((?:addr|stake)(?:_test)?)(1[' + BASE32_ALPHABET_EITHER_CASE + ']{50,100})([' + BASE32_ALPHABET_EITHER_CASE + ']{6})$')
+BITCOIN_CASH_REGEX = LazyRegex(r'^((?:bitcoincash|bchtest):)?([pq][' + BASE32_ALPHABET + ']{41})', re.I)
+LITECOIN_LEGACY_REGEX = LazyRegex(r'^(t?L)([' + BASE58_ALPHABET + ']{33})$')
+LITECOIN_REGEX = LazyRegex(r'^(ltc)([' + BASE58_ALPHABET + ']{42,62})$')
+ETHEREUM_REGEX = LazyRegex(r'^(0x)?([a-fA-F0-9]{32})([a-fA-F0-9]{8})$')
+RIPPLE_REGEX = LazyRegex(r'^(r)([' + BASE58_ALPHABET + ']{33})$')
+BITCOIN_LEGACY_REGEX = LazyRegex(r'^([123mn])([' + BASE58_ALPHABET + ']{21,30})([' + BASE58_ALPHABET + ']{4})$')
+BITCOIN_SEGWIT_REGEX = LazyRegex(r'^(bc1|tb1)([' + BASE32_ALPHABET_EITHER_CASE + ']{39,69})$', re.I)
+SSH_KEY_REGEX = LazyRegex(r'(AAAA)([0-9A-Za-z+/]+={0,3})')
+HEX_REGEX = LazyRegex(r'^[a-fA-F0-9]+$')
+BASE64URL_NO_PAD_REGEX = LazyRegex(r'^[A-Za-z0-9-_]+$') # used by CESR
 BASE64URL_ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_'
 
 MULTIHASH_HASH_FUNCS = {
@@ -98,7 +125,7 @@ def parse_hex_multihash(text) -> Parsed:
     See if we can parse text as a hex-encoded Multihash.
     If yes, return Parsed("hex multihash...", prefix (2 bytes), body, None).
     """
-    if text and len(text) >= 6:
+    if text and len(text) >= 6 and len(text) % 2 == 0:
         m = HEX_REGEX.match(text)
         if m: 
             answer = _parse_multihash(bytes.fromhex(text))
@@ -208,18 +235,14 @@ def to_EIP55_address(address: str) -> str:
     # Remove the '0x' prefix if present
     address = address.lower().replace('0x', '')
     
-    # Create a keccak-256 hash of the address
+    # Create a keccak-256 hash of the address (hashlib loads OpenSSL, so it
+    # is only imported when an Ethereum address turns up)
+    import hashlib
     hash = hashlib.sha3_256(address.encode('utf-8')).hexdigest()
     
-    # Apply the checksum
-    checksum_address = '0x'
-    for i, char in enumerate(address):
-        if int(hash[i], 16) >= 8:
-            checksum_address += char.upper()
-        else:
-            checksum_address += char.lower()
-    
-    return checksum_address
+    # Apply the checksum: upper-case where the hash nibble is 8 or more
+    return '0x' + ''.join(char.upper() if nibble in UPPER_NIBBLES else char
+                          for char, nibble in zip(address, hash))
 
 def parse_ethereum_address(text) -> Parsed:
     """
@@ -316,17 +339,6 @@ def parse_ipfs_cid(text) -> Parsed:
     if m:
         return Parsed(f"IPFS CID v1 256", m.group(1), m.group(2).lower(), None)
     
-# Register all the functions that do parsing (with one exception below).
-def register_parse_funcs():
-    g = globals()
-    parse_funcs = []
-    for name, value in g.items():
-        if name.startswith("parse_") and callable(value):
-            parse_funcs.append(value)
-    return parse_funcs
-parse_funcs = register_parse_funcs()
-del register_parse_funcs
-
 def parse_hex(text) -> Parsed:
     """
     See if we can parse text as a hex string.
@@ -342,19 +354,341 @@ def parse_hex(text) -> Parsed:
         if m:
             return Parsed("hex", prefix, text.upper(), None)
 
-# We put parse_hex at the end so it won't be attempted until after
-# we try many other parsers -- especially the Ethereum one, which
-# starts with "0x" and consists of pure hex, and the hex_multihash
-# one, which is also pure hex.
-parse_funcs.append(parse_hex)
+# Cheap necessary conditions for each parser to succeed: a set of possible
+# first characters plus the range of lengths the parser could accept. Each
+# parser may have several (first chars, lengths) alternatives. These must
+# never be stricter than the parser itself, or parse() would change behavior.
+# Parsers whose regexes use re.I are gated only on the first character; a
+# longer literal prefix can match non-ASCII case variants (e.g., "ı" for "i").
+ANY_LENGTH = range(1, sys.maxsize)
+ANY_FIRST_CHAR = None
+HEX_CHARS = "0123456789abcdefABCDEF"
+CESR_FIRST_CHARS = set(x[0][0] for x in CESR_1_BYTE_CODES + CESR_2_BYTE_CODES + CESR_4_BYTE_CODES)
+CARDANO_SHELLEY_LENGTHS = range(len("addr1") + 50 + 6, len("stake_test1") + 100 + 6 + 1)
+
+# A registered parser. Lower priority is tried first, except that a parser
+# is always tried after every registered parser named in after, and before
+# every one named in before.
+ParserSpec = collections.namedtuple('ParserSpec', ['func', 'priority', 'after', 'before', 'gates'])
 
-def parse(entropy: str) -> Parsed:
+registry = {}
+_registering_builtins = True
+# The registered parsers in the order parse() tries them. The same list
+# object is updated in place whenever the order changes.
+parse_funcs = []
+dispatch_index = {}
+
+def register_parser(func, priority: int=500, after=(), before=(), gates=((ANY_FIRST_CHAR, ANY_LENGTH),),
+                    name: str=None):
+    """
+    Add func (stripped text -> Parsed or None) to the parsers parse() tries,
+    or replace the one registered under the same name (func.__name__ by
+    default).
+
+    after and before name parsers that func must be tried after or before,
+    whatever their priorities. Any two parsers that can both match the same
+    text need such a constraint, so that adaptive ordering never changes an
+    answer. gates are (first chars, lengths) alternatives as above; first
+    chars ANY_FIRST_CHAR means any.
+    """
+    name = name or func.__name__
+    spec = ParserSpec(func, priority, tuple(after), tuple(before), tuple(gates))
+    if _registering_builtins:
+        registry[name] = spec
+        return func
+    previous = registry.get(name)
+    registry[name] = spec
+    try:
+        _reorder()
+    except ValueError:
+        if previous is None:
+            del registry[name]
+        else:
+            registry[name] = previous
+        _reorder()
+        raise
+    # A new parser can change answers that were already cached.
+    from . import cache
+    cache.invalidate()
+    return func
+
+def unregister_parser(name: str):
+    del registry[name]
+    _reorder()
+    from . import cache
+    cache.invalidate()
+
+def ordered_parser_names(rank=None):
+    """
+    The registered parser names in the order to try them: every after and
+    before constraint holds, and otherwise lower (rank(name), priority) goes
+    first.
+    """
+    import heapq
+    rank = rank or (lambda name: 0)
+    waiting_on = {name: set(a for a in spec.after if a in registry) for name, spec in registry.items()}
+    for name, spec in registry.items():
+        for b in spec.before:
+            if b in registry:
+                waiting_on[b].add(name)
+    followers = {name: [] for name in registry}
+    for name, afters in waiting_on.items():
+        for a in afters:
+            followers[a].append(name)
+    ready = [(rank(name), registry[name].priority, name) for name, afters in waiting_on.items() if not afters]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        _, _, name = heapq.heappop(ready)
+        order.append(name)
+        for follower in followers[name]:
+            waiting_on[follower].discard(name)
+            if not waiting_on[follower]:
+                heapq.heappush(ready, (rank(follower), registry[follower].priority, follower))
+    if len(order) != len(registry):
+        raise ValueError(f"Parser order constraints form a cycle among {sorted(set(registry) - set(order))}")
+    return order
+
+def build_dispatch_index(names):
+    """
+    Map each possible first character to the parsers (of those named, in
+    order) that could match an input starting with it, along with the
+    lengths each accepts. The ANY_FIRST_CHAR entry is for every other
+    character.
+    """
+    index = {ANY_FIRST_CHAR: []}
+    for name in names:
+        spec = registry[name]
+        lengths_by_char = {}
+        for first_chars, lengths in spec.gates:
+            for c in [ANY_FIRST_CHAR] if first_chars is ANY_FIRST_CHAR else first_chars:
+                lengths_by_char.setdefault(c, []).append(lengths)
+        any_lengths = lengths_by_char.pop(ANY_FIRST_CHAR, [])
+        for c in lengths_by_char:
+            if c not in index:
+                index[c] = list(index[ANY_FIRST_CHAR])
+        for c, candidates in index.items():
+            lengths = lengths_by_char.get(c, []) + any_lengths
+            if lengths:
+                candidates.append((spec.func, tuple(lengths)))
+    return {c: tuple(candidates) for c, candidates in index.items()}
+
+def _reorder(rank=None):
+    global dispatch_index
+    names = ordered_parser_names(rank)
+    parse_funcs[:] = [registry[name].func for name in names]
+    dispatch_index = build_dispatch_index(names)
+
+# Adaptive ordering: count which parser answers each parse() (whether or not
+# the answer was cached), and every
+# ADAPT_EVERY answers, reorder so the most frequent are tried first wherever
+# the after constraints allow. The counts are halved at each reorder, so
+# they follow the recent mix of traffic.
+adaptive = False
+ADAPT_EVERY = 1000
+_hits = collections.Counter()
+_answers_since_reorder = 0
+
+def set_adaptive(enabled: bool=True, every: int=None):
+    """
+    Turn adaptive ordering on or off. Turning it off goes back to the
+    priority order.
+    """
+    global adaptive, ADAPT_EVERY, _answers_since_reorder
+    adaptive = enabled
+    if every:
+        ADAPT_EVERY = every
+    _hits.clear()
+    _answers_since_reorder = 0
+    _reorder()
+
+def _count_answer(func):
+    global _answers_since_reorder
+    _hits[func] += 1
+    _answers_since_reorder += 1
+    if _answers_since_reorder >= ADAPT_EVERY:
+        _answers_since_reorder = 0
+        ranks = {name: -_hits[spec.func] for name, spec in registry.items()}
+        for func in _hits:
+            _hits[func] //= 2
+        _reorder(ranks.get)
+
+PLUGIN_GROUP = 'entviz.parsers'
+
+def load_plugins(group: str=PLUGIN_GROUP):
+    """
+    Register the parsers that installed packages advertise as entry points
+    in group. Each entry point loads a parser function; its optional
+    attributes priority, after, before and gates are passed on to
+    register_parser(). Returns the names registered.
+
+    Not done on import: importlib.metadata alone takes longer to import than
+    the rest of entviz. Worker processes started by spawn (rather than fork)
+    need to call this themselves.
+    """
+    from importlib.metadata import entry_points
+    names = []
+    for point in entry_points(group=group):
+        func = point.load()
+        options = {key: getattr(func, key) for key in ('priority', 'after', 'before', 'gates') if hasattr(func, key)}
+        register_parser(func, name=point.name, **options)
+        names.append(point.name)
+    return names
+
+# The built-in parsers. The after constraints are between parsers that can
+# match the same text (e.g., 40 hex digits are both an Ethereum address and
+# hex); the priorities keep the order they have always been tried in.
+register_parser(parse_hex_multihash, 10,
+    gates=[(set(f"{code:02x}"[0] for code in MULTIHASH_HASH_FUNCS if code < 256), range(6, sys.maxsize))])
+register_parser(parse_cesr, 20, after=["parse_hex_multihash"],
+    gates=[(CESR_FIRST_CHARS, CESR_1_BYTE_LENGTHS | CESR_2_BYTE_LENGTHS | CESR_4_BYTE_LENGTHS)])
+register_parser(parse_ssh_key, 30, after=["parse_cesr"], gates=[("A", range(5, sys.maxsize))])
+register_parser(parse_bitcoin_address, 40, after=["parse_cesr"], gates=[("123mn", range(26, 36)), ("bBtT", range(42, 73))])
+register_parser(parse_ripple_address, 50, gates=[("r", {34})])
+register_parser(parse_ethereum_address, 60, after=["parse_hex_multihash", "parse_ssh_key"],
+    gates=[(HEX_CHARS, {40, 42})])
+register_parser(parse_litecoin_address, 70, gates=[("L", {34}), ("t", {35}), ("l", range(45, 66))])
+register_parser(parse_bitcoin_cash_address, 80, after=["parse_cesr"], gates=[("bBpPqQ", range(42, sys.maxsize))])
+register_parser(parse_cardano_address, 90, gates=[("A", {59}), ("D", {76}), ("as", CARDANO_SHELLEY_LENGTHS)])
+register_parser(parse_eos_address, 100, gates=[("abcdefghijklmnopqrstuvwxyz12345.", range(1, 14))])
+register_parser(parse_stellar_address, 110, gates=[("Gg", {56})])
+register_parser(parse_uuid, 120, after=["parse_hex_multihash", "parse_bitcoin_address", "parse_ssh_key"],
+    gates=[("{" + HEX_CHARS, range(32, 39))])
+register_parser(parse_did, 130, gates=[("d", range(7, sys.maxsize))])
+register_parser(parse_ipfs_cid, 140, after=["parse_bitcoin_cash_address"], gates=[("Q", {46}), ("b", range(59, 114))])
+# Pure hex is also the shape of several more specific types, so parse_hex
+# comes after all of them.
+register_parser(parse_hex, 1000,
+    after=["parse_hex_multihash", "parse_cesr", "parse_ssh_key", "parse_bitcoin_address",
+           "parse_ethereum_address", "parse_eos_address", "parse_uuid", "parse_ipfs_cid"],
+    gates=[(HEX_CHARS, ANY_LENGTH)])
+_registering_builtins = False
+_reorder()
+
+def parse(entropy: str, strict: bool=False) -> Parsed:
     """
     See if the entropy can be parsed as a known type. If yes,
-    return a Parsed tuple. If no, return None.
+    return a Parsed tuple. If no, return None. Answers are memoized
+    in cache.parse_cache.
+
+    With strict, a value that has the shape of a type with a checksum
+    (base58check, bech32, EIP-55 mixed case, ...) must also pass that
+    checksum, or the answer is None.
+    """
+    entropy = cache_key(entropy)
+    func, answer = parse_cache.get_or_compute(entropy, lambda: _answer(entropy))
+    # Counted on every call, cache hits included, so the counts follow the
+    # traffic rather than the distinct inputs.
+    if func is not None:
+        if adaptive:
+            _count_answer(func)
+        if instrument.enabled:
+            instrument.count_answer(func.__name__)
+    if strict and answer:
+        from .checksums import is_valid
+        if not is_valid(answer.type, entropy):
+            return None
+    return answer
+
+def _parse(entropy: str) -> Parsed:
+    """
+    Parse stripped entropy without consulting the cache. Only the parsers
+    that dispatch_index says could match are tried; the answer is the same
+    as trying every func in parse_funcs in order.
     """
-    entropy = entropy.strip()
-    for func in parse_funcs:
-        answer = func(entropy)
-        if answer:
-            return answer    
+    return _answer(entropy)[1]
+
+def _answer(entropy: str):
+    """
+    (the parser that answers, its Parsed) for stripped entropy, as _parse()
+    finds them, or (None, None).
+    """
+    if not entropy:
+        return None, None
+    n = len(entropy)
+    counting = instrument.enabled
+    candidates = dispatch_index.get(entropy[0])
+    if candidates is None:
+        candidates = dispatch_index[ANY_FIRST_CHAR]
+    for func, lengths in candidates:
+        for accepted in lengths:
+            if n in accepted:
+                answer = func(entropy)
+                if counting:
+                    instrument.count_parser(func.__name__, bool(answer))
+                if answer:
+                    return func, answer
+                break
+    return None, None
+
+def normalize(entropy: str, strict: bool=False) -> Parsed:
+    """
+    Like parse(), but never fails. If the entropy has no recognized type,
+    treat it as an arbitrary bag of bits (whitespace removed) and return it
+    as URL-safe base64 without padding.
+    """
+    answer = parse(entropy, strict)
+    if answer:
+        return answer
+    bits = ''.join(entropy.split()).encode('utf-8')
+    return Parsed("bits", None, base64.urlsafe_b64encode(bits).decode('ascii').rstrip('='), None)
+
+class ParseStats:
+    """
+    Running throughput counter for parse_many(). Pass one in to watch a bulk
+    run while it is in progress, or inspect it afterward.
+    """
+    def __init__(self):
+        self.count = 0
+        self.started = None
+        self.finished = None
+    @property
+    def seconds(self):
+        if self.started is None:
+            return 0.0
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return end - self.started
+    @property
+    def items_per_second(self):
+        seconds = self.seconds
+        return self.count / seconds if seconds else 0.0
+
+def _parse_chunk(chunk):
+    return [parse(entropy) for entropy in chunk]
+
+def _parse_chunk_strict(chunk):
+    return [parse(entropy, strict=True) for entropy in chunk]
+
+def read_entropies(source, numbered: bool=False):
+    """
+    Yield the non-blank lines of a newline-delimited file (a path, or an
+    open text file such as sys.stdin) one at a time, so arbitrarily large
+    inventories never have to fit in memory. With numbered, yield
+    (line number, text) pairs, counting the blank lines too.
+    """
+    if hasattr(source, 'read'):
+        for number, line in enumerate(source, 1):
+            line = line.strip()
+            if line:
+                yield (number, line) if numbered else line
+        return
+    with open(source, 'rt', encoding='utf-8') as f:
+        yield from read_entropies(f, numbered)
+
+def parse_many(entropies, workers: int=None, chunk_size: int=1000, stats: ParseStats=None,
+               strict: bool=False):
+    """
+    Parse an iterable of entropy strings, yielding a Parsed (or None) for each
+    one in input order. Input is consumed lazily in chunks of chunk_size. If
+    workers > 1 (the default is one per CPU), chunks are parsed in a process
+    pool, with only a few chunks per worker in flight at any time. strict is
+    as for parse().
+    """
+    if stats is None:
+        stats = ParseStats()
+    stats.started = time.perf_counter()
+    stats.finished = None
+    for answer in map_chunks(_parse_chunk_strict if strict else _parse_chunk, entropies, workers, chunk_size):
+        stats.count += 1
+        yield answer
+    stats.finished = time.perf_counter()
@@ -0,0 +1,138 @@
+"""
+Show thousands of entvizes, each labeled with its input, on pages of fixed-size
+tiles -- say, every key in an organization, for an audit:
+
+    with open('keys.html', 'wt') as out:
+        write_html(read_entropies('keys.txt'), out)
+
+write_html() makes one HTML document with an inline SVG per page;
+write_svg_pages() makes one SVG file per page. Either way every edge shape
+is defined once, in a <defs> the whole document shares, and each entviz is
+its unit-scale drawing (see render.UNIT_FONTSIZE) fitted into its tile by a
+nested <svg> with a viewBox. Inputs are read, drawn and written one at a
+time, so output starts at once and memory use doesn't grow with the input.
+"""
+from collections import namedtuple
+import itertools
+import os
+
+from . import svg_stream
+from .cell_shapes import define_all_edge_shapes
+from .colors import BLACK, WHITE
+from .layout import Cell, Point, Rect, Size, cell_size
+from .render import Entviz, UNIT_FONTSIZE, canvas_size, draw
+
+PageLayout = namedtuple('PageLayout', ['columns', 'rows', 'tile'])
+
+# 96 tiles to a page, in pixels.
+DEFAULT_LAYOUT = PageLayout(8, 12, Size(160, 120))
+PADDING = 6
+LABEL_HEIGHT = 14
+# Longer labels are cut short with an ellipsis.
+LABEL_CHARS = 24
+
+def page_size(layout: PageLayout) -> Size:
+    return Size(layout.tile.width * layout.columns, layout.tile.height * layout.rows)
+
+def tile_rect(layout: PageLayout, index: int) -> Rect:
+    """
+    The tile at index on a page, filling rows left to right, top to bottom.
+    """
+    row, column = divmod(index, layout.columns)
+    return Rect(Point(column * layout.tile.width, row * layout.tile.height), layout.tile)
+
+def drawing_rect(tile: Rect) -> Rect:
+    return Rect(Point(tile.left + PADDING, tile.top + PADDING),
+                Size(tile.size.width - 2 * PADDING, tile.size.height - 2 * PADDING - LABEL_HEIGHT))
+
+def label_rect(tile: Rect) -> Rect:
+    return Rect(Point(tile.left + PADDING, tile.bottom - PADDING - LABEL_HEIGHT),
+                Size(tile.size.width - 2 * PADDING, LABEL_HEIGHT))
+
+def label(entropy: str) -> str:
+    text = entropy.strip()
+    return text if len(text) <= LABEL_CHARS else text[:LABEL_CHARS - 1] + '…'
+
+def pages(entropies, layout: PageLayout=DEFAULT_LAYOUT):
+    """
+    The inputs in page-sized lists, read lazily.
+    """
+    per_page = layout.columns * layout.rows
+    entropies = iter(entropies)
+    while True:
+        page = list(itertools.islice(entropies, per_page))
+        if not page:
+            return
+        yield page
+
+def define_shared(svg) -> set:
+    """
+    Write the <defs> every tile uses; returns the ids defined.
+    """
+    return define_all_edge_shapes(svg, Cell(Point(0, 0), cell_size(UNIT_FONTSIZE)).edge_width, svg_stream)
+
+def draw_tile(svg, tile: Rect, entropy: str, defined: set):
+    """
+    Draw one labeled entviz into a tile of a page. An input that can't be
+    drawn gets a tile with its label and the error, so the rest go on.
+    """
+    where = label_rect(tile)
+    try:
+        entviz = Entviz(entropy)
+    except Exception as e:
+        svg_stream.text(svg, where, f"{label(entropy)}: {type(e).__name__}", BLACK, LABEL_HEIGHT * 0.75)
+        return
+    unit = canvas_size(entviz, UNIT_FONTSIZE)
+    area = drawing_rect(tile)
+    with svg_stream.group(svg, 'svg', [("x", f"{area.left}"), ("y", f"{area.top}"),
+                                       ("width", f"{area.size.width}"), ("height", f"{area.size.height}"),
+                                       ("viewBox", f"0 0 {unit.width} {unit.height}")]):
+        draw(svg, entviz, UNIT_FONTSIZE, svg_stream, defined=defined)
+    font_size = min(LABEL_HEIGHT * 0.75, where.size.width / (0.6 * (len(label(entropy)) + 1)))
+    svg_stream.text(svg, where, label(entropy), BLACK, font_size)
+
+def draw_page(svg, page, layout: PageLayout, defined: set):
+    svg_stream.rect(svg, Rect(Point(0, 0), page_size(layout)), WHITE)
+    for index, entropy in enumerate(page):
+        draw_tile(svg, tile_rect(layout, index), entropy, defined)
+
+def write_svg_pages(entropies, directory, layout: PageLayout=DEFAULT_LAYOUT, buffer_size: int=8192) -> int:
+    """
+    Write page-0001.svg, page-0002.svg, ... into directory (created if
+    needed), each with its own copy of the shared <defs>. Returns the number
+    of pages.
+    """
+    os.makedirs(directory, exist_ok=True)
+    count = 0
+    for count, page in enumerate(pages(entropies, layout), 1):
+        with open(os.path.join(directory, f"page-{count:04}.svg"), 'wt', encoding='utf-8') as out, \
+                svg_stream.canvas(page_size(layout), out, buffer_size) as svg:
+            draw_page(svg, page, layout, define_shared(svg))
+    return count
+
+HTML_START = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>svg[width="0"]{{position:absolute}} svg{{display:block;margin:0 auto 1em;break-after:page}}</style>
+</head><body>
+"""
+HTML_END = "</body></html>\n"
+
+def write_html(entropies, out, layout: PageLayout=DEFAULT_LAYOUT, title: str="entviz gallery",
+               buffer_size: int=8192) -> int:
+    """
+    Write one HTML document to out (anything with write(str)): an empty SVG
+    holding the shared <defs>, then an SVG per page. Returns the number of
+    pages.
+    """
+    out.write(HTML_START.format(title=title.translate(svg_stream.TEXT_ESCAPES)))
+    with svg_stream.canvas(Size(0, 0), out, buffer_size) as svg:
+        defined = define_shared(svg)
+    count = 0
+    for count, page in enumerate(pages(entropies, layout), 1):
+        with svg_stream.canvas(page_size(layout), out, buffer_size) as svg:
+            draw_page(svg, page, layout, defined)
+        out.write('\n')
+    out.write(HTML_END)
+    if hasattr(out, 'flush'):
+        out.flush()
+    return count
@@ -0,0 +1,163 @@
+"""
+Opt-in instrumentation: per-stage wall time and allocation counts, plus which
+parse_* functions were tried, which matched, and which answered each parse()
+(cached answers included). Off by default; while off, stage() hands back a
+shared do-nothing context manager and the parser counts cost one boolean test
+per candidate.
+
+    with instrument.profiling():
+        to_svg(entropy)
+    print(instrument.report())
+
+Allocation counts are the net change in sys.getallocatedblocks() across a
+stage, a cheap stand-in for tracemalloc: positive means the stage left more
+objects alive than it found.
+"""
+import sys
+import threading
+import time
+
+# Stages in pipeline order, for reports. Others are listed after these.
+STAGES = ["parse", "tokenize", "layout", "order_stats", "edges", "draw", "serialize"]
+
+enabled = False
+
+_lock = threading.Lock()
+_stages = {}
+_tried = {}
+_matched = {}
+_answered = {}
+_callbacks = []
+
+class _NullStage:
+    __slots__ = ()
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+
+_NULL_STAGE = _NullStage()
+
+class _Stage:
+    __slots__ = ('name', 'started', 'blocks')
+    def __init__(self, name: str):
+        self.name = name
+    def __enter__(self):
+        self.blocks = sys.getallocatedblocks()
+        self.started = time.perf_counter()
+        return self
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.started
+        blocks = sys.getallocatedblocks() - self.blocks
+        record(self.name, seconds, blocks)
+        return False
+
+def stage(name: str):
+    """
+    A context manager that records the time and allocations of its block
+    under name, if instrumentation is enabled.
+    """
+    if not enabled:
+        return _NULL_STAGE
+    return _Stage(name)
+
+def record(name: str, seconds: float, blocks: int=0):
+    with _lock:
+        totals = _stages.get(name)
+        if totals is None:
+            totals = _stages[name] = [0, 0.0, 0]
+        totals[0] += 1
+        totals[1] += seconds
+        totals[2] += blocks
+    for callback in _callbacks:
+        callback(name, seconds, blocks)
+
+def count_parser(name: str, matched: bool):
+    with _lock:
+        _tried[name] = _tried.get(name, 0) + 1
+        if matched:
+            _matched[name] = _matched.get(name, 0) + 1
+
+def count_answer(name: str):
+    # Per parse() call, cache hits included; tried and matched count only
+    # the parser calls a cache miss makes.
+    with _lock:
+        _answered[name] = _answered.get(name, 0) + 1
+
+def on_stage(callback):
+    """
+    Call callback(name, seconds, blocks) whenever an instrumented stage ends.
+    Returns callback, so this works as a decorator.
+    """
+    _callbacks.append(callback)
+    return callback
+
+def remove_callback(callback):
+    _callbacks.remove(callback)
+
+def enable():
+    global enabled
+    enabled = True
+
+def disable():
+    global enabled
+    enabled = False
+
+def reset():
+    with _lock:
+        _stages.clear()
+        _tried.clear()
+        _matched.clear()
+        _answered.clear()
+
+class profiling:
+    """
+    Enable instrumentation with fresh counts for the duration of a with
+    block, then put it back the way it was.
+    """
+    def __enter__(self):
+        self.was_enabled = enabled
+        reset()
+        enable()
+        return self
+    def __exit__(self, *exc):
+        if not self.was_enabled:
+            disable()
+        return False
+
+def snapshot() -> dict:
+    """
+    A copy of everything recorded so far, plus the stats of the caches, as
+    plain dicts ready for a metrics exporter or json.dumps.
+    """
+    from . import cache
+    with _lock:
+        stages = {name: {"calls": calls, "seconds": seconds, "blocks": blocks}
+                  for name, (calls, seconds, blocks) in _stages.items()}
+        parsers = {"tried": dict(_tried), "matched": dict(_matched), "answered": dict(_answered)}
+    named = [("parse", cache.parse_cache), ("plan", cache.plan_cache), ("render", cache.render_cache)]
+    if cache.disk_cache is not None:
+        named.append(("disk", cache.disk_cache))
+    caches = {name: c.stats._asdict() for name, c in named}
+    return {"enabled": enabled, "stages": stages, "parsers": parsers, "caches": caches}
+
+def report(stats: dict=None) -> str:
+    """
+    A human-readable breakdown of a snapshot (by default, the current one).
+    """
+    stats = stats or snapshot()
+    stages = stats["stages"]
+    names = [name for name in STAGES if name in stages] + sorted(set(stages) - set(STAGES))
+    total = sum(s["seconds"] for s in stages.values()) or 1.0
+    lines = [f"{'stage':12} {'calls':>7} {'ms':>10} {'%':>6} {'blocks':>9}"]
+    for name in names:
+        s = stages[name]
+        lines.append(f"{name:12} {s['calls']:7} {s['seconds'] * 1000:10.3f} {100 * s['seconds'] / total:6.1f} {s['blocks']:9}")
+    tried, matched = stats["parsers"]["tried"], stats["parsers"]["matched"]
+    answered = stats["parsers"].get("answered", {})
+    if tried or answered:
+        lines.append("")
+        lines.append(f"{'parser':32} {'tried':>7} {'matched':>7} {'answered':>8}")
+        for name in sorted(set(tried) | set(answered), key=lambda n: (-tried.get(n, 0), -answered.get(n, 0), n)):
+            lines.append(f"{name:32} {tried.get(name, 0):7} {matched.get(name, 0):7} {answered.get(name, 0):8}")
+    return '\n'.join(lines)
@@ -1,7 +1,15 @@
+from array import array
 from collections import namedtuple
+from fractions import Fraction
+import bisect
+import functools
 
 Point = namedtuple('Point', ['x', 'y'])
 Size = namedtuple('Size', ['width', 'height'])
+Grid = namedtuple('Grid', ['columns', 'rows'])
+
+# Never pad a grid with more than this many blank cells.
+MAX_BLANK_CELLS = 3
 
 Point.__str__ = lambda self: f'{self.x},{self.y}'
 
@@ -11,7 +19,7 @@ class Rect:
         self.size = size
         self._invalidate_cache()
     def __eq__(self, other):
-        if isinstance(other, Rect):
+        if isinstance(other, (Rect, FrozenRect)):
             return self.top_left == other.top_left and self.size == other.size
         return False
     def __ne__(self, value: object) -> bool:
@@ -125,3 +133,277 @@ class Cell(Rect):
             self._edge_rects[edge] = r
         return r
 
+def divisor_pairs(n: int):
+    """
+    Yield every (a, b) with a * b == n, in O(sqrt(n)) steps.
+    """
+    a = 1
+    while a * a <= n:
+        if n % a == 0:
+            yield a, n // a
+            if a != n // a:
+                yield n // a, a
+        a += 1
+
+@functools.lru_cache(maxsize=4096)
+def grid_candidates(token_count: int):
+    """
+    Every grid that holds token_count tokens with no more than MAX_BLANK_CELLS
+    blanks, as (aspect ratio, cell count, columns, Grid) sorted in order of
+    preference: narrowest first, then fewest cells, then fewest columns.
+    """
+    token_count = max(token_count, 1)
+    candidates = []
+    for cell_count in range(token_count, token_count + MAX_BLANK_CELLS + 1):
+        for columns, rows in divisor_pairs(cell_count):
+            candidates.append((Fraction(2 * columns, rows), cell_count, columns, Grid(columns, rows)))
+    candidates.sort()
+    return tuple(candidates)
+
+# (token count, reduced aspect ratio) -> Grid, filled by precompute_grids().
+# Unlike the LRU behind it, nothing is ever evicted.
+grid_table = {}
+
+@functools.lru_cache(maxsize=65536)
+def best_grid(token_count: int, target: Fraction) -> Grid:
+    """
+    The grid choose_grid() picks for an aspect ratio given as a Fraction.
+    """
+    candidates = grid_candidates(token_count)
+    i = bisect.bisect_left(candidates, target, key=lambda c: c[0])
+    if i == len(candidates):
+        # Nothing is wide enough; take the widest, preferring fewer cells.
+        widest = candidates[-1][0]
+        i = bisect.bisect_left(candidates, widest, key=lambda c: c[0])
+    return candidates[i][3]
+
+def choose_grid(token_count: int, ar_width: int=1, ar_height: int=1) -> Grid:
+    """
+    Pick the grid of 2:1 cells, holding token_count tokens with no more than
+    MAX_BLANK_CELLS blanks, whose aspect ratio is closest to the target
+    without being less than it. If every grid is narrower than the target,
+    pick the closest one anyway.
+    """
+    target = Fraction(ar_width, ar_height)
+    grid = grid_table.get((token_count, target))
+    if grid is None:
+        grid = best_grid(token_count, target)
+    return grid
+
+# The aspect ratios app.main() accepts.
+APP_ASPECT_RATIOS = [(w, h) for w in range(1, 101) for h in range(1, 101)]
+
+def precompute_grids(max_token_count: int, ratios=None):
+    """
+    Warm the grid tables so later choose_grid() calls are lookups. Candidate
+    lists are built for every token count up to max_token_count; if ratios
+    (a list of (width, height), such as APP_ASPECT_RATIOS) is given, the
+    answer for each of them goes in grid_table, which is never evicted.
+    Ratios are reduced first, so 2:2 and 1:1 share an entry.
+    """
+    targets = {Fraction(w, h) for w, h in ratios or ()}
+    for token_count in range(1, max_token_count + 1):
+        grid_candidates(token_count)
+        for target in targets:
+            grid_table[(token_count, target)] = best_grid.__wrapped__(token_count, target)
+
+def nucleus_height(fontsize) -> float:
+    """
+    Convert a font size in points to pixels (at 96 DPI).
+    """
+    return fontsize * 96 / 72
+
+def cell_size(fontsize) -> Size:
+    height = nucleus_height(fontsize)
+    return Size(height * 4, height * 2)
+
+def grid_cell(grid: Grid, cell_index: int, size: Size) -> Cell:
+    column, row = cell_index % grid.columns, cell_index // grid.columns
+    return Cell(Point(column * size.width, row * size.height), size)
+
+class FrozenRect(namedtuple('FrozenRect', ['left', 'top', 'width', 'height'])):
+    """
+    An immutable, allocation-light rect with the same read-only API as Rect.
+    """
+    __slots__ = ()
+    def __eq__(self, other):
+        if isinstance(other, Rect):
+            return self.top_left == other.top_left and self.size == other.size
+        return tuple.__eq__(self, other)
+    def __ne__(self, other):
+        return not self.__eq__(other)
+    __hash__ = tuple.__hash__
+    @property
+    def top_left(self):
+        return Point(self.left, self.top)
+    @property
+    def size(self):
+        return Size(self.width, self.height)
+    @property
+    def right(self):
+        return self.left + self.width
+    @property
+    def bottom(self):
+        return self.top + self.height
+    @property
+    def top_right(self):
+        return Point(self.left + self.width, self.top)
+    @property
+    def bottom_left(self):
+        return Point(self.left, self.top + self.height)
+    @property
+    def bottom_right(self):
+        return Point(self.left + self.width, self.top + self.height)
+    @property
+    def center(self):
+        return Point(self.left + self.width / 2, self.top + self.height / 2)
+
+# Offsets of the 7 rects stored per cell in GridGeometry: the nucleus, then edges 0-5.
+NUCLEUS = 0
+RECTS_PER_CELL = 7
+
+# Build GridGeometry with NumPy (when installed) for at least this many
+# cells. Below it, making the arrays costs more than the loop.
+VECTOR_THRESHOLD = 64
+
+_np = None
+
+def _numpy():
+    global _np
+    if _np is None:
+        try:
+            import numpy
+            _np = numpy
+        except ImportError:
+            _np = False
+    return _np
+
+def _loop_rects(grid: Grid, cell_size: Size) -> array:
+    # Same arithmetic as Cell, so the coordinates match it exactly.
+    e = cell_size.height / 4
+    nw, nh = e * 6, e * 2
+    half = nw / 2
+    rects = array('d')
+    for row in range(grid.rows):
+        y = row * cell_size.height
+        nt = y + e
+        nb = nt + nh
+        for column in range(grid.columns):
+            x = column * cell_size.width
+            nl = x + e
+            cx = x + cell_size.width / 2
+            rects.extend((
+                nl, nt, nw, nh,
+                nl, y, half, e,
+                cx, y, half, e,
+                nl + nw, nt, e, nh,
+                cx, nb, half, e,
+                nl, nb, half, e,
+                x, nt, e, nh))
+    return rects
+
+def _vector_rects(np, grid: Grid, cell_size: Size) -> array:
+    """
+    The rects of _loop_rects in one step: the per-cell template of 7 rects,
+    with column offsets broadcast across rows. Each coordinate is the same
+    sum of the same terms, so the floats are identical.
+    """
+    e = cell_size.height / 4
+    nw, nh = e * 6, e * 2
+    half = nw / 2
+    x = np.arange(grid.columns, dtype=np.float64) * cell_size.width
+    y = (np.arange(grid.rows, dtype=np.float64) * cell_size.height)[:, None]
+    nl = x + e
+    cx = x + cell_size.width / 2
+    nt = y + e
+    nb = nt + nh
+    lefts = [nl, nl, cx, nl + nw, cx, nl, x]
+    tops = [nt, y, y, nt, nb, nb, nt]
+    sizes = [(nw, nh), (half, e), (half, e), (e, nh), (half, e), (half, e), (e, nh)]
+    rects = np.empty((grid.rows, grid.columns, RECTS_PER_CELL, 4), dtype=np.float64)
+    for which, (left, top, (width, height)) in enumerate(zip(lefts, tops, sizes)):
+        rects[:, :, which, 0] = left
+        rects[:, :, which, 1] = top
+        rects[:, :, which, 2] = width
+        rects[:, :, which, 3] = height
+    return array('d', rects.tobytes())
+
+class GridGeometry:
+    """
+    The nucleus and edge rects of every cell in a grid, computed in one pass
+    (one vectorized step for big grids, with NumPy) and stored in a single
+    flat array of floats (left, top, width, height for each of
+    RECTS_PER_CELL rects per cell). Immutable once built; cell() returns a
+    light view with the same read-only API as Cell.
+    """
+    __slots__ = ('grid', 'cell_size', 'rects')
+    def __init__(self, grid: Grid, cell_size: Size):
+        self.grid = grid
+        self.cell_size = cell_size
+        np = _numpy() if grid.columns * grid.rows >= VECTOR_THRESHOLD else None
+        self.rects = _vector_rects(np, grid, cell_size) if np else _loop_rects(grid, cell_size)
+    def __len__(self):
+        return self.grid.columns * self.grid.rows
+    def rect(self, cell_index: int, which: int) -> FrozenRect:
+        i = (cell_index * RECTS_PER_CELL + which) * 4
+        r = self.rects
+        return FrozenRect(r[i], r[i + 1], r[i + 2], r[i + 3])
+    def nucleus(self, cell_index: int) -> FrozenRect:
+        return self.rect(cell_index, NUCLEUS)
+    def edge_rect(self, cell_index: int, edge: int) -> FrozenRect:
+        if edge < 0 or edge > 5:
+            raise ValueError("Edge must be 0 to 5")
+        return self.rect(cell_index, edge + 1)
+    def cell(self, cell_index: int) -> 'CellView':
+        if cell_index < 0 or cell_index >= len(self):
+            raise IndexError("Cell index out of range")
+        return CellView(self, cell_index)
+
+@functools.lru_cache(maxsize=64)
+def grid_geometry(grid: Grid, cell_size: Size) -> GridGeometry:
+    """
+    A shared GridGeometry for a grid and cell size. It is immutable, so every
+    render (or diff) at the same size can use the same one.
+    """
+    return GridGeometry(grid, cell_size)
+
+class CellView:
+    """
+    One cell of a GridGeometry, with the read-only API of Cell.
+    """
+    __slots__ = ('geometry', 'index')
+    def __init__(self, geometry: GridGeometry, index: int):
+        self.geometry = geometry
+        self.index = index
+    @property
+    def size(self):
+        return self.geometry.cell_size
+    @property
+    def left(self):
+        return (self.index % self.geometry.grid.columns) * self.size.width
+    @property
+    def top(self):
+        return (self.index // self.geometry.grid.columns) * self.size.height
+    @property
+    def right(self):
+        return self.left + self.size.width
+    @property
+    def bottom(self):
+        return self.top + self.size.height
+    @property
+    def top_left(self):
+        return Point(self.left, self.top)
+    @property
+    def center(self):
+        return Point(self.left + self.size.width / 2, self.top + self.size.height / 2)
+    @property
+    def edge_height(self):
+        return self.size.height / 4
+    @property
+    def edge_width(self):
+        return self.edge_height
+    @property
+    def nucleus(self):
+        return self.geometry.nucleus(self.index)
+    def edge_rect(self, edge: int):
+        return self.geometry.edge_rect(self.index, edge)
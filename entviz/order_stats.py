@@ -0,0 +1,95 @@
+"""
+Find the median, first/last and quartile tokens without fully sorting the
+tokens twice. For long token lists (and when NumPy is installed), each
+token's sort key -- its text or its mirrored text, followed by its token index
+as a tie-break -- is packed into one 64-bit integer, and every order statistic
+needed from each ordering comes out of a single numpy.partition call. Short
+lists share one sort per ordering. Answers are the same as the sort-based
+definitions in entviz.tokens.
+"""
+from collections import namedtuple
+
+OrderStats = namedtuple('OrderStats', ['median', 'first', 'last', 'quartiles'])
+
+# Use numpy.partition for at least this many tokens. Below it, building
+# the arrays costs more than sorting.
+SELECT_THRESHOLD = 64
+# Packed keys use 8 bits per character, and the rest of a uint64 for the
+# token index.
+MAX_PACKED_TEXT = 6
+
+_np = None
+
+def _numpy():
+    global _np
+    if _np is None:
+        try:
+            import numpy
+            _np = numpy
+        except ImportError:
+            _np = False
+    return _np
+
+def quartile_positions(n: int):
+    """
+    Where the first token of each quarter sits in a sorted list of n tokens
+    padded with blanks to a multiple of 4; None for a quarter of blanks.
+    """
+    size = -(-n // 4)
+    return [i * size if i * size < n else None for i in range(4)]
+
+def sorted_order_statistics(tokens) -> 'OrderStats':
+    n = len(tokens)
+    ordered = sorted(tokens, key=lambda t: (t.text, t.index))
+    mirrored = sorted(tokens, key=lambda t: (t.text[::-1], t.index))
+    quartiles = [mirrored[i] if i is not None else None for i in quartile_positions(n)]
+    return OrderStats(ordered[(n - 1) // 2], ordered[0], ordered[-1], quartiles)
+
+def packed_keys(tokens, np):
+    """
+    Two uint64 arrays that order the same way as (text, index) and as
+    (mirrored text, index). Text is packed a byte per character, padded with
+    NULs, so shorter text sorts before longer text that it is a prefix of.
+    Returns None if the tokens can't be packed that way.
+    """
+    n = len(tokens)
+    width = len(tokens[0].text)
+    last = len(tokens[-1].text)
+    text = ''.join(t.text for t in tokens)
+    if (width > MAX_PACKED_TEXT or n > 1 << (64 - 8 * width) or last > width
+            or len(text) != width * (n - 1) + last or not text.isascii() or '\0' in text
+            or any(len(t.text) != width for t in tokens[:-1])):
+        return None
+    chars = np.zeros(n * width, dtype=np.uint64)
+    chars[:len(text)] = np.frombuffer(text.encode('ascii'), dtype=np.uint8)
+    chars = chars.reshape(n, width)
+    mirrored = chars[:, ::-1].copy()
+    # The last token may be short; mirror only the characters it has.
+    mirrored[-1] = 0
+    mirrored[-1, :last] = chars[-1, :last][::-1]
+    weights = np.uint64(1) << (np.arange(width - 1, -1, -1, dtype=np.uint64) * np.uint64(8))
+    index_bits = np.uint64(64 - 8 * width)
+    indexes = np.arange(n, dtype=np.uint64)
+    return ((chars * weights).sum(axis=1, dtype=np.uint64) << index_bits) | indexes, \
+           ((mirrored * weights).sum(axis=1, dtype=np.uint64) << index_bits) | indexes
+
+def order_statistics(tokens) -> OrderStats:
+    """
+    The median token, the first and last tokens in ASCII order, and the 4
+    quartile tokens (None for a quarter of blanks). Tokens must be in token
+    index order, as tokenize() returns them.
+    """
+    n = len(tokens)
+    np = _numpy() if n >= SELECT_THRESHOLD else None
+    keys = packed_keys(tokens, np) if np else None
+    if keys is None:
+        return sorted_order_statistics(tokens)
+    ascii_keys, mirrored_keys = keys
+    mask = np.uint64((1 << (64 - 8 * len(tokens[0].text))) - 1)
+    wanted = [0, (n - 1) // 2, n - 1]
+    ascii_keys.partition(wanted)
+    first, median, last = [tokens[int(ascii_keys[k] & mask)] for k in wanted]
+    positions = quartile_positions(n)
+    mirrored_keys.partition([p for p in positions if p is not None])
+    quartiles = [tokens[int(mirrored_keys[p] & mask)] if p is not None else None for p in positions]
+    return OrderStats(median, first, last, quartiles)
@@ -0,0 +1,41 @@
+import collections
+import os
+
+def chunks(items, chunk_size: int):
+    """
+    Group an iterable into lists of chunk_size items, lazily.
+    """
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def map_chunks(func, items, workers: int=None, chunk_size: int=1000):
+    """
+    Call func (a top-level function that takes a list and returns a list of
+    the same length) on chunks of items, and yield the results one at a time
+    in input order. If workers > 1 (the default is one per CPU), chunks run in
+    a process pool with only a couple of chunks per worker in flight, so
+    memory stays bounded no matter how long items is.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        for chunk in chunks(items, chunk_size):
+            yield from func(chunk)
+        return
+    # Imported here: concurrent.futures pulls in logging and more, which
+    # in-process callers never need.
+    import concurrent.futures
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = collections.deque()
+        for chunk in chunks(items, chunk_size):
+            pending.append(pool.submit(func, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
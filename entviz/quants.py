@@ -0,0 +1,95 @@
+"""
+NumPy versions of the tokenizer's quant math, for long cores and batches.
+tokens.tokenize() uses this automatically for long cores when NumPy is
+installed; everything here gives the same numbers as the pure-Python code.
+"""
+import numpy as np
+
+from .tokens import CHAR_VALUES, BITS_PER_CHAR, TOKEN_LENGTHS, QUANT_BITS
+
+# Marks the slots of a ragged batch that hold no token. Real quants are < 2**24.
+NO_QUANT = 0xffffffff
+
+EDGE_SHIFTS = np.arange(0, QUANT_BITS, 4, dtype=np.uint32)
+
+def _value_table(encoding):
+    table = np.zeros(128, dtype=np.uint32)
+    for c, v in CHAR_VALUES[encoding].items():
+        table[ord(c)] = v
+    return table
+
+VALUE_TABLES = {encoding: _value_table(encoding) for encoding in CHAR_VALUES}
+
+def _code_points(cores, width):
+    codes = np.zeros((len(cores), width), dtype=np.uint32)
+    for row, core in enumerate(cores):
+        if core:
+            codes[row, :len(core)] = np.frombuffer(core.encode('utf-32-le'), dtype=np.uint32)
+    return codes
+
+def extend_quants(values, bits):
+    """
+    Vectorized tokens.extend_quant(): widen each value to 24 bits by
+    repeating its low-order bits.
+    """
+    values = values.astype(np.uint32)
+    bits = bits.astype(np.uint32)
+    while True:
+        short = (bits < QUANT_BITS) & (bits > 0)
+        if not short.any():
+            break
+        n = np.where(short, np.minimum(bits, QUANT_BITS - bits), 0)
+        low = values & ((np.uint32(1) << n) - 1)
+        values = np.where(short, (values << n) | low, values)
+        bits = bits + n
+    return np.where(bits == 0, 0, values).astype(np.uint32)
+
+def batch_quants(cores, encoding: str):
+    """
+    Compute the quants of many cores that share an encoding, returning a
+    2-D uint32 array with one row per core. Rows for shorter cores are
+    padded with NO_QUANT.
+    """
+    length = TOKEN_LENGTHS[encoding]
+    bits_per_char = BITS_PER_CHAR[encoding]
+    mask = (1 << bits_per_char) - 1
+    lengths = np.array([len(core) for core in cores], dtype=np.int64)
+    token_count = int(-(-lengths.max() // length)) if len(cores) else 0
+    codes = _code_points(cores, token_count * length)
+    table = VALUE_TABLES[encoding]
+    values = np.where(codes < 128, table[codes & 127], codes & mask).astype(np.uint32)
+    values = values.reshape(len(cores), token_count, length)
+    # How many characters land in each token: `length`, except at the end.
+    starts = np.arange(token_count, dtype=np.int64) * length
+    chars = np.clip(lengths[:, None] - starts[None, :], 0, length)
+    position = np.arange(length, dtype=np.int64)
+    shifts = (chars[..., None] - 1 - position) * bits_per_char
+    valid = position < chars[..., None]
+    parts = np.where(valid, values << np.where(valid, shifts, 0).astype(np.uint32), 0)
+    quants = extend_quants(parts.sum(axis=2, dtype=np.uint32), chars * bits_per_char)
+    return np.where(chars > 0, quants, NO_QUANT).astype(np.uint32)
+
+def core_quants(core: str, encoding: str):
+    """
+    Compute the quant of every token in a core, in one pass.
+    """
+    return batch_quants([core], encoding)[0]
+
+def edge_nums(quants):
+    """
+    Split quants into their six 4-bit edge nums (edge index 0 = bits 0-3).
+    The result has one more axis than quants, of length 6.
+    """
+    return (np.asarray(quants, dtype=np.uint32)[..., None] >> EDGE_SHIFTS) & 0xf
+
+def color_bases(quants):
+    return edge_nums(quants) & 3
+
+def shape_bases(quants):
+    return edge_nums(quants) >> 2
+
+def quant_rgb(quants):
+    """
+    Split quants into (r, g, b) bytes, red in the low-order byte.
+    """
+    return ((np.asarray(quants, dtype=np.uint32)[..., None] >> np.array([0, 8, 16], dtype=np.uint32)) & 0xff).astype(np.uint8)
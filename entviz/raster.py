@@ -0,0 +1,165 @@
+"""
+A raster backend: draws an entviz into a NumPy RGB framebuffer and encodes
+it as PNG with zlib, with no cairo or browser involved. It has the drawing
+surface of entviz.shapes, so render.draw() lays it out from the same cell
+geometry as the SVG.
+
+Everything an entviz is made of -- axis-aligned rects, 45-degree right
+triangles and circles -- is filled by pixel center: a pixel is painted if its
+center falls inside the shape, so shapes on whole-pixel coordinates (as at the
+default font size) come out exact. Token text is not drawn; there is no font
+rasterizer here.
+"""
+import functools
+import math
+import struct
+import sys
+import zlib
+
+import numpy as np
+
+from . import cache
+from .render import Entviz, canvas_size, disk_key, draw
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+class Framebuffer:
+    """
+    An RGB image as a (height, width, 3) uint8 array in pixels. reset() reuses
+    the memory of the last image when the new one fits, so rendering many
+    entvizes allocates only when an image is bigger than any before it.
+    """
+    def __init__(self, width: int=0, height: int=0):
+        self._memory = np.empty(0, dtype=np.uint8)
+        self._scanlines = np.empty(0, dtype=np.uint8)
+        self.allocations = 0
+        self.reset(width, height)
+    def reset(self, width: int, height: int):
+        needed = width * height * 3
+        if needed > self._memory.size:
+            self._memory = np.empty(needed, dtype=np.uint8)
+            self.allocations += 1
+        self.pixels = self._memory[:needed].reshape(height, width, 3)
+        self.pixels[:] = 0
+        return self
+    @property
+    def width(self) -> int:
+        return self.pixels.shape[1]
+    @property
+    def height(self) -> int:
+        return self.pixels.shape[0]
+    def png(self, level: int=6) -> bytes:
+        """
+        Encode the image as an 8-bit RGB PNG, each scanline unfiltered.
+        """
+        height, width = self.height, self.width
+        needed = height * (width * 3 + 1)
+        if needed > self._scanlines.size:
+            self._scanlines = np.empty(needed, dtype=np.uint8)
+        scanlines = self._scanlines[:needed].reshape(height, width * 3 + 1)
+        scanlines[:, 0] = 0
+        scanlines[:, 1:] = self.pixels.reshape(height, width * 3)
+        return (PNG_SIGNATURE
+                + _png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+                + _png_chunk(b'IDAT', zlib.compress(scanlines, level))
+                + _png_chunk(b'IEND', b''))
+
+def _png_chunk(tag: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+
+@functools.lru_cache(maxsize=4096)
+def rgb_of(color: str):
+    """
+    "#rrggbb" -> a uint8 array of (r, g, b). Bounded: nucleus colors come
+    from quants, so a long run sees millions of them.
+    """
+    return np.frombuffer(bytes.fromhex(color[1:]), dtype=np.uint8)
+
+def _pixel_span(start: float, end: float, limit: int):
+    # Pixels whose centers (i + 0.5) fall in [start, end), clipped to the image.
+    return max(0, math.ceil(start - 0.5)), min(limit, math.ceil(end - 0.5))
+
+def _centers(first: int, count: int, origin: float, size: float):
+    # Pixel centers from pixel first on, relative to origin, in units of size.
+    return (np.arange(first, first + count) + 0.5 - origin) / size
+
+@functools.lru_cache(maxsize=4096)
+def _triangle_mask(rows: int, columns: int, dy: float, dx: float, size: float, rotation: int):
+    v = _centers(0, rows, dy, size)[:, None]
+    u = _centers(0, columns, dx, size)[None, :]
+    if rotation == 0:
+        return u <= v
+    if rotation == 90:
+        return u + v <= 1
+    if rotation == 180:
+        return u >= v
+    return u + v >= 1
+
+@functools.lru_cache(maxsize=4096)
+def _disc_mask(rows: int, columns: int, dy: float, dx: float, radius: float):
+    y = _centers(0, rows, dy, 1)[:, None]
+    x = _centers(0, columns, dx, 1)[None, :]
+    return x * x + y * y <= radius * radius
+
+def canvas(size, framebuffer: Framebuffer=None) -> Framebuffer:
+    width, height = math.ceil(size.width), math.ceil(size.height)
+    if framebuffer is None:
+        return Framebuffer(width, height)
+    return framebuffer.reset(width, height)
+
+def rect(fb: Framebuffer, where, fill_color: str):
+    x0, x1 = _pixel_span(where.left, where.left + where.size.width, fb.width)
+    y0, y1 = _pixel_span(where.top, where.top + where.size.height, fb.height)
+    if x0 < x1 and y0 < y1:
+        fb.pixels[y0:y1, x0:x1] = rgb_of(fill_color)
+
+def right_triangle(fb: Framebuffer, where, rotation: int, fill_color: str="red"):
+    if rotation not in (0, 90, 180, 270):
+        raise ValueError("Rotation degree must be 0, 90, 180, or 270")
+    x0, x1 = _pixel_span(where.left, where.left + where.size.width, fb.width)
+    y0, y1 = _pixel_span(where.top, where.top + where.size.height, fb.height)
+    if x0 < x1 and y0 < y1:
+        mask = _triangle_mask(y1 - y0, x1 - x0, where.top - y0, where.left - x0, where.size.width, rotation)
+        fb.pixels[y0:y1, x0:x1][mask] = rgb_of(fill_color)
+
+def circle(fb: Framebuffer, where, fill_color: str="blue"):
+    center = where.center
+    radius = where.size.width / 2
+    x0, x1 = _pixel_span(center.x - radius, center.x + radius, fb.width)
+    y0, y1 = _pixel_span(center.y - radius, center.y + radius, fb.height)
+    if x0 < x1 and y0 < y1:
+        mask = _disc_mask(y1 - y0, x1 - x0, center.y - y0, center.x - x0, radius)
+        fb.pixels[y0:y1, x0:x1][mask] = rgb_of(fill_color)
+
+def text(fb: Framebuffer, where, content: str, fill_color: str, font_size):
+    pass
+
+def render_framebuffer(entropy: str, ar_width: int=1, ar_height: int=1, fontsize=12,
+                       framebuffer: Framebuffer=None) -> Framebuffer:
+    """
+    Draw an entviz into framebuffer (reused if given, else a new one).
+    """
+    entviz = Entviz(entropy, ar_width, ar_height)
+    fb = canvas(canvas_size(entviz, fontsize), framebuffer)
+    draw(fb, entviz, fontsize, sys.modules[__name__])
+    return fb
+
+def to_png(entropy: str, ar_width: int=1, ar_height: int=1, fontsize=12,
+           framebuffer: Framebuffer=None, level: int=6) -> bytes:
+    """
+    Render an entviz as PNG bytes, through cache.disk_cache if there is one.
+    """
+    def compute():
+        return render_framebuffer(entropy, ar_width, ar_height, fontsize, framebuffer).png(level)
+    if cache.disk_cache is None:
+        return compute()
+    return cache.disk_cache.get_or_compute(disk_key(entropy, ar_width, ar_height, fontsize, 'png', level), compute)
+
+def png_many(entropies, ar_width: int=1, ar_height: int=1, fontsize=12, level: int=6):
+    """
+    Render each entropy string as PNG bytes, in order, drawing every one into
+    the same framebuffer.
+    """
+    framebuffer = Framebuffer()
+    for entropy in entropies:
+        yield to_png(entropy, ar_width, ar_height, fontsize, framebuffer, level)
@@ -0,0 +1,208 @@
+"""
+A performance regression gate built on entviz.bench: record a baseline of
+the parse, layout and SVG cases on this machine, then check later runs
+against it.
+
+    python -m entviz.regress save [--baseline FILE]
+    python -m entviz.regress check [--baseline FILE] [--threshold 0.25]
+
+Each case is timed as in bench, and its allocations are measured with
+tracemalloc: the peak bytes allocated during one call, and the bytes still
+held after it. Timings only compare on the same hardware and Python, so the
+baseline file holds one entry per machine fingerprint; check compares
+against this machine's entry. It exits 1 and lists what got worse when any
+case is slower (or allocates more) than threshold allows, and exits 2 if
+there is no baseline for this machine yet.
+
+The same check runs under pytest when ENTVIZ_PERF_BASELINE names a baseline
+file (see tests/test_regress.py).
+"""
+from argparse import ArgumentParser
+from collections import namedtuple
+import gc
+import hashlib
+import json
+import os
+import platform
+import sys
+import tracemalloc
+
+from .bench import cases, environment, time_case
+
+GATED_STAGES = ["parse", "layout", "svg"]
+DEFAULT_BASELINE = "entviz-perf-baseline.json"
+# A case regresses when it is this much (a fraction) slower than baseline.
+DEFAULT_THRESHOLD = 0.25
+# Allocation changes smaller than this many bytes are noise, not regressions.
+ALLOCATION_SLACK = 4096
+
+Change = namedtuple('Change', ['name', 'metric', 'baseline', 'current', 'regressed'])
+
+def cpu_model() -> str:
+    """
+    The CPU's model name where the system says (Linux), else whatever
+    platform.processor() knows.
+    """
+    try:
+        with open('/proc/cpuinfo', 'rt') as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                if name.strip() == 'model name':
+                    return value.strip()
+    except OSError:
+        pass
+    return platform.processor()
+
+def fingerprint() -> str:
+    """
+    A short id for the kind of machine and Python: what timings depend on.
+    The host name isn't part of it, so identical machines (say, CI runners)
+    share a baseline.
+    """
+    env = environment()
+    parts = [env[k] for k in ("python", "implementation", "machine", "system")]
+    parts.append(cpu_model())
+    parts.append(str(os.cpu_count()))
+    return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+def allocations(func):
+    """
+    (peak, retained) bytes allocated by one call of func, once it has been
+    called once already so that caches and lazy imports don't count.
+    """
+    func()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak, retained
+
+def measure(stages=GATED_STAGES, name_filter: str=None, min_time: float=0.2, repeat: int=5, progress=None) -> dict:
+    """
+    Time and measure the allocations of every bench case in stages, as
+    {case name: {"seconds_per_call", "peak_bytes", "retained_bytes"}}.
+    """
+    results = {}
+    for case in cases():
+        if case.stage not in stages or (name_filter and name_filter not in case.name):
+            continue
+        peak, retained = allocations(case.func)
+        result = {
+            "seconds_per_call": time_case(case, min_time, repeat)["seconds_per_call"],
+            "peak_bytes": peak,
+            "retained_bytes": retained,
+        }
+        if progress:
+            progress(case.name, result)
+        results[case.name] = result
+    return results
+
+def load(path) -> dict:
+    """
+    A baseline file as {fingerprint: {"environment", "results"}}; empty if
+    the file doesn't exist.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'rt') as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or "machines" not in data:
+        raise ValueError(f"{path} is not a baseline file")
+    return data["machines"]
+
+def save(path, results: dict):
+    """
+    Store results as this machine's baseline, keeping other machines'.
+    """
+    machines = load(path)
+    machines[fingerprint()] = {"environment": environment(), "results": results}
+    with open(path + '.new', 'wt') as f:
+        json.dump({"machines": machines}, f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(path + '.new', path)
+
+def compare(baseline: dict, current: dict, threshold: float=DEFAULT_THRESHOLD) -> list:
+    """
+    A Change for each metric of each case measured in both, flagged as
+    regressed if it grew past threshold. Time is compared as a ratio;
+    allocations also have to grow by more than ALLOCATION_SLACK bytes.
+    """
+    changes = []
+    for name in sorted(set(baseline) & set(current)):
+        before, after = baseline[name], current[name]
+        seconds = before["seconds_per_call"], after["seconds_per_call"]
+        changes.append(Change(name, "time", *seconds, seconds[1] > seconds[0] * (1 + threshold)))
+        for metric in ("peak_bytes", "retained_bytes"):
+            old, new = before[metric], after[metric]
+            regressed = new > old * (1 + threshold) and new - old > ALLOCATION_SLACK
+            changes.append(Change(name, metric, old, new, regressed))
+    return changes
+
+def _format(metric: str, value) -> str:
+    if metric == "time":
+        return f"{value * 1e6:.2f} us"
+    return f"{value / 1024:.1f} KiB"
+
+def report(changes, baseline: dict=None, current: dict=None, verbose: bool=False) -> str:
+    """
+    A table of the regressions (or, verbose, of every change), and of the
+    cases only one side has.
+    """
+    lines = []
+    shown = [c for c in changes if verbose or c.regressed]
+    if shown:
+        lines.append(f"{'case':40} {'metric':15} {'baseline':>14} {'current':>14} {'change':>8}")
+        for c in shown:
+            change = f"{(c.current / c.baseline - 1) * 100:+.0f}%" if c.baseline else "new"
+            flag = "  REGRESSED" if c.regressed else ""
+            lines.append(f"{c.name:40} {c.metric:15} {_format(c.metric, c.baseline):>14} "
+                         f"{_format(c.metric, c.current):>14} {change:>8}{flag}")
+    if baseline is not None and current is not None:
+        for name in sorted(set(current) - set(baseline)):
+            lines.append(f"{name}: not in the baseline")
+        for name in sorted(set(baseline) - set(current)):
+            lines.append(f"{name}: in the baseline but not measured")
+    regressed = sum(c.regressed for c in changes)
+    lines.append(f"{regressed} regression{'s' if regressed != 1 else ''} in {len(changes)} comparisons")
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = ArgumentParser(prog='python -m entviz.regress',
+                            description='Save or check a performance baseline of entviz stages.')
+    parser.add_argument('command', choices=['save', 'check'])
+    parser.add_argument('--baseline', metavar='FILE', default=DEFAULT_BASELINE)
+    parser.add_argument('--threshold', metavar='FRACTION', type=float, default=DEFAULT_THRESHOLD,
+        help='How much slower (or bigger) than baseline a case may get, e.g. 0.25 for 25%%.')
+    parser.add_argument('--filter', metavar='TEXT', help='Only run cases whose name contains TEXT.')
+    parser.add_argument('--min-time', metavar='SECONDS', type=float, default=0.2)
+    parser.add_argument('--repeat', metavar='N', type=int, default=5)
+    parser.add_argument('--verbose', action='store_true', help='List every comparison, not only regressions.')
+    parser.add_argument('--quiet', action='store_true', help="Don't print progress to stderr.")
+    args = parser.parse_args(argv)
+    def progress(name, result):
+        sys.stderr.write(f"{name:40} {result['seconds_per_call'] * 1e6:12.2f} us {result['peak_bytes'] / 1024:10.1f} KiB\n")
+    try:
+        machines = load(args.baseline)
+    except ValueError as e:
+        parser.error(str(e))
+    baseline = None
+    if args.command == 'check':
+        baseline = machines.get(fingerprint())
+        if baseline is None:
+            sys.stderr.write(f"entviz: no baseline for this machine ({fingerprint()}) in {args.baseline}; "
+                             f"run 'python -m entviz.regress save' first\n")
+            return 2
+    results = measure(GATED_STAGES, args.filter, args.min_time, args.repeat, None if args.quiet else progress)
+    if args.command == 'save':
+        save(args.baseline, results)
+        sys.stderr.write(f"entviz: saved {len(results)} cases for {fingerprint()} in {args.baseline}\n")
+        return 0
+    changes = compare(baseline["results"], results, args.threshold)
+    print(report(changes, baseline["results"], results, args.verbose))
+    return 1 if any(c.regressed for c in changes) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
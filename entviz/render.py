@@ -0,0 +1,259 @@
+import io
+
+from . import cache
+from .cache import plan_cache, plan_key, render_cache, render_key
+from .cell_shapes import EDGE_SHAPES_0, EDGE_SHAPES_1, define_edge_shapes, edge_shape, edge_shape_use, symbol_id
+from .colors import POSSIBLE_EDGE_COLORS, quant_to_rgb, hex_color, foreground_color
+from .entropy import normalize
+from .layout import Point, Size, Rect, choose_grid, cell_size, grid_geometry
+from . import instrument, shapes, svg_stream
+from .order_stats import order_statistics
+from .tokens import encoding_of, tokenize
+
+# Part of every on-disk cache key. Bump it whenever a change makes the same
+# entropy and options draw differently.
+RENDER_VERSION = 2
+
+# Text fills this much of the nucleus height, unless it is too wide to fit.
+TEXT_HEIGHT = 0.75
+# Approximate advance of a monospace glyph, as a fraction of font size.
+CHAR_WIDTH = 0.6
+# The font size of the unit-scale drawing scaled by to_scaled_svg(): cells are
+# 8 x 4 units, edges 1 unit wide, so its coordinates are short and exact.
+UNIT_FONTSIZE = 1.5
+# What export_sizes() makes by default: a thumbnail and two reading sizes.
+EXPORT_SIZES = ("16px", "12pt", "24pt")
+
+def assign_cells(tokens, cell_count, median, first, last):
+    """
+    Give each token a cell index, inserting up to 3 blank cells -- at the
+    median token, then before the last and first tokens in ASCII order --
+    while the grid still has room.
+    """
+    cells = [t.index for t in tokens]
+    def insert_blank_at(token):
+        at = cells[token.index]
+        for i in range(token.index, len(cells)):
+            if cells[i] >= at:
+                cells[i] += 1
+    for token in [median, last, first][:cell_count - len(tokens)]:
+        insert_blank_at(token)
+    return cells
+
+def assign_edges(tokens, cells, columns, edge_colors, edge_shapes):
+    """
+    Work out the (shape, color) drawn in each of the 6 edges of each token,
+    threading the shape and color shifts through the tokens in order.
+    """
+    shape_shift = 0
+    color_shift = 0
+    edges = []
+    for token, cell in zip(tokens, cells):
+        last_column = cell % columns == columns - 1
+        token_edges = []
+        for edge in range(6):
+            num = (token.quant >> (edge * 4)) & 0xf
+            color = edge_colors[(num & 3) ^ (color_shift & 3)]
+            color_shift += 1
+            if last_column:
+                color_shift += shape_shift
+            shape = edge_shapes[(num >> 2) ^ (shape_shift & 3)]
+            if not last_column:
+                shape_shift += 1
+            token_edges.append((shape, color))
+        edges.append(token_edges)
+    return edges
+
+class Entviz:
+    """
+    Everything about an entviz that doesn't depend on scale: the parsed
+    entropy, its tokens, the grid, where each token goes, and the shapes and
+    colors of every edge.
+    """
+    def __init__(self, entropy: str, ar_width: int=1, ar_height: int=1):
+        with instrument.stage("parse"):
+            self.parsed = normalize(entropy)
+        with instrument.stage("tokenize"):
+            self.encoding = encoding_of(self.parsed.type)
+            self.tokens = tokenize(self.parsed.core, self.encoding)
+        if not self.tokens:
+            raise ValueError("Nothing to visualize.")
+        with instrument.stage("order_stats"):
+            stats = order_statistics(self.tokens)
+        self.median = stats.median
+        self.quartiles = stats.quartiles
+        with instrument.stage("layout"):
+            self.grid = choose_grid(len(self.tokens), ar_width, ar_height)
+            self.cells = assign_cells(self.tokens, self.grid.columns * self.grid.rows, self.median, stats.first, stats.last)
+        with instrument.stage("edges"):
+            colors = list(POSSIBLE_EDGE_COLORS)
+            self.background = colors.pop(self.median.quant & 3)
+            self.edge_colors = colors
+            selector = self.quartiles[1].quant if self.quartiles[1] else 0
+            self.edge_shapes = [(EDGE_SHAPES_1 if (selector >> i) & 1 else EDGE_SHAPES_0)[i] for i in range(4)]
+            self.edges = assign_edges(self.tokens, self.cells, self.grid.columns, self.edge_colors, self.edge_shapes)
+
+def plan(entropy: str, ar_width: int=1, ar_height: int=1) -> Entviz:
+    """
+    The Entviz for an entropy value, memoized in plan_cache. Treat it as
+    read-only; it is shared.
+    """
+    return plan_cache.get_or_compute(plan_key(entropy, ar_width, ar_height),
+                                     lambda: Entviz(entropy, ar_width, ar_height))
+
+def quartile_mark(cell, corner: int) -> Rect:
+    """
+    The square (edge size / 2 on a side) centered in a corner of a cell;
+    corners are numbered clockwise from the top left.
+    """
+    e = cell.edge_width
+    x = cell.left if corner in (0, 3) else cell.right - e
+    y = cell.top if corner in (0, 1) else cell.bottom - e
+    return Rect(Point(x + e / 4, y + e / 4), Size(e / 2, e / 2))
+
+def canvas_size(entviz: Entviz, fontsize) -> Size:
+    size = cell_size(fontsize)
+    return Size(size.width * entviz.grid.columns, size.height * entviz.grid.rows)
+
+def draw(svg, entviz: Entviz, fontsize, backend=shapes, use_defs: bool=False, only_cells=None, defined=None):
+    """
+    Draw an entviz onto a canvas made by backend (shapes or svg_stream). With
+    use_defs, each edge shape form that is drawn more than once is defined
+    once and placed with <use>. That looks the same but makes smaller SVG
+    with fewer nodes. If only_cells is given, just the tokens in those cells
+    (and their quartile marks) are drawn over the background. defined is the
+    ids of edge forms the document already defines at this fontsize (see
+    cell_shapes.define_all_edge_shapes), to <use> instead of defining any.
+    """
+    size = cell_size(fontsize)
+    grid = entviz.grid
+    backend.rect(svg, Rect(Point(0, 0), Size(size.width * grid.columns, size.height * grid.rows)), entviz.background)
+    geometry = grid_geometry(grid, size)
+    shared = defined or set()
+    edge_width = geometry.cell(0).edge_width
+    if use_defs and defined is None:
+        used = [(shape, edge) for token_edges in entviz.edges for edge, (shape, _) in enumerate(token_edges)]
+        shared = define_edge_shapes(svg, used, edge_width, backend)
+    for token, cell_index, token_edges in zip(entviz.tokens, entviz.cells, entviz.edges):
+        if only_cells is not None and cell_index not in only_cells:
+            continue
+        cell = geometry.cell(cell_index)
+        rgb = quant_to_rgb(token.quant)
+        nucleus = cell.nucleus
+        backend.rect(svg, nucleus, hex_color(rgb))
+        font_size = min(nucleus.size.height * TEXT_HEIGHT, nucleus.size.width / (CHAR_WIDTH * (len(token.text) + 1)))
+        backend.text(svg, nucleus, token.text, foreground_color(rgb), font_size)
+        for edge, (shape, color) in enumerate(token_edges):
+            if shared and symbol_id(shape, edge, edge_width) in shared:
+                edge_shape_use(svg, cell, edge, shape, color, backend)
+            else:
+                edge_shape(svg, cell, edge, shape, color, backend)
+    for corner, token in enumerate(entviz.quartiles):
+        if token and (only_cells is None or entviz.cells[token.index] in only_cells):
+            backend.circle(svg, quartile_mark(geometry.cell(entviz.cells[token.index]), corner), entviz.edge_colors[corner])
+    return svg
+
+def render(entropy: str, ar_width: int=1, ar_height: int=1, fontsize=12, use_defs: bool=False) -> 'etree.Element':
+    """
+    Build the SVG element tree for an entviz.
+    """
+    entviz = Entviz(entropy, ar_width, ar_height)
+    with instrument.stage("draw"):
+        return draw(shapes.canvas(canvas_size(entviz, fontsize)), entviz, fontsize, use_defs=use_defs)
+
+def stream_svg(entropy: str, out, ar_width: int=1, ar_height: int=1, fontsize=12, buffer_size: int=8192,
+               use_defs: bool=False):
+    """
+    Write an entviz as SVG text to out (anything with write(str)) element by
+    element, without building a tree. The first bytes go out before the rest
+    of the document has been drawn.
+    """
+    entviz = Entviz(entropy, ar_width, ar_height)
+    # Drawing and serialization are one step here.
+    with instrument.stage("draw"), svg_stream.canvas(canvas_size(entviz, fontsize), out, buffer_size) as svg:
+        draw(svg, entviz, fontsize, svg_stream, use_defs)
+
+def disk_key(entropy: str, ar_width: int, ar_height: int, fontsize, *options) -> str:
+    """
+    The key of a render in a DiskCache: what it looks like depends only on
+    the normalized entropy (type included), the options and RENDER_VERSION.
+    """
+    return repr((RENDER_VERSION, tuple(normalize(entropy)), ar_width, ar_height, fontsize) + options)
+
+def to_svg(entropy: str, ar_width: int=1, ar_height: int=1, fontsize=12, use_defs: bool=False) -> str:
+    """
+    Render an entviz as SVG text. Results are memoized in render_cache,
+    and in cache.disk_cache if there is one.
+    """
+    def compute():
+        disk = cache.disk_cache
+        if disk is not None:
+            key = disk_key(entropy, ar_width, ar_height, fontsize, 'svg', use_defs)
+            svg = disk.get(key)
+            if svg is not None:
+                return svg.decode('utf-8')
+        tree = render(entropy, ar_width, ar_height, fontsize, use_defs)
+        with instrument.stage("serialize"):
+            svg = shapes.etree.tostring(tree, encoding='unicode')
+        if disk is not None:
+            disk.put(key, svg.encode('utf-8'))
+        return svg
+    return render_cache.get_or_compute(render_key(entropy, ar_width, ar_height, fontsize, use_defs), compute)
+
+def unit_drawing(entropy: str, ar_width: int=1, ar_height: int=1, use_defs: bool=False):
+    """
+    An entviz drawn once at UNIT_FONTSIZE, as (its Size, the SVG text of
+    everything inside the root element). Memoized in render_cache; every
+    scale of the same entviz shares it.
+    """
+    def compute():
+        entviz = plan(entropy, ar_width, ar_height)
+        size = canvas_size(entviz, UNIT_FONTSIZE)
+        out = io.StringIO()
+        with instrument.stage("draw"), svg_stream.canvas(size, out) as svg:
+            draw(svg, entviz, UNIT_FONTSIZE, svg_stream, use_defs)
+        document = out.getvalue()
+        return size, document[document.index('>') + 1:-len('</svg>')]
+    return render_cache.get_or_compute(render_key(entropy, ar_width, ar_height, 'unit', use_defs), compute)
+
+def scale_of(size, unit: Size) -> float:
+    """
+    How much to enlarge a unit-scale drawing of the given Size for a size
+    spec: a font size in points ("12pt", or just 12), or the length of the
+    longer side in pixels ("16px").
+    """
+    spec = str(size).strip().lower()
+    value = float(spec[:-2] if spec.endswith(('px', 'pt')) else spec)
+    if not value > 0:
+        raise ValueError(f"Invalid size {size!r}.")
+    if spec.endswith('px'):
+        return value / max(unit.width, unit.height)
+    return value / UNIT_FONTSIZE
+
+def to_scaled_svg(entropy: str, ar_width: int=1, ar_height: int=1, size=12, use_defs: bool=False) -> str:
+    """
+    Render an entviz as SVG text at any size (see scale_of()) by giving the
+    unit-scale drawing a root viewBox. It looks the same as to_svg() at that
+    font size, but only the root element is made per size. Results are kept
+    in cache.disk_cache if there is one.
+    """
+    disk = cache.disk_cache
+    if disk is not None:
+        key = disk_key(entropy, ar_width, ar_height, None, 'svg-size', str(size).strip().lower(), use_defs)
+        svg = disk.get(key)
+        if svg is not None:
+            return svg.decode('utf-8')
+    unit, body = unit_drawing(entropy, ar_width, ar_height, use_defs)
+    scale = scale_of(size, unit)
+    svg = (f'<svg xmlns:xlink="{shapes.XLINK_NS}" width="{unit.width * scale}" height="{unit.height * scale}" '
+           f'viewBox="0 0 {unit.width} {unit.height}" xmlns="http://www.w3.org/2000/svg">{body}</svg>')
+    if disk is not None:
+        disk.put(key, svg.encode('utf-8'))
+    return svg
+
+def export_sizes(entropy: str, sizes=EXPORT_SIZES, ar_width: int=1, ar_height: int=1, use_defs: bool=False) -> dict:
+    """
+    Render an entviz at several sizes from one plan and one drawing, as
+    {size: SVG text} in the order given.
+    """
+    return {size: to_scaled_svg(entropy, ar_width, ar_height, size, use_defs) for size in sizes}
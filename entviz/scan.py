@@ -0,0 +1,161 @@
+"""
+Find every recognizable entropy value in a large text -- a config, a log, a
+JSON dump, an authorized_keys file -- in one pass:
+
+    for found in scan_file('server.log'):
+        print(found.offset, found.parsed.type, found.text)
+
+The search is a single regex, the alternation of the patterns in
+entviz.entropy with their anchors replaced by "not next to a character that
+values are made of". Each match is then confirmed by parse(), so a found
+value has the same Parsed answer it would have on its own. Files are
+memory-mapped and streams are read in chunks, so memory stays constant
+however big the input.
+
+EOS names and CESR primitives look like ordinary words, so they aren't
+searched for; neither is hex shorter than MIN_HEX_DIGITS.
+"""
+from collections import namedtuple
+import mmap
+import re
+
+from . import entropy
+from .entropy import parse
+
+# offset is in characters for str input and in bytes for files and bytes.
+Found = namedtuple('Found', ['offset', 'text', 'parsed'])
+
+MIN_HEX_DIGITS = 32
+# Longer values (bigger than any SSH key in use) may be missed where a
+# stream is split into chunks.
+MAX_TOKEN = 8192
+# A value must not touch one of these, or it is part of something bigger
+# (a base64 blob, a path, an identifier with underscores).
+NOT_NEXT_TO = r'[A-Za-z0-9_+/-]'
+# Where a value's open-ended tail (a DID path or query) stops: whitespace,
+# quotes and the punctuation that typically follows a value in prose or data.
+STOP_CHARS = r'\s"\'<>`,;)\]}'
+# In bytes, a tail also stops at the first byte that isn't ASCII, so every
+# match decodes (a value's own alphabet is ASCII anyway).
+BYTES_STOP_CHARS = STOP_CHARS + r'\x80-\xff'
+
+# Tried in this order at each position, so more specific patterns go first.
+SCANNED = [
+    entropy.DID_REGEX,
+    entropy.UUID_REGEX,
+    entropy.SSH_KEY_REGEX,
+    entropy.CARDANO_SHELLEY_REGEX,
+    entropy.CARDANO_LONG_BYRON_REGEX,
+    entropy.CARDANO_SHORT_BYRON_REGEX,
+    entropy.BITCOIN_CASH_REGEX,
+    entropy.BITCOIN_SEGWIT_REGEX,
+    entropy.ETHEREUM_REGEX,
+    entropy.STELLAR_REGEX,
+    entropy.IPFS_CIDV0_REGEX,
+    entropy.IPFS_CIDV1_REGEX,
+    entropy.LITECOIN_REGEX,
+    entropy.LITECOIN_LEGACY_REGEX,
+    entropy.RIPPLE_REGEX,
+    entropy.BITCOIN_LEGACY_REGEX,
+]
+
+def searchable(regex, stop_chars: str=STOP_CHARS) -> str:
+    """
+    The pattern of an anchored entropy regex, rewritten to find whole values
+    anywhere in a text: no anchors, no capturing groups, its flags scoped to
+    it, and open-ended tails stopped at stop_chars (whitespace and quotes).
+    """
+    pattern = regex.pattern
+    if pattern.startswith('^'):
+        pattern = pattern[1:]
+    if pattern.endswith('$') and not pattern.endswith('\\$'):
+        pattern = pattern[:-1]
+    pattern = re.sub(r'(?<!\\)\((?!\?)', '(?:', pattern)
+    pattern = pattern.replace('[^?]*', f'[^?{stop_chars}]*').replace('.*', f'[^{stop_chars}]*')
+    if regex.flags & re.I:
+        pattern = f'(?i:{pattern})'
+    return pattern
+
+def combined_pattern(stop_chars: str=STOP_CHARS) -> str:
+    alternatives = [searchable(regex, stop_chars) for regex in SCANNED]
+    alternatives.append(f'(?:0[xX])?[0-9a-fA-F]{{{MIN_HEX_DIGITS},}}')
+    return f'(?<!{NOT_NEXT_TO})(?:' + '|'.join(alternatives) + f')(?!{NOT_NEXT_TO})'
+
+_patterns = {}
+
+def _pattern(kind):
+    # One compiled pattern for str and one for bytes, made on first use.
+    compiled = _patterns.get(kind)
+    if compiled is None:
+        if kind is str:
+            compiled = re.compile(combined_pattern())
+        else:
+            compiled = re.compile(combined_pattern(BYTES_STOP_CHARS).encode('ascii'))
+        _patterns[kind] = compiled
+    return compiled
+
+def _found(m, base: int, strict: bool):
+    text = m.group()
+    if isinstance(text, bytes):
+        text = text.decode('ascii')
+    parsed = parse(text, strict)
+    if parsed:
+        return Found(base + m.start(), text, parsed)
+
+def scan(text, strict: bool=False):
+    """
+    Yield a Found for each entropy value in text (str, bytes or anything
+    else with the buffer protocol, such as an mmap), in order. strict is as
+    for parse().
+    """
+    for m in _pattern(str if isinstance(text, str) else bytes).finditer(text):
+        found = _found(m, 0, strict)
+        if found:
+            yield found
+
+def scan_file(path, strict: bool=False):
+    """
+    Yield a Found for each entropy value in the file at path, memory-mapping
+    it so nothing but the current match is ever copied. Offsets are in bytes.
+    """
+    with open(path, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return  # empty
+        with mapped:
+            yield from scan(mapped, strict)
+
+def scan_stream(stream, strict: bool=False, chunk_size: int=1 << 20):
+    """
+    Yield a Found for each entropy value read from a file object (text or
+    binary, e.g. sys.stdin), holding at most chunk_size + MAX_TOKEN of it at a
+    time. A match that reaches the end of what has been read so far waits for
+    the next chunk, in case the value goes on.
+    """
+    buffer = None
+    base = 0
+    while True:
+        chunk = stream.read(chunk_size)
+        if buffer is None:
+            buffer = chunk[:0]
+            pattern = _pattern(str if isinstance(chunk, str) else bytes)
+        at_end = not chunk
+        buffer += chunk
+        # Keep one character before the unscanned part, for the lookbehind.
+        start = 1 if base else 0
+        limit = len(buffer) if at_end else len(buffer) - MAX_TOKEN
+        resume = max(start, limit)
+        for m in pattern.finditer(buffer, start):
+            if not at_end and (m.end() >= len(buffer) or m.start() >= limit):
+                resume = m.start()
+                break
+            found = _found(m, base, strict)
+            if found:
+                yield found
+            resume = max(resume, m.end())
+        if at_end:
+            return
+        keep = max(resume - 1, 0)
+        buffer = buffer[keep:]
+        base += keep
@@ -0,0 +1,285 @@
+"""
+An HTTP service for entviz, using nothing but asyncio from the standard
+library:
+
+    python -m entviz.server [--host HOST] [--port PORT] [--workers N] [--cache-dir DIR]
+
+    GET /svg?entropy=...&ar=16:9&fs=12[&defs=1]  -> image/svg+xml
+    GET /parse?entropy=...                       -> application/json
+
+With --cache-dir DIR, renders are also kept in a DiskCache in DIR, so they
+survive a restart (and can be shared with batch runs using the same DIR).
+
+Rendering runs in a process pool. When identical requests arrive while one of
+them is already being rendered, they wait for that render instead of starting
+their own. Responses carry an ETag derived from the normalized entropy (plus
+the render options and render.RENDER_VERSION), so a client revalidating with
+If-None-Match gets a 304 without anything being rendered.
+"""
+from argparse import ArgumentParser
+from http import HTTPStatus
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import re
+import traceback
+import urllib.parse
+
+from .cache import LRUCache
+from .entropy import normalize
+
+ASPECT_RATIO_PAT = re.compile(r'^(\d+):(\d+)$')
+MAX_LINE = 8192
+MAX_HEADERS = 100
+
+class RequestError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+def svg_options(query):
+    """
+    Validate the query of a /svg request, returning (entropy, ar_width,
+    ar_height, fontsize, use_defs). The limits are the CLI's.
+    """
+    entropy = query.get('entropy', '').strip()
+    if not entropy:
+        raise RequestError(HTTPStatus.BAD_REQUEST, 'Missing entropy.')
+    match = ASPECT_RATIO_PAT.match(query.get('ar', '1:1'))
+    if not match:
+        raise RequestError(HTTPStatus.BAD_REQUEST, 'Invalid aspect ratio.')
+    ar_width, ar_height = map(int, match.groups())
+    if ar_width < 1 or ar_height < 1 or ar_width > 100 or ar_height > 100:
+        raise RequestError(HTTPStatus.BAD_REQUEST, 'Invalid aspect ratio.')
+    fs = query.get('fs', '12')
+    if not fs.isdigit() or not 6 <= int(fs) <= 30:
+        raise RequestError(HTTPStatus.BAD_REQUEST, 'Invalid font size.')
+    return entropy, ar_width, ar_height, int(fs), query.get('defs', '0') not in ('', '0', 'false')
+
+def etag(key) -> str:
+    """
+    The tag of a response, from a key of everything it depends on. For an
+    SVG that is its render.disk_key(): the normalized entropy, the options
+    and RENDER_VERSION. So two spellings of the same value (e.g. hex in
+    either case) share a tag, and a renderer change makes new ones.
+    """
+    digest = hashlib.sha256(repr(key).encode('utf-8')).hexdigest()
+    return f'"{digest[:32]}"'
+
+def not_modified(tag: str, headers) -> bool:
+    """
+    Whether If-None-Match lists tag (weakly or not), or is "*".
+    """
+    for listed in headers.get('if-none-match', '').split(','):
+        listed = listed.strip()
+        if listed.startswith('W/'):
+            listed = listed[2:]
+        if listed == '*' or listed == tag:
+            return True
+    return False
+
+def render_svg(entropy: str, ar_width: int, ar_height: int, fontsize: int, use_defs: bool) -> str:
+    from .render import to_svg
+    return to_svg(entropy, ar_width, ar_height, fontsize, use_defs)
+
+def _disk_key(options) -> str:
+    from .render import disk_key
+    entropy, ar_width, ar_height, fontsize, use_defs = options
+    return disk_key(entropy, ar_width, ar_height, fontsize, 'svg', use_defs)
+
+class EntvizService:
+    """
+    The request handling, apart from the socket. renderer is called in
+    executor (a process pool with one worker per CPU, by default) with the
+    options from svg_options(). With cache_dir, a DiskCache there sits
+    between the in-memory cache and rendering.
+    """
+    def __init__(self, executor=None, workers: int=None, cache_entries: int=256,
+                 cache_bytes: int=16 * 1024 * 1024, renderer=render_svg, cache_dir: str=None):
+        self.executor = executor or concurrent.futures.ProcessPoolExecutor(workers)
+        self.cache = LRUCache(cache_entries, cache_bytes)
+        self.disk = None
+        if cache_dir:
+            from .disk_cache import DiskCache
+            self.disk = DiskCache(cache_dir)
+        self.renderer = renderer
+        self.renders = 0
+        self.coalesced = 0
+        self._inflight = {}
+
+    async def svg(self, tag: str, options) -> str:
+        svg = self.cache.get(tag)
+        if svg is not None:
+            return svg
+        future = self._inflight.get(tag)
+        if future is None:
+            future = asyncio.ensure_future(self._load(options))
+            self._inflight[tag] = future
+            future.add_done_callback(lambda f: self._finished(tag, f))
+        else:
+            self.coalesced += 1
+        # Shielded, so a client that goes away doesn't cancel the render for
+        # the others waiting on it.
+        return await asyncio.shield(future)
+
+    async def _load(self, options) -> str:
+        # The DiskCache blocks on file locks and I/O, so it is used from the
+        # loop's default thread pool, never on the loop itself.
+        loop = asyncio.get_running_loop()
+        if self.disk is not None:
+            svg = await loop.run_in_executor(None, self.disk.get, _disk_key(options))
+            if svg is not None:
+                return svg.decode('utf-8')
+        self.renders += 1
+        svg = await loop.run_in_executor(self.executor, self.renderer, *options)
+        if self.disk is not None:
+            await loop.run_in_executor(None, self.disk.put, _disk_key(options), svg.encode('utf-8'))
+        return svg
+
+    def _finished(self, tag: str, future):
+        del self._inflight[tag]
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(tag, future.result())
+
+    async def respond(self, method: str, target: str, headers):
+        """
+        Returns (status, content type, body, extra headers).
+        """
+        if method not in ('GET', 'HEAD'):
+            raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, 'Only GET and HEAD are supported.')
+        url = urllib.parse.urlsplit(target)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        if url.path == '/svg':
+            options = svg_options(query)
+            tag = etag(_disk_key(options))
+            if not_modified(tag, headers):
+                return HTTPStatus.NOT_MODIFIED, None, b'', [('ETag', tag)]
+            try:
+                svg = await self.svg(tag, options)
+            except ValueError as e:
+                raise RequestError(HTTPStatus.UNPROCESSABLE_ENTITY, str(e))
+            return HTTPStatus.OK, 'image/svg+xml', svg.encode('utf-8'), [('ETag', tag)]
+        if url.path == '/parse':
+            entropy = query.get('entropy', '').strip()
+            if not entropy:
+                raise RequestError(HTTPStatus.BAD_REQUEST, 'Missing entropy.')
+            parsed = normalize(entropy)
+            tag = etag(tuple(parsed))
+            if not_modified(tag, headers):
+                return HTTPStatus.NOT_MODIFIED, None, b'', [('ETag', tag)]
+            body = json.dumps(parsed._asdict()).encode('utf-8')
+            return HTTPStatus.OK, 'application/json', body, [('ETag', tag)]
+        raise RequestError(HTTPStatus.NOT_FOUND, 'Not found.')
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Serve HTTP/1.1 requests on one connection until the client closes it
+        or asks to. A request that can't be read gets its error response,
+        then the connection is closed.
+        """
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except RequestError as e:
+                    await _respond(writer, e.status, 'text/plain', str(e).encode('utf-8'), [], False)
+                    break
+                if request is None:
+                    break
+                method, target, version, headers = request
+                try:
+                    status, content_type, body, extra = await self.respond(method, target, headers)
+                except RequestError as e:
+                    status, content_type, body, extra = e.status, 'text/plain', str(e).encode('utf-8'), []
+                except Exception:
+                    # The details are for the log, not the client.
+                    traceback.print_exc()
+                    status, content_type, body, extra = (HTTPStatus.INTERNAL_SERVER_ERROR, 'text/plain',
+                                                          b'Internal server error.', [])
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                await _respond(writer, status, content_type, b'' if method == 'HEAD' else body, extra, keep_alive,
+                               len(body))
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+async def _respond(writer: asyncio.StreamWriter, status: HTTPStatus, content_type: str, body: bytes, extra,
+                   keep_alive: bool, length: int=None):
+    """
+    Write a response. length is the Content-Length, if not len(body) (as
+    for HEAD).
+    """
+    lines = [f'HTTP/1.1 {status.value} {status.phrase}']
+    if content_type:
+        lines.append(f'Content-Type: {content_type}')
+    lines.append(f'Content-Length: {len(body) if length is None else length}')
+    lines.extend(f'{name}: {value}' for name, value in extra)
+    lines.append(f'Connection: {"keep-alive" if keep_alive else "close"}')
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+    await writer.drain()
+
+async def _readline(reader: asyncio.StreamReader, status: HTTPStatus, message: str) -> bytes:
+    # readline() raises ValueError for a line longer than the stream's limit.
+    try:
+        line = await reader.readline()
+    except ValueError:
+        raise RequestError(status, message)
+    if len(line) > MAX_LINE:
+        raise RequestError(status, message)
+    return line
+
+async def _read_request(reader: asyncio.StreamReader):
+    """
+    Read a request line and headers (bodies are not supported). Returns
+    (method, target, version, headers with lower-case names), or None at
+    the end of the connection. Raises RequestError for a request too big or
+    malformed to answer.
+    """
+    line = await _readline(reader, HTTPStatus.REQUEST_URI_TOO_LONG, 'Request line too long.')
+    if not line.strip():
+        return None
+    parts = line.decode('latin-1').split()
+    if len(parts) != 3:
+        raise RequestError(HTTPStatus.BAD_REQUEST, 'Bad request line.')
+    headers = {}
+    for _ in range(MAX_HEADERS):
+        line = await _readline(reader, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, 'Header line too long.')
+        if line in (b'\r\n', b'\n', b''):
+            return parts[0], parts[1], parts[2], headers
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    raise RequestError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, 'Too many headers.')
+
+async def start(host: str='127.0.0.1', port: int=8000, service: EntvizService=None) -> asyncio.Server:
+    service = service or EntvizService()
+    return await asyncio.start_server(service.handle, host, port, limit=MAX_LINE * 2)
+
+def main(argv=None):
+    parser = ArgumentParser(prog='python -m entviz.server', description='Serve entvizes over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', metavar='N', type=int,
+        help='The number of processes to render with (default: one per CPU).')
+    parser.add_argument('--cache-dir', metavar='DIR',
+        help='Also keep renders in DIR, so they survive a restart.')
+    parser.add_argument('--plugins', action='store_true',
+        help='Also recognize the types of parsers installed as "entviz.parsers" entry points.')
+    args = parser.parse_args(argv)
+    if args.plugins:
+        from .entropy import load_plugins
+        load_plugins()
+    async def serve():
+        server = await start(args.host, args.port, EntvizService(workers=args.workers, cache_dir=args.cache_dir))
+        async with server:
+            await server.serve_forever()
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,41 @@
-from lxml import etree
+"""
+Draw onto an lxml element tree. lxml is imported the first time something is
+drawn (or shapes.etree is used), not when this module is imported.
+"""
+from contextlib import contextmanager
+
+__all__ = ['etree', 'circle', 'rect', 'canvas', 'right_triangle', 'text', 'group', 'use']
+
+_lxml_etree = None
+
+def _etree():
+    global _lxml_etree
+    if _lxml_etree is None:
+        from lxml import etree
+        _lxml_etree = etree
+    return _lxml_etree
+
+def __getattr__(name):
+    if name == 'etree':
+        return _etree()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def circle(svg, where, fill_color: str="blue"):
     center = where.center
-    return etree.SubElement(svg, 'circle', cx=f"{center.x}", cy=f"{center.y}", r=f"{where.size.width / 2}", fill=fill_color)
+    return _etree().SubElement(svg, 'circle', cx=f"{center.x}", cy=f"{center.y}", r=f"{where.size.width / 2}", fill=fill_color)
+
+def rect(svg, where, fill_color: str=None):
+    el = _etree().SubElement(svg, 'rect', x=f"{where.left}", y=f"{where.top}", width=f"{where.size.width}", height=f"{where.size.height}")
+    if fill_color is not None:
+        el.set('fill', fill_color)
+    return el
 
-def rect(svg, where, fill_color):
-    return etree.SubElement(svg, 'rect', x=f"{where.left}", y=f"{where.top}", width=f"{where.size.width}", height=f"{where.size.height}", fill=fill_color)
+# Declared on every canvas, for the xlink:href that SVG 1.1 renderers need on <use>.
+XLINK_NS = "http://www.w3.org/1999/xlink"
 
-def canvas(size) -> etree.Element:
-    return etree.Element('svg', width=f"{size.width}", height=f"{size.height}", xmlns="http://www.w3.org/2000/svg")
+def canvas(size) -> 'etree.Element':
+    return _etree().Element('svg', nsmap={'xlink': XLINK_NS}, width=f"{size.width}", height=f"{size.height}",
+                            xmlns="http://www.w3.org/2000/svg")
 
 def right_triangle(svg, where, rotation: int, fill_color: str="red"):
     # Calculate coordinates of triangle vertices
@@ -22,4 +49,38 @@ def right_triangle(svg, where, rotation: int, fill_color: str="red"):
         points = f"{where.bottom_left} {where.top_right} {where.bottom_right}"
     else:
         raise ValueError("Rotation degree must be 0, 90, 180, or 270")
-    return etree.SubElement(svg, 'polygon', points=points, fill=fill_color)
+    el = _etree().SubElement(svg, 'polygon', points=points)
+    if fill_color is not None:
+        el.set('fill', fill_color)
+    return el
+
+def text(svg, where, content: str, fill_color: str, font_size):
+    center = where.center
+    el = _etree().SubElement(svg, 'text', x=f"{center.x}", y=f"{center.y}", fill=fill_color,
+        style=f"font-family:Courier,monospace;font-size:{font_size}px",
+        **{'text-anchor': 'middle', 'dominant-baseline': 'central'})
+    el.text = content
+    return el
+
+# A fill_color of None (for rect and right_triangle) leaves fill unset, so the
+# shape takes the fill of whatever <use> places it.
+
+@contextmanager
+def group(svg, tag: str, attrs=()):
+    """
+    Add a container element (e.g. defs or g); draw its children onto the
+    element this yields.
+    """
+    yield _etree().SubElement(svg, tag, dict(attrs))
+
+def use(svg, ref: str, where, fill_color: str):
+    """
+    Place a copy of the element with id ref, translated to the point where.
+    Both href (SVG 2) and xlink:href (SVG 1.1) are set.
+    """
+    element = _etree().SubElement(svg, 'use', href=f"#{ref}")
+    element.set(f"{{{XLINK_NS}}}href", f"#{ref}")
+    element.set("x", f"{where.x}")
+    element.set("y", f"{where.y}")
+    element.set("fill", fill_color)
+    return element
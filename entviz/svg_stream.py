@@ -0,0 +1,115 @@
+"""
+A drop-in alternative to entviz.shapes that writes each element to a stream
+as soon as it is drawn, instead of building an lxml tree. Output is the same
+text that etree.tostring(..., encoding='unicode') gives for the tree.
+"""
+from contextlib import contextmanager
+
+ATTR_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;',
+                              '\n': '&#10;', '\r': '&#13;', '\t': '&#9;'})
+TEXT_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+XLINK_NS = "http://www.w3.org/1999/xlink"
+
+class StreamingCanvas:
+    """
+    The open <svg> element of a document being written to out (anything
+    with a write(str) method: a file, sys.stdout, a socket's makefile()).
+    Writes are batched into chunks of about buffer_size characters; call
+    close() (or use a with block) to finish the document.
+    """
+    def __init__(self, out, size, buffer_size: int=8192):
+        self.out = out
+        self.buffer_size = buffer_size
+        self._buffer = []
+        self._buffered = 0
+        self.closed = False
+        self.element_count = 0
+        self.write(_start_tag('svg', [("xmlns:xlink", XLINK_NS), ("width", f"{size.width}"),
+                                      ("height", f"{size.height}"), ("xmlns", "http://www.w3.org/2000/svg")]) + '>')
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        self.close()
+    def write(self, text: str):
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.buffer_size:
+            self.flush()
+    def element(self, tag: str, attrs, text: str=None):
+        self.element_count += 1
+        if text is None:
+            self.write(_start_tag(tag, attrs) + '/>')
+        else:
+            self.write(f"{_start_tag(tag, attrs)}>{text.translate(TEXT_ESCAPES)}</{tag}>")
+    def start(self, tag: str, attrs=()):
+        self.element_count += 1
+        self.write(_start_tag(tag, attrs) + '>')
+    def end(self, tag: str):
+        self.write(f"</{tag}>")
+    def flush(self):
+        if self._buffer:
+            self.out.write(''.join(self._buffer))
+            self._buffer = []
+            self._buffered = 0
+        if hasattr(self.out, 'flush'):
+            self.out.flush()
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.write('</svg>')
+            self.flush()
+
+def _start_tag(tag, attrs):
+    return f"<{tag}" + ''.join(f' {name}="{value.translate(ATTR_ESCAPES)}"' for name, value in attrs)
+
+def canvas(size, out=None, buffer_size: int=8192) -> StreamingCanvas:
+    if out is None:
+        import sys
+        out = sys.stdout
+    return StreamingCanvas(out, size, buffer_size)
+
+def circle(svg, where, fill_color: str="blue"):
+    center = where.center
+    svg.element('circle', [("cx", f"{center.x}"), ("cy", f"{center.y}"), ("r", f"{where.size.width / 2}"), ("fill", fill_color)])
+
+def rect(svg, where, fill_color: str=None):
+    attrs = [("x", f"{where.left}"), ("y", f"{where.top}"), ("width", f"{where.size.width}"), ("height", f"{where.size.height}")]
+    if fill_color is not None:
+        attrs.append(("fill", fill_color))
+    svg.element('rect', attrs)
+
+def right_triangle(svg, where, rotation: int, fill_color: str="red"):
+    if rotation == 0:
+        points = f"{where.top_left} {where.bottom_left} {where.bottom_right}"
+    elif rotation == 90:
+        points = f"{where.top_left} {where.top_right} {where.bottom_left}"
+    elif rotation == 180:
+        points = f"{where.top_left} {where.top_right} {where.bottom_right}"
+    elif rotation == 270:
+        points = f"{where.bottom_left} {where.top_right} {where.bottom_right}"
+    else:
+        raise ValueError("Rotation degree must be 0, 90, 180, or 270")
+    attrs = [("points", points)]
+    if fill_color is not None:
+        attrs.append(("fill", fill_color))
+    svg.element('polygon', attrs)
+
+def text(svg, where, content: str, fill_color: str, font_size):
+    center = where.center
+    svg.element('text', [("x", f"{center.x}"), ("y", f"{center.y}"), ("fill", fill_color),
+                         ("style", f"font-family:Courier,monospace;font-size:{font_size}px"),
+                         ("text-anchor", "middle"), ("dominant-baseline", "central")], content)
+
+@contextmanager
+def group(svg, tag: str, attrs=()):
+    """
+    Write a container element's start tag, and its end tag once the children
+    drawn inside the with block are written. It must not be empty.
+    """
+    svg.start(tag, attrs)
+    yield svg
+    svg.end(tag)
+
+def use(svg, ref: str, where, fill_color: str):
+    svg.element('use', [("href", f"#{ref}"), ("xlink:href", f"#{ref}"), ("x", f"{where.x}"), ("y", f"{where.y}"),
+                        ("fill", fill_color)])
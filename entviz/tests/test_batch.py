@@ -0,0 +1,88 @@
+import io
+import tarfile
+import zipfile
+
+from ..batch import *
+
+INPUTS = ["did:peer:abc123", "eosio.token", "did:peer:abc123 "]
+
+def test_render_many_in_order():
+    for workers in [1, 2]:
+        results = list(render_many(INPUTS, workers=workers))
+        assert [r.line for r in results] == [1, 2, 3]
+        assert [r.entropy for r in results] == INPUTS
+        assert all(r.svg.startswith("<svg") and not r.error for r in results)
+        assert results[0].name == results[2].name == output_name("did:peer:abc123")
+
+def test_failures_dont_stop_the_run():
+    # A zero aspect ratio makes every item fail.
+    failures = []
+    class Collect:
+        def __init__(self):
+            self.names = []
+        def add(self, name, svg):
+            self.names.append(name)
+        def close(self):
+            pass
+    rendered, failed = run_batch(INPUTS, Collect(), 1, 0, workers=1, report=failures.append)
+    assert (rendered, failed) == (0, 3)
+    assert [f.line for f in failures] == [1, 2, 3]
+    assert failures[0].error.startswith("ZeroDivisionError")
+
+def test_writers(tmp_path):
+    rendered, failed = run_batch(INPUTS, DirectoryWriter(tmp_path / "out"), workers=1)
+    assert (rendered, failed) == (3, 0)
+    assert sorted(p.name for p in (tmp_path / "out").iterdir()) == sorted({output_name(x) for x in INPUTS})
+
+    stream = io.BytesIO()
+    run_batch(INPUTS[:2], TarWriter(stream), workers=1)
+    stream.seek(0)
+    with tarfile.open(fileobj=stream) as tar:
+        assert tar.getnames() == [output_name(x) for x in INPUTS[:2]]
+        assert tar.extractfile(tar.getnames()[0]).read().startswith(b"<svg")
+
+    run_batch(INPUTS[:2], ZipWriter(tmp_path / "out.zip"), workers=1)
+    with zipfile.ZipFile(tmp_path / "out.zip") as z:
+        assert z.namelist() == [output_name(x) for x in INPUTS[:2]]
+
+def test_sizes(tmp_path):
+    rendered, failed = run_batch(INPUTS[:2], DirectoryWriter(tmp_path), workers=1, sizes=["16px", "12pt"])
+    assert (rendered, failed) == (2, 0)
+    expected = {sized_name(output_name(x), size) for x in INPUTS[:2] for size in ["16px", "12pt"]}
+    assert {p.name for p in tmp_path.iterdir()} == expected
+    assert sized_name(output_name(INPUTS[0]), "12pt").endswith("-12pt.svg")
+
+def test_line_numbers_count_blank_lines(tmp_path):
+    from ..entropy import read_entropies
+    path = tmp_path / "in.txt"
+    path.write_text("did:peer:abc123\n\n\n\nnot drawable\n")
+    failures = []
+    run_batch(read_entropies(str(path), numbered=True), DirectoryWriter(tmp_path / "out"), 1, 0, workers=1,
+              report=failures.append, numbered=True)
+    assert [f.line for f in failures] == [1, 5]
+
+def test_tar_writer_closes_the_file_it_opens(tmp_path):
+    path = tmp_path / "out.tar"
+    run_batch(INPUTS[:2], TarWriter(str(path)), workers=1)
+    with tarfile.open(path) as tar:
+        assert tar.getnames() == [output_name(x) for x in INPUTS[:2]]
+
+def test_strict_fails_bad_checksums():
+    bad = 'rHb9CJAWyB4rj91VRWn96DkukG4bwdtyT2'
+    lenient, = render_many([bad], workers=1)
+    assert lenient.svg and not lenient.error
+    strict = list(render_many([bad, 'eosio.token'], workers=1, strict=True))
+    assert strict[0].error == 'ValueError: not a valid Ripple address (bad checksum)'
+    assert strict[1].svg and not strict[1].error
+
+def test_writer_is_closed_when_the_run_stops():
+    def entropies():
+        yield "eosio.token"
+        raise OSError("input went away")
+    writer = TarWriter(io.BytesIO())
+    try:
+        run_batch(entropies(), writer, workers=1)
+        assert False
+    except OSError:
+        pass
+    assert writer.tar.closed
@@ -0,0 +1,33 @@
+import json
+
+from ..bench import *
+
+def test_rsa_ssh_key_is_stable():
+    assert rsa_ssh_key(4096) == rsa_ssh_key(4096)
+    assert rsa_ssh_key(4096).startswith("AAAAB3NzaC1yc2EAAAADAQAB")
+    assert len(rsa_ssh_key(4096)) > len(rsa_ssh_key(2048))
+
+def test_every_case_runs():
+    names = set()
+    for case in cases():
+        case.func()
+        names.add(case.name)
+    assert "parse/no-match" in names and "svg/ssh-rsa-4096" in names
+
+def test_main_writes_json(tmp_path):
+    out = tmp_path / "bench.json"
+    main(["--filter", "parse/uuid", "--min-time", "0.001", "--repeat", "2", "--quiet", "--output", str(out)])
+    report = json.loads(out.read_text())
+    assert [r["name"] for r in report["results"]] == ["parse/uuid"]
+    assert report["results"][0]["seconds_per_call"] > 0
+    assert report["environment"]["python"]
+
+def test_cold_cases_skip_the_caches():
+    from .. import cache
+    from ..render import Entviz
+    case = next(c for c in cases() if c.name == "plan/did")
+    Entviz(SIZES["did"])
+    cache.parse_cache.reset_stats()
+    case.func()
+    case.func()
+    assert cache.parse_cache.stats.hits == 0
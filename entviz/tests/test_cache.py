@@ -0,0 +1,54 @@
+from ..cache import *
+
+def test_lru_eviction():
+    cache = LRUCache(max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"
+    cache.put("c", "3")
+    assert "b" not in cache
+    assert cache.stats == CacheStats(hits=1, misses=0, evictions=1, entries=2, bytes=2)
+    assert cache.get("b") is None
+    assert cache.stats.misses == 1
+
+def test_byte_limit():
+    cache = LRUCache(max_entries=10, max_bytes=10)
+    cache.put("a", "x" * 6)
+    cache.put("b", "x" * 6)
+    assert "a" not in cache and "b" in cache
+    cache.put("c", "x" * 11)
+    assert "c" not in cache
+    assert cache.stats.bytes == 6
+    # A value too big to keep replaces (drops) the old one, never leaving it stale.
+    cache.put("b", "x" * 11)
+    assert cache.get("b") is None and cache.stats.bytes == 0
+    cache.resize(max_entries=5)
+    assert (cache.max_entries, cache.max_bytes) == (5, 10)
+
+def test_get_or_compute_caches_none():
+    calls = []
+    cache = LRUCache()
+    def compute():
+        calls.append(1)
+        return None
+    assert cache.get_or_compute("k", compute) is None
+    assert cache.get_or_compute("k", compute) is None
+    assert len(calls) == 1
+
+def test_invalidate():
+    cache = LRUCache()
+    cache.put(("a", 1), "x")
+    cache.put(("a", 2), "x")
+    cache.put(("b", 1), "x")
+    cache.invalidate_matching(lambda k: k[0] == "a")
+    assert len(cache) == 1
+    cache.invalidate(("b", 1))
+    assert len(cache) == 0
+    cache.put("c", "x")
+    cache.invalidate()
+    assert cache.stats.entries == 0 and cache.stats.bytes == 0
+
+def test_disabled():
+    cache = LRUCache(max_entries=0)
+    cache.put("a", "1")
+    assert len(cache) == 0
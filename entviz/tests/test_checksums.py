@@ -0,0 +1,87 @@
+from ..checksums import *
+from ..entropy import parse, normalize, parse_many, to_EIP55_address
+from .test_entropy import expected_parsers
+
+def corrupt(text: str, i: int=-1) -> str:
+    c = text[i]
+    replacement = '2' if c != '2' else '3'
+    return text[:i] + replacement + text[i:][1:] if i != -1 else text[:-1] + replacement
+
+VALID = {
+    "Bitcoin legacy": ['1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa', '3J98t1WpEZ73CNmQviecrnyiWrnqRhWNLy'],
+    "Bitcoin SegWit": ['bc1qw508d6qejxtdg4y5r3zarvary0c5xw7kv8f3t4',
+                       'bc1p0xlxvlhemja6c4dqv22uapctqupfhlxm9h8z3k2e72q4k9hcz7vqzk5jj0'],
+    "Ripple": ['rHb9CJAWyB4rj91VRWn96DkukG4bwdtyTh'],
+    "Bitcoin Cash": ['bitcoincash:qpm2qsznhks23z7629mms6s4cwef74vcwvy22gdx6a'],
+    "Cardano Shelley": ['addr1qx2fxv2umyhttkxyxp8x0dlpdt3k6cwng5pxj3jhsydzer3n0d3vllmyqwsx5wktcd8cc3sq835lu7drv2xwl2wywfgse35a3x'],
+    "Stellar": ['GAAZI4TCR3TY5OJHCTJC2A4QSY6CJWJH5IAJTGKIN2ER7LBNVKOCCWN7'],
+    "Ethereum": ['0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed', '0x5aaeb6053f3e94c9b9a09f33669435e7ef1beaed'],
+}
+
+def test_keccak_256():
+    assert keccak_256(b'').hex() == 'c5d2460186f7233c927e7db2dcc703c0e500b653ca82273b7bfad8045d85a470'
+    assert keccak_256(b'a' * 300) == keccak_256(bytes(b'a' * 300))
+    assert eip55_checksummed('fb6916095ca1df60bb79ce92ce3ea74c37c5d359') == 'fB6916095ca1df60bB79Ce92cE3Ea74c37c5d359'
+
+def test_valid_addresses_pass():
+    for kind, values in VALID.items():
+        for value in values:
+            assert is_valid(kind, value), value
+            # Some real addresses use bech32 characters the shape regexes
+            # don't accept; those don't parse, strict or not.
+            assert parse(value, strict=True) == parse(value)
+
+def test_corrupted_addresses_fail():
+    for kind, values in VALID.items():
+        for value in values:
+            if value.lower() == value and kind == "Ethereum":
+                continue
+            bad = corrupt(value)
+            assert not is_valid(kind, bad), bad
+            if parse(bad):
+                assert parse(bad, strict=True) is None
+                assert failed_checksum(bad) == kind
+                assert normalize(bad, strict=True).type == "bits"
+    assert not is_valid_ethereum('0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAeD')
+
+def test_cardano_byron():
+    raw = b'\x83\x58\x1c' + bytes(range(28)) + b'\xa0\x00'
+    cbor = b'\x82\xd8\x18\x58' + bytes([len(raw)]) + raw + b'\x1a' + zlib.crc32(raw).to_bytes(4, 'big')
+    text = base58_encode(cbor)
+    assert is_valid_cardano_byron(text)
+    assert not is_valid_cardano_byron(base58_encode(cbor[:-1] + bytes([cbor[-1] ^ 1])))
+
+def base58_encode(data: bytes) -> str:
+    n = int.from_bytes(data, 'big')
+    out = ''
+    while n:
+        n, r = divmod(n, 58)
+        out = BASE58_ALPHABET[r] + out
+    return '1' * (len(data) - len(data.lstrip(b'\0'))) + out
+
+def test_base58_round_trip():
+    for data in [b'', b'\0\0abc', bytes(range(25))]:
+        assert base58_decode(base58_encode(data)) == data
+    assert base58_decode('0OIl') is None
+
+def test_strict_is_opt_in():
+    # Shape-only matches (e.g. made-up sample values) still parse by default.
+    entropies = [entropy for entropy, func in expected_parsers]
+    made_up = 'nipcBbFg9gMiCh81Kj8tqqdgoZub1ZJRfn'
+    assert parse(made_up).type == "Bitcoin legacy"
+    assert parse(made_up, strict=True) is None
+    assert parse(made_up).type == "Bitcoin legacy"
+    assert list(parse_many(entropies, workers=1)) == [parse(e) for e in entropies]
+    assert list(parse_many(entropies, workers=1, strict=True)) == [parse(e, strict=True) for e in entropies]
+
+def test_EIP55_address_unchanged():
+    def original(address):
+        import hashlib
+        address = address.lower().replace('0x', '')
+        hash = hashlib.sha3_256(address.encode('utf-8')).hexdigest()
+        checksum_address = '0x'
+        for i, char in enumerate(address):
+            checksum_address += char.upper() if int(hash[i], 16) >= 8 else char.lower()
+        return checksum_address
+    for address in ['0x32Be343B94f860124dC4fEe278FDCBD38C102D88', '0x' + 'ab' * 20]:
+        assert to_EIP55_address(address) == original(address)
@@ -29,3 +29,39 @@ def test_relative_luminance():
     # Test case 8: Check luminance for another custom color
     assert_rlum(150, 100, 75, 0.1611)
 
+
+def original_relative_luminance(rgb):
+    def gamma_correction(c):
+        if c <= 0.04045:
+            return c / 12.92
+        else:
+            return ((c + 0.055) / 1.055) ** 2.4
+    return (0.2126 * gamma_correction(rgb[0] / 255)) + (0.7152 * gamma_correction(rgb[1] / 255)) + \
+           (0.0722 * gamma_correction(rgb[2] / 255))
+
+def sample_quants():
+    import random
+    rng = random.Random(16)
+    return [0, 0xffffff, 0x808080, 0x7f8080] + [rng.randrange(1 << 24) for _ in range(5000)]
+
+def test_lookup_table_is_exact():
+    import colorsys
+    for quant in sample_quants():
+        rgb = quant_to_rgb(quant)
+        assert relative_luminance(rgb) == original_relative_luminance(rgb)
+        assert lightness(rgb) == colorsys.rgb_to_hls(rgb[0] / 255, rgb[1] / 255, rgb[2] / 255)[1]
+    # Every (max, min) pair decides lightness the same way colorsys does.
+    for high in range(256):
+        for low in range(high + 1):
+            rgb = (high, low, low)
+            expected = colorsys.rgb_to_hls(high / 255, low / 255, low / 255)[1] < 0.5
+            assert (foreground_color(rgb) == WHITE) == expected
+    assert relative_luminance((127.5, 0, 0)) == original_relative_luminance((127.5, 0, 0))
+
+def test_batch_functions_match():
+    import pytest
+    np = pytest.importorskip("numpy")
+    quants = sample_quants()
+    assert luminances(np.array(quants)).tolist() == [relative_luminance(quant_to_rgb(q)) for q in quants]
+    assert lightnesses(quants).tolist() == [lightness(quant_to_rgb(q)) for q in quants]
+    assert foreground_colors(quants) == [foreground_color(quant_to_rgb(q)) for q in quants]
@@ -0,0 +1,50 @@
+import random
+import uuid
+
+from ..confusable import *
+from ..bench import rsa_ssh_key
+
+KEY = rsa_ssh_key(2048)
+# One token changed, with the median and quartiles where they were.
+NEAR_KEY = KEY[:-10] + "A" + KEY[-9:]
+
+def test_signature():
+    sig = signature(Entviz(KEY))
+    assert similarity(sig, sig) == 1.0
+    near = signature(Entviz(NEAR_KEY))
+    assert near.key == sig.key and 0.99 < similarity(sig, near) < 1
+    other = signature(Entviz(rsa_ssh_key(4096)))
+    assert similarity(sig, other) == 0.0
+    # 6 tokens in a 2 x 4 grid: 2 blank cells.
+    features = signature(Entviz("087f9afc-5e79-4c14-98eb-3217e477242c")).features
+    assert len(features) == 7 * 8 and features.count(BLANK) == 7 * 2
+
+def test_equivalent_spellings_are_one_value():
+    index = build_index(["087f9afc-5e79-4c14-98eb-3217e477242c", "{087F9AFC-5E79-4C14-98EB-3217E477242C}",
+                         "bc1qrp33g2q55j75r5psq4zhdjfx5u27q2sqjycr2xnwatqpzrqj",
+                         "BC1QRP33G2Q55J75R5PSQ4ZHDJFX5U27Q2SQJYCR2XNWATQPZRQJ"], workers=1)
+    assert len(index) == 2
+    assert index.labels == ["087f9afc-5e79-4c14-98eb-3217e477242c", "bc1qrp33g2q55j75r5psq4zhdjfx5u27q2sqjycr2xnwatqpzrqj"]
+    assert index.matches() == []
+
+def test_finds_the_near_pair_among_many():
+    rand = random.Random(7)
+    values = [str(uuid.UUID(int=rand.getrandbits(128))) for _ in range(2000)]
+    values[500:500] = [KEY]
+    values.append(NEAR_KEY)
+    skipped = []
+    index = build_index(values + [""], workers=1, report=skipped.append)
+    assert skipped == [""]
+    matches = index.matches()
+    assert [(m.first, m.second) for m in matches] == [(KEY, NEAR_KEY)]
+    # Far fewer comparisons than all pairs.
+    assert sum(1 for _ in index.candidates()) < len(values)
+
+def test_lower_threshold_finds_more():
+    # One digit apart, but enough of the grid changes to be under 0.8 alike.
+    values = ["21636369-8b52-9b4a-97b7-50923ceb3ffd", "21636669-8b52-9b4a-97b7-50923ceb3ffd", "did:peer:abc123"]
+    default = build_index(values, workers=1).matches()
+    loose = build_index(values, workers=1, threshold=0.5, bands=64, rows=2).matches()
+    assert default == [] and len(loose) > len(default)
+    assert [(m.first, m.second) for m in loose] == [tuple(values[:2])]
+    assert all(0.5 <= m.similarity < DEFAULT_THRESHOLD for m in loose)
@@ -0,0 +1,46 @@
+import re
+
+from ..diff import *
+from ..render import to_svg
+
+OLD = "AAAAC3NzaC1lZDI1NTE5AAAAIB0UIIW091sZULC1ojG1x7N+/SybeFJMu9dGGKCBRiR+"
+NEW = "AAAAC3NzaC1lZDI1NTE5AAAAIB0UIIW091sZULC1ojG1x7N+/SybeFJMu9dGGKCBRiQ+"
+
+def elements(svg: str):
+    return re.findall(r'<(?:rect|polygon|circle|text)[^>]*(?:/>|>[^<]*</text>)', svg)
+
+def test_identical_values():
+    d = diff(OLD, OLD + "  ")
+    assert d.differences == [] and changed_cells(d) == set()
+    assert d.old is d.new
+    assert len(elements(diff_svg(OLD, OLD))) == 1
+
+def test_one_token_changed():
+    d = diff(OLD, NEW)
+    tokens = [x for x in d.differences if x.kind == "token"]
+    assert len(tokens) == 1
+    cell = tokens[0].where
+    assert (tokens[0].old, tokens[0].new) == ("RiR+", "RiQ+")
+    assert d.new.tokens[d.new.cells.index(cell)].text == "RiQ+"
+    assert all(x.where[0] == cell for x in d.differences if x.kind == "edge")
+    assert changed_cells(d) == {cell}
+    # The overlay holds only pieces of the full render of the new value.
+    overlay = elements(diff_svg(OLD, NEW))
+    full = set(elements(to_svg(NEW)))
+    assert 1 < len(overlay) < len(full) and all(e in full for e in overlay)
+
+def test_different_grids():
+    d = diff("did:peer:abc123", OLD)
+    assert [x.kind for x in d.differences] == ["type", "grid"]
+    assert changed_cells(d) is None
+    assert differences_json(d)[1]["new"] == list(d.new.grid)
+
+def test_blank_cells_and_quartiles():
+    d = diff("did:peer:abc123", "did:peer:abc124")
+    kinds = set(x.kind for x in d.differences)
+    assert "grid" not in kinds and "token" in kinds
+    for x in d.differences:
+        if x.kind == "blank":
+            assert x.old != x.new
+        if x.kind == "quartile":
+            assert 0 <= x.where < 4
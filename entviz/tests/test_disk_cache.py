@@ -0,0 +1,106 @@
+import multiprocessing
+import os
+
+from ..disk_cache import *
+from .. import cache
+from ..batch import render_many
+from ..render import disk_key, to_svg
+
+def test_put_get_and_persistence(tmp_path):
+    with DiskCache(tmp_path) as c:
+        assert c.get('a') is None
+        c.put('a', b'alpha')
+        c.put(b'b', b'beta')
+        c.put('a', b'ignored: same key, same content')
+        assert c.get('a') == b'alpha' and c.get(b'b') == b'beta'
+        assert c.stats.hits == 2 and c.stats.misses == 1 and len(c) == 2
+    with DiskCache(tmp_path) as c:
+        assert c.get('a') == b'alpha'
+        assert c.get_or_compute('c', lambda: b'gamma') == b'gamma'
+        assert c.get_or_compute('c', lambda: b'never') == b'gamma'
+        c.clear()
+        assert c.get('a') is None and len(c) == 0
+
+def test_eviction_keeps_recent_and_bounds_size(tmp_path):
+    with DiskCache(tmp_path, max_bytes=10000, slots=64) as c:
+        for i in range(300):
+            c.put(f'k{i}', bytes([i % 256]) * 200)
+            # Keep k0 in use, so it survives every compaction.
+            assert c.get('k0') == bytes([0]) * 200
+        assert c.get('k299') == bytes([299 % 256]) * 200
+        assert c.get('k1') is None
+        assert c.stats.bytes <= 10000 and len(c) <= 48 and c.stats.evictions > 0
+        assert os.path.getsize(tmp_path / 'data') <= 10000
+
+def test_corruption_is_a_miss(tmp_path):
+    with DiskCache(tmp_path) as c:
+        c.put('a', b'alpha')
+    with open(tmp_path / 'data', 'r+b') as f:
+        f.write(b'A')
+    with DiskCache(tmp_path) as c:
+        assert c.get('a') is None
+        c.put('a', b'alpha')
+        assert c.get('a') == b'alpha'
+    (tmp_path / 'index').write_bytes(b'garbage')
+    with DiskCache(tmp_path) as c:
+        assert c.get('a') is None
+
+def _fill(directory, start):
+    with DiskCache(directory, max_bytes=20000, slots=128) as c:
+        for i in range(start, start + 100):
+            c.put(f'k{i}', str(i).encode() * 20)
+            value = c.get(f'k{i - 1}')
+            assert value is None or value == str(i - 1).encode() * 20
+
+def test_processes_share_a_cache(tmp_path):
+    processes = [multiprocessing.Process(target=_fill, args=(str(tmp_path), n * 1000)) for n in range(4)]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+        assert p.exitcode == 0
+    with DiskCache(tmp_path) as c:
+        for n in range(4):
+            value = c.get(f'k{n * 1000 + 99}')
+            assert value is None or value == str(n * 1000 + 99).encode() * 20
+        assert 0 < len(c) <= 96
+
+def test_renders_use_the_disk_cache(tmp_path):
+    cache.invalidate()
+    try:
+        disk = cache.use_disk_cache(str(tmp_path))
+        assert cache.use_disk_cache(str(tmp_path)) is disk
+        svg = to_svg('did:peer:abc123', 2, 1, 10)
+        assert disk.get(disk_key('did:peer:abc123', 2, 1, 10, 'svg', False)) == svg.encode('utf-8')
+        # Same normalized value, same key.
+        assert disk_key('0xABCDEF0123', 1, 1, 12) == disk_key('0xabcdef0123', 1, 1, 12)
+        cache.invalidate()
+        hits = disk.hits
+        assert to_svg('did:peer:abc123', 2, 1, 10) == svg
+        assert disk.hits == hits + 1
+    finally:
+        cache.use_disk_cache(None)
+        cache.invalidate()
+    results = list(render_many(['eosio.token', 'did:peer:xyz'], workers=2, cache_dir=str(tmp_path / 'batch')))
+    with DiskCache(tmp_path / 'batch') as c:
+        assert len(c) == 2
+        assert c.get(disk_key('eosio.token', 1, 1, 12, 'svg', False)).decode('utf-8') == results[0].svg
+
+def test_batch_leaves_the_disk_cache_as_it_was(tmp_path):
+    list(render_many(['eosio.token'], workers=1, cache_dir=str(tmp_path / 'a')))
+    assert cache.disk_cache is None
+    try:
+        disk = cache.use_disk_cache(str(tmp_path / 'b'))
+        list(render_many(['did:peer:xyz'], workers=1, cache_dir=str(tmp_path / 'a')))
+        assert cache.disk_cache is disk and disk.get('anything') is None
+    finally:
+        cache.use_disk_cache(None)
+    with DiskCache(tmp_path / 'a') as c:
+        assert len(c) == 2
+
+def test_sized_exports_use_the_disk_cache(tmp_path):
+    results = list(render_many(['eosio.token'], workers=1, cache_dir=str(tmp_path), sizes=['16px', '12pt']))
+    with DiskCache(tmp_path) as c:
+        assert len(c) == 2
+        key = disk_key('eosio.token', 1, 1, None, 'svg-size', '16px', False)
+        assert c.get(key).decode('utf-8') == results[0].svg['16px']
@@ -1,4 +1,5 @@
 from ..entropy import *
+from .. import cache
 import hashlib
 import random
 
@@ -53,6 +54,7 @@ expected_parsers = [
     ("bInvalidBase32Address12345", None), # Invalid CIDv1
     ("notAValidAddress12345", None),
     ("601", None),
+    ("87f9afc5e794c1498eb3217e477242c", None), # odd-length hex
     ("", None)
 ]
 
@@ -181,3 +183,166 @@ def test_UUID_normalization():
         assert answer.core == "087f9afc5e794c1498eb3217e477242c"
         assert answer.type == "UUID"
 
+
+def ordered_parse(entropy):
+    entropy = entropy.strip()
+    for func in parse_funcs:
+        answer = func(entropy)
+        if answer:
+            return answer
+
+def test_dispatch_matches_ordered_walk():
+    def same(input):
+        assert parse(input) == ordered_parse(input), input
+
+    for input, _ in expected_parsers:
+        same(input)
+        # Perturb each sample so we exercise near misses, too.
+        same(input[1:])
+        same(input[:-1])
+        same(input.upper())
+        same(input.lower())
+        same(" " + input + "\n")
+    rand = random.Random(42)
+    alphabets = [HEX_CHARS, BASE58_ALPHABET, BASE32_ALPHABET_EITHER_CASE, BASE64URL_ALPHABET + "+/=:{}.ı"]
+    for _ in range(5000):
+        alphabet = rand.choice(alphabets)
+        prefix = rand.choice(["", "0x", "did:key:", "Qm", "AAAA", "addr1", "bc1", "bitcoincash:", "G", "b", "L", "r"])
+        input = prefix + ''.join(rand.choice(alphabet) for _ in range(rand.randint(0, 120)))
+        same(input)
+
+def test_parse_many():
+    inputs = [input for input, _ in expected_parsers]
+    expected = [parse(input) for input in inputs]
+    for workers in [1, 2]:
+        stats = ParseStats()
+        assert list(parse_many(iter(inputs), workers=workers, chunk_size=7, stats=stats)) == expected
+        assert stats.count == len(inputs)
+        assert stats.items_per_second > 0
+
+def test_read_entropies(tmp_path):
+    path = tmp_path / "inventory.txt"
+    path.write_text("did:peer:abc123\n\n  eosio.token  \n")
+    assert list(read_entropies(path)) == ["did:peer:abc123", "eosio.token"]
+    assert list(read_entropies(path, numbered=True)) == [(1, "did:peer:abc123"), (3, "eosio.token")]
+    assert [x.type for x in parse_many(read_entropies(path), workers=1)] == ["DID", "EOS"]
+
+def test_lazy_regex():
+    pattern = LazyRegex(r'^(a+)b$', re.I)
+    assert pattern.match("AAb").group(1) == "AA"
+    assert pattern.match("ac") is None
+    assert pattern.groups == 1
+
+def test_parse_only_startup_is_light():
+    import os, subprocess, sys
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    code = ("import sys, entviz.app, entviz.entropy; entviz.entropy.parse('eosio.token'); "
+            "print(sorted(m for m in ['lxml', 'hashlib', 'concurrent.futures', 'entviz.render'] if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+def fuzz_inputs(count=3000, seed=7):
+    rand = random.Random(seed)
+    alphabets = [HEX_CHARS, BASE58_ALPHABET, BASE32_ALPHABET_EITHER_CASE, BASE64URL_ALPHABET + "+/=:{}."]
+    prefixes = ["", "0x", "did:key:", "Qm", "AAAA", "1AAA", "0B", "addr1", "bc1", "bitcoincash:", "G", "b", "q", "r"]
+    inputs = [input.strip() for input, _ in expected_parsers]
+    for _ in range(count):
+        length = rand.choice([rand.randint(0, 120), 32, 34, 40, 42, 44, 46, 48, 88])
+        inputs.append(rand.choice(prefixes) + ''.join(rand.choice(rand.choice(alphabets)) for _ in range(length)))
+    return inputs
+
+def test_overlapping_parsers_are_constrained():
+    # If two parsers can match the same text, one must be required to come
+    # after the other, or adaptive ordering could change the answer.
+    def comes_after(name, other, seen=()):
+        earlier = list(registry[name].after) + [n for n, spec in registry.items() if name in spec.before]
+        return any(a == other or (a not in seen and comes_after(a, other, seen + (a,)))
+                   for a in earlier)
+    # Overlaps the random inputs are unlikely to hit.
+    overlaps = ["b" + "a" * 59, "AAAA" + "1" * 36, "1112" + "ab" * 18, "110e" + "ab" * 14, "BC1" + "Q" * 41]
+    for input in fuzz_inputs() + overlaps:
+        matching = [name for name, spec in registry.items() if spec.func(input)]
+        for i, a in enumerate(matching):
+            for b in matching[i + 1:]:
+                assert comes_after(a, b) or comes_after(b, a), (input, a, b)
+
+def test_adaptive_ordering_keeps_answers():
+    inputs = fuzz_inputs()
+    expected = [parse(input) for input in inputs]
+    default_order = list(parse_funcs)
+    try:
+        set_adaptive(True, every=50)
+        for _ in range(3):
+            for input in ["did:key:abc123", "BlJbbpxQMJUPE_BaZVxi8jsHuxNM5HEDt-JSyvOTm6U6"] * 40:
+                cache.invalidate()
+                parse(input)
+        names = [func.__name__ for func in parse_funcs]
+        assert names.index("parse_did") < names.index("parse_bitcoin_address")
+        assert names.index("parse_cesr") < names.index("parse_ssh_key") < names.index("parse_hex")
+        assert [ordered_parse(input) for input in inputs] == expected
+        cache.invalidate()
+        assert [parse(input) for input in inputs] == expected
+    finally:
+        set_adaptive(False)
+    assert parse_funcs == default_order
+
+def test_adaptive_ordering_counts_cached_answers():
+    cache.invalidate()
+    try:
+        set_adaptive(True, every=10)
+        # One distinct input, answered from the cache after the first time.
+        for _ in range(10):
+            parse("did:key:abc123")
+        assert parse_funcs[0] is parse_did
+    finally:
+        set_adaptive(False)
+
+def parse_shouty(text) -> Parsed:
+    if text.isupper() and text.endswith("!"):
+        return Parsed("shout", None, text[:-1], None)
+parse_shouty.priority = 5
+parse_shouty.gates = [("ABCDEFGHIJKLMNOPQRSTUVWXYZ", ANY_LENGTH)]
+
+def test_register_and_plugins(monkeypatch):
+    import importlib.metadata
+    point = importlib.metadata.EntryPoint(name="shouty", value=f"{__name__}:parse_shouty", group=PLUGIN_GROUP)
+    monkeypatch.setattr(importlib.metadata, "entry_points", lambda group: [point] if group == PLUGIN_GROUP else [])
+    assert parse("HELLO!") is None
+    try:
+        assert load_plugins() == ["shouty"]
+        assert parse("HELLO!") == Parsed("shout", None, "HELLO", None)
+        assert parse_funcs[0] is parse_shouty
+        assert parse("did:key:abc123").type == "DID"
+        # Constraints win over priorities, and cycles are refused.
+        register_parser(parse_shouty, 5, after=["parse_hex"], name="shouty")
+        assert parse_funcs[-1] is parse_shouty
+        try:
+            register_parser(parse_hex, 1000, after=["shouty"])
+            assert False
+        except ValueError:
+            pass
+        assert parse_funcs[-1] is parse_shouty
+        assert parse("ABCDEF").type == "hex"
+        # before is kept with its parser: registering again without it
+        # drops the constraint, and leaves the other parser's spec alone.
+        register_parser(parse_shouty, 2000, before=["parse_hex"], name="shouty")
+        assert parse_funcs.index(parse_shouty) < parse_funcs.index(parse_hex)
+        assert "shouty" not in registry["parse_hex"].after
+        register_parser(parse_shouty, 2000, name="shouty")
+        assert parse_funcs[-1] is parse_shouty
+    finally:
+        unregister_parser("shouty")
+    assert parse("HELLO!") is None
+
+def test_any_first_char_gate():
+    def parse_tilde(text):
+        if text.startswith("~"):
+            return Parsed("tilde", "~", text[1:], None)
+    try:
+        register_parser(parse_tilde, 1)
+        assert parse("~abc").type == "tilde"
+        assert parse("did:key:abc123").type == "DID"
+        assert parse("~") == Parsed("tilde", "~", "", None)
+    finally:
+        unregister_parser("parse_tilde")
+    assert parse("~abc") is None
@@ -0,0 +1,51 @@
+import io
+import re
+
+from ..gallery import *
+from ..shapes import etree
+
+INPUTS = ["did:peer:abc123", "087f9afc-5e79-4c14-98eb-3217e477242c", "", "eosio.token"] * 5
+LAYOUT = PageLayout(3, 2, Size(160, 120))
+
+def test_tiles_fill_the_page():
+    tiles = [tile_rect(LAYOUT, i) for i in range(6)]
+    assert tiles[0] == Rect(Point(0, 0), LAYOUT.tile)
+    assert tiles[5].bottom_right == Point(*page_size(LAYOUT))
+    for tile in tiles:
+        drawing, text = drawing_rect(tile), label_rect(tile)
+        assert tile.left < drawing.left and drawing.right < tile.right
+        assert tile.top < drawing.top and drawing.bottom <= text.top and text.bottom < tile.bottom
+
+def test_html_shares_one_defs():
+    out = io.StringIO()
+    assert write_html(INPUTS, out, LAYOUT) == 4
+    html = out.getvalue()
+    assert html.startswith("<!DOCTYPE html>") and html.endswith("</body></html>\n")
+    assert html.count("<defs>") == 1
+    defined = set(re.findall(r'<g id="([^"]+)"', html))
+    used = set(re.findall(r'href="#([^"]+)"', html))
+    assert used and used <= defined
+    assert html.count("viewBox") == 15
+    assert html.count(": ValueError<") == 5
+
+def test_svg_pages(tmp_path):
+    assert write_svg_pages(INPUTS[:6] + INPUTS[:1], tmp_path, LAYOUT) == 2
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["page-0001.svg", "page-0002.svg"]
+    last = etree.parse(str(tmp_path / "page-0002.svg")).getroot()
+    assert (last.get("width"), last.get("height")) == ("480", "240")
+    assert len(last.findall("{*}defs")) == 1 and len(last.findall("{*}svg")) == 1
+    assert last.findall("{*}text")[0].text == "did:peer:abc123"
+
+def test_output_starts_before_input_ends():
+    out = io.StringIO()
+    written = []
+    def entropies():
+        for entropy in INPUTS:
+            written.append(len(out.getvalue()))
+            yield entropy
+    write_html(entropies(), out, LAYOUT, buffer_size=1)
+    assert written[0] > 0 and written[-1] > written[6] > written[0]
+
+def test_labels():
+    assert label(" did:peer:abc123 ") == "did:peer:abc123"
+    assert label("x" * 100) == "x" * (LABEL_CHARS - 1) + "…"
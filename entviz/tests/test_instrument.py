@@ -0,0 +1,49 @@
+import json
+
+from .. import instrument
+from ..cache import invalidate
+from ..entropy import parse
+from ..render import to_svg
+
+def test_disabled_records_nothing():
+    instrument.reset()
+    assert not instrument.enabled
+    invalidate()
+    to_svg("did:peer:instrument")
+    assert instrument.snapshot()["stages"] == {}
+    assert instrument.stage("draw") is instrument.stage("parse")
+
+def test_profiling_records_stages_and_parsers():
+    invalidate()
+    seen = []
+    callback = instrument.on_stage(lambda name, seconds, blocks: seen.append(name))
+    try:
+        with instrument.profiling():
+            to_svg("did:peer:instrument", 3, 2)
+            parse("b" + "1" * 60)
+    finally:
+        instrument.remove_callback(callback)
+    assert not instrument.enabled
+    stats = instrument.snapshot()
+    assert set(stats["stages"]) == set(instrument.STAGES)
+    assert all(s["calls"] == 1 and s["seconds"] >= 0 for s in stats["stages"].values())
+    assert seen[-1] == "serialize"
+    assert stats["parsers"]["matched"] == {"parse_did": 1}
+    assert stats["parsers"]["tried"]["parse_did"] == 1
+    assert sum(stats["parsers"]["tried"].values()) > 1
+    assert stats["parsers"]["answered"] == {"parse_did": 1}
+    assert stats["caches"]["render"]["misses"] >= 1
+    json.dumps(stats)
+    report = instrument.report(stats)
+    assert report.splitlines()[1].startswith("parse") and "parse_did" in report
+    instrument.reset()
+
+def test_cached_parses_are_counted():
+    invalidate()
+    with instrument.profiling():
+        for _ in range(3):
+            parse("did:peer:counted")
+    stats = instrument.snapshot()
+    assert stats["parsers"]["answered"] == {"parse_did": 3}
+    assert stats["parsers"]["matched"] == {"parse_did": 1}
+    instrument.reset()
@@ -1,4 +1,5 @@
 from ..layout import *
+from fractions import Fraction
 
 def test_Rect():
     br = Rect(Point(10, 20), Size(30, 40))
@@ -29,3 +30,91 @@ def test_Cell():
     assert cell.edge_rect(4) == Rect(Point(8, 24), e0134)
     assert cell.edge_rect(5) == Rect(Point(0, 8), e25)
 
+
+def test_choose_grid():
+    # The example from the README: 11 tokens at 1:1.
+    assert choose_grid(11) == Grid(3, 4)
+    assert choose_grid(8) == Grid(2, 4)
+    assert choose_grid(8, 2, 1) == Grid(3, 3)
+    # Nothing is wide enough, so take the widest.
+    assert choose_grid(3, 100, 1) == Grid(6, 1)
+    for token_count in range(1, 200):
+        for ar in [(1, 1), (16, 9), (1, 3)]:
+            grid = choose_grid(token_count, *ar)
+            assert 0 <= grid.columns * grid.rows - token_count <= MAX_BLANK_CELLS
+
+def test_grid_cell():
+    size = cell_size(12)
+    assert size == Size(64, 32)
+    assert grid_cell(Grid(3, 2), 4, size) == Cell(Point(64, 32), size)
+
+def test_GridGeometry_matches_Cell():
+    grid = Grid(4, 3)
+    for size in [Size(64, 32), cell_size(7), cell_size(10)]:
+        geometry = GridGeometry(grid, size)
+        assert len(geometry.rects) == 4 * 3 * RECTS_PER_CELL * 4
+        for i in range(len(geometry)):
+            cell = grid_cell(grid, i, size)
+            view = geometry.cell(i)
+            assert view.nucleus == cell.nucleus
+            assert cell.nucleus == view.nucleus
+            assert view.top_left == cell.top_left
+            assert (view.right, view.bottom, view.center) == (cell.right, cell.bottom, cell.center)
+            assert view.edge_width == cell.edge_width
+            for edge in range(6):
+                assert view.edge_rect(edge) == cell.edge_rect(edge)
+                assert view.edge_rect(edge).bottom_right == cell.edge_rect(edge).bottom_right
+
+def test_FrozenRect():
+    r = FrozenRect(10, 20, 30, 40)
+    assert r == Rect(Point(10, 20), Size(30, 40))
+    assert r.bottom_right == Point(40, 60)
+    assert r.top_right == Point(40, 20)
+    assert r.bottom_left == Point(10, 60)
+    assert r.center == Point(25, 40)
+    assert r != FrozenRect(10, 20, 30, 41)
+
+def scan_every_column_count(token_count, ar_width, ar_height):
+    target = Fraction(ar_width, ar_height)
+    best = None
+    for columns in range(1, token_count + MAX_BLANK_CELLS + 1):
+        rows = -(-token_count // columns)
+        while columns * rows - token_count <= MAX_BLANK_CELLS:
+            ratio = Fraction(2 * columns, rows)
+            key = (ratio < target, abs(ratio - target), columns * rows, columns)
+            if best is None or key < best[0]:
+                best = (key, Grid(columns, rows))
+            rows += 1
+    return best[1]
+
+def test_choose_grid_matches_full_scan():
+    ratios = [(1, 1), (2, 1), (1, 2), (16, 9), (9, 16), (100, 1), (1, 100), (3, 7), (100, 99)]
+    for token_count in range(1, 300):
+        for ar in ratios:
+            assert choose_grid(token_count, *ar) == scan_every_column_count(token_count, *ar), (token_count, ar)
+
+def test_divisor_pairs():
+    assert sorted(divisor_pairs(12)) == [(1, 12), (2, 6), (3, 4), (4, 3), (6, 2), (12, 1)]
+    assert list(divisor_pairs(9)) == [(1, 9), (9, 1), (3, 3)]
+
+def test_precompute_grids():
+    from .. import layout
+    precompute_grids(20, [(5, 3), (10, 6), (1, 1)])
+    assert len([key for key in layout.grid_table if key[0] <= 20]) >= 40
+    best_grid.cache_clear()
+    for token_count in range(1, 21):
+        assert choose_grid(token_count, 10, 6) == choose_grid(token_count, 5, 3) == \
+               best_grid.__wrapped__(token_count, Fraction(5, 3))
+        choose_grid(token_count, 2, 2)
+    # Every warmed shape was a table hit, never the LRU.
+    assert best_grid.cache_info().misses == 0
+    layout.grid_table.clear()
+
+def test_vectorized_geometry_is_identical():
+    import pytest
+    np = pytest.importorskip("numpy")
+    from .. import layout
+    for grid in [Grid(1, 1), Grid(8, 8), Grid(17, 23)]:
+        for fontsize in [7, 12, 13.3]:
+            size = cell_size(fontsize)
+            assert layout._vector_rects(np, grid, size) == layout._loop_rects(grid, size)
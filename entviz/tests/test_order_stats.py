@@ -0,0 +1,29 @@
+import random
+
+from ..order_stats import *
+from ..tokens import Token, tokenize, median_token, quartile_tokens, first_and_last_tokens, BASE64, HEX
+
+def assert_same_as_sorting(tokens):
+    stats = order_statistics(tokens)
+    assert stats.median == median_token(tokens)
+    assert (stats.first, stats.last) == first_and_last_tokens(tokens)
+    assert stats.quartiles == quartile_tokens(tokens)
+
+def test_matches_sorting():
+    rand = random.Random(11)
+    for n in [1, 2, 3, 5, 8, 63, 64, 65, 136, 1000]:
+        # A tiny alphabet makes lots of duplicate tokens, to exercise tie-breaks.
+        for alphabet in ["ab", "ABCDEFabcdef0123456789-_"]:
+            for extra in [0, 1, 2, 3]:
+                core = ''.join(rand.choice(alphabet) for _ in range(4 * n + extra))
+                assert_same_as_sorting(tokenize(core, BASE64))
+    assert_same_as_sorting(tokenize("0123456789abcdef" * 40 + "abc", HEX))
+
+def test_unpackable_tokens_fall_back_to_sorting():
+    tokens = [Token("ı" * (i % 3 + 1), i, 0) for i in range(100)]
+    assert_same_as_sorting(tokens)
+
+def test_quartile_positions():
+    assert quartile_positions(8) == [0, 2, 4, 6]
+    assert quartile_positions(5) == [0, 2, 4, None]
+    assert quartile_positions(1) == [0, None, None, None]
@@ -0,0 +1,32 @@
+import random
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ..quants import *
+from ..tokens import tokenize, quantize, HEX, BASE32, BASE58, BASE64
+
+def test_core_quants_match_tokenize():
+    rand = random.Random(7)
+    for encoding in [HEX, BASE32, BASE58, BASE64]:
+        for _ in range(200):
+            core = ''.join(rand.choice('0123456789abcdefXYZ-_+/=.:ı') for _ in range(rand.randint(1, 80)))
+            assert core_quants(core, encoding).tolist() == [t.quant for t in tokenize(core, encoding)]
+
+def test_tokenize_uses_vectors_for_long_cores():
+    core = "AAAAB3NzaC1yc2EAAAADAQABAAABgQDSD+oM4kLidAptE5pjRA8OB" * 12
+    assert [t.quant for t in tokenize(core, BASE64)] == [quantize(t.text, BASE64) for t in tokenize(core, BASE64)]
+
+def test_batch_quants_pads_ragged_rows():
+    quants = batch_quants(["abcd", "abcdefgh", ""], BASE64)
+    assert quants.shape == (3, 2)
+    assert quants[0, 0] == quants[1, 0]
+    assert quants[0, 1] == NO_QUANT
+    assert (quants[2] == NO_QUANT).all()
+
+def test_edge_fields():
+    quants = np.array([0xfedcba, 0x123456], dtype=np.uint32)
+    assert edge_nums(quants).tolist() == [[0xa, 0xb, 0xc, 0xd, 0xe, 0xf], [6, 5, 4, 3, 2, 1]]
+    assert color_bases(quants)[0].tolist() == [2, 3, 0, 1, 2, 3]
+    assert shape_bases(quants)[0].tolist() == [2, 2, 3, 3, 3, 3]
+    assert quant_rgb(quants).tolist() == [[0xba, 0xdc, 0xfe], [0x56, 0x34, 0x12]]
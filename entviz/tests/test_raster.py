@@ -0,0 +1,59 @@
+import struct
+import zlib
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ..raster import *
+from ..colors import quant_to_rgb
+from ..layout import Point, Rect, Size, GridGeometry, cell_size
+
+def decode_png(data: bytes):
+    assert data.startswith(PNG_SIGNATURE)
+    width, height, depth, color_type = struct.unpack('>IIBB', data[16:26])
+    assert (depth, color_type) == (8, 2)
+    idat_length = struct.unpack('>I', data[33:37])[0]
+    assert data[37:41] == b'IDAT'
+    raw = np.frombuffer(zlib.decompress(data[41:41 + idat_length]), dtype=np.uint8).reshape(height, width * 3 + 1)
+    assert not raw[:, 0].any()
+    return raw[:, 1:].reshape(height, width, 3)
+
+def test_shapes_fill_by_pixel_center():
+    fb = Framebuffer(20, 20)
+    rect(fb, Rect(Point(2, 3), Size(4, 5)), "#ff0000")
+    assert (fb.pixels[..., 0] == 255).sum() == 20
+    assert (fb.pixels[3:8, 2:6, 0] == 255).all()
+    for rotation in [0, 90, 180, 270]:
+        fb.reset(8, 8)
+        right_triangle(fb, Rect(Point(0, 0), Size(8, 8)), rotation, "#00ff00")
+        assert (fb.pixels[..., 1] == 255).sum() == 36
+    fb.reset(8, 8)
+    right_triangle(fb, Rect(Point(0, 0), Size(8, 8)), 0, "#00ff00")
+    assert fb.pixels[7, 0, 1] == 255 and fb.pixels[0, 7, 1] == 0
+    fb.reset(9, 9)
+    circle(fb, Rect(Point(2, 2), Size(4, 4)), "#0000ff")
+    assert fb.pixels[4, 4, 2] == 255 and fb.pixels[2, 2, 2] == 0 and fb.pixels[0, 0, 2] == 0
+
+def test_png_matches_geometry():
+    for entropy in ["did:peer:abc123", "AAAAC3NzaC1lZDI1NTE5AAAAIB0UIIW091sZULC1ojG1x7N+/SybeFJMu9dGGKCBRiR+"]:
+        entviz = Entviz(entropy)
+        pixels = decode_png(to_png(entropy))
+        geometry = GridGeometry(entviz.grid, cell_size(12))
+        assert pixels.shape == (geometry.cell(0).size.height * entviz.grid.rows,
+                                geometry.cell(0).size.width * entviz.grid.columns, 3)
+        for token, cell_index in zip(entviz.tokens, entviz.cells):
+            nucleus = geometry.cell(cell_index).nucleus
+            # The nucleus is empty of anything but its color (no text is drawn).
+            block = pixels[int(nucleus.top):int(nucleus.bottom), int(nucleus.left):int(nucleus.right)]
+            assert (block == quant_to_rgb(token.quant)).all()
+
+def test_batch_reuses_framebuffer():
+    fb = Framebuffer()
+    first = to_png("did:peer:abc123", framebuffer=fb)
+    allocations = fb.allocations
+    for _ in range(3):
+        assert to_png("did:peer:abc123", framebuffer=fb) == first
+    to_png("did:peer:abc", framebuffer=fb)
+    assert fb.allocations == allocations
+    assert list(png_many(["did:peer:abc123", "did:peer:abc123"])) == [first, first]
@@ -0,0 +1,60 @@
+import json
+import os
+
+import pytest
+
+from ..regress import *
+
+def result(seconds, peak=10000, retained=0):
+    return {"seconds_per_call": seconds, "peak_bytes": peak, "retained_bytes": retained}
+
+def test_compare():
+    baseline = {"a": result(1.0), "b": result(1.0), "c": result(1.0, 100000), "gone": result(1.0)}
+    current = {"a": result(1.2), "b": result(1.3), "c": result(1.0, 200000), "new": result(1.0)}
+    changes = compare(baseline, current, threshold=0.25)
+    assert [(c.name, c.metric) for c in changes if c.regressed] == [("b", "time"), ("c", "peak_bytes")]
+    # Small allocation growth is noise, however big the ratio.
+    assert not any(c.regressed for c in compare({"a": result(1, 10)}, {"a": result(1, 1000)}))
+    text = report(changes, baseline, current)
+    assert "2 regressions in 9 comparisons" in text
+    assert "+30%  REGRESSED" in text and "new: not in the baseline" in text
+    assert "gone: in the baseline but not measured" in text
+    assert "a " not in report(changes) and "a " in report(changes, verbose=True)
+
+def test_save_keeps_other_machines(tmp_path):
+    path = str(tmp_path / "baseline.json")
+    assert load(path) == {}
+    with open(path, "wt") as f:
+        json.dump({"machines": {"elsewhere": {"environment": {}, "results": {}}}}, f)
+    save(path, {"a": result(1.0)})
+    machines = load(path)
+    assert set(machines) == {"elsewhere", fingerprint()}
+    assert machines[fingerprint()]["results"] == {"a": result(1.0)}
+
+def test_measure_and_check(tmp_path, capsys):
+    path = str(tmp_path / "baseline.json")
+    options = ["--baseline", path, "--filter", "parse/type/uuid", "--min-time", "0.001", "--repeat", "2", "--quiet"]
+    assert main(["check"] + options) == 2
+    assert main(["save"] + options) == 0
+    results = load(path)[fingerprint()]["results"]
+    assert list(results) == ["parse/type/uuid"]
+    assert results["parse/type/uuid"]["seconds_per_call"] > 0 and results["parse/type/uuid"]["peak_bytes"] > 0
+    assert main(["check", "--threshold", "1000"] + options) == 0
+    assert "0 regressions in 3 comparisons" in capsys.readouterr().out
+
+@pytest.mark.skipif(not os.environ.get("ENTVIZ_PERF_BASELINE"),
+                    reason="set ENTVIZ_PERF_BASELINE to a baseline file to gate on performance")
+def test_no_regressions():
+    baseline = load(os.environ["ENTVIZ_PERF_BASELINE"]).get(fingerprint())
+    if baseline is None:
+        pytest.skip("no baseline for this machine")
+    threshold = float(os.environ.get("ENTVIZ_PERF_THRESHOLD", DEFAULT_THRESHOLD))
+    current = measure()
+    changes = compare(baseline["results"], current, threshold)
+    assert not any(c.regressed for c in changes), report(changes, baseline["results"], current)
+
+def test_fingerprint_ignores_the_host_name(monkeypatch):
+    import platform
+    before = fingerprint()
+    monkeypatch.setattr(platform, "node", lambda: "some-other-host")
+    assert fingerprint() == before
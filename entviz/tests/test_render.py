@@ -0,0 +1,136 @@
+from ..render import *
+from ..cache import render_cache
+from ..shapes import etree
+from ..tokens import Token
+
+def test_assign_cells():
+    tokens = [Token(t, i, 0) for i, t in enumerate(["bbbb", "dddd", "aaaa", "cccc", "eeee"])]
+    median = tokens[3]
+    first, last = tokens[2], tokens[4]
+    assert assign_cells(tokens, 5, median, first, last) == [0, 1, 2, 3, 4]
+    assert assign_cells(tokens, 6, median, first, last) == [0, 1, 2, 4, 5]
+    assert assign_cells(tokens, 7, median, first, last) == [0, 1, 2, 4, 6]
+    assert assign_cells(tokens, 8, median, first, last) == [0, 1, 3, 5, 7]
+
+def test_entviz_plan():
+    entviz = Entviz("087f9afc-5e79-4c14-98eb-3217e477242c")
+    assert entviz.parsed.type == "UUID"
+    assert len(entviz.tokens) == 6
+    assert len(entviz.edges) == 6 and all(len(e) == 6 for e in entviz.edges)
+    assert entviz.background not in entviz.edge_colors
+    assert len(entviz.edge_colors) == 4
+    for token_edges in entviz.edges:
+        for shape, color in token_edges:
+            assert shape in entviz.edge_shapes
+            assert color in entviz.edge_colors
+
+def test_unrecognized_entropy_is_bits():
+    entviz = Entviz("not a recognized value")
+    assert entviz.parsed.type == "bits"
+    assert entviz.encoding == "base64"
+
+def test_to_svg():
+    render_cache.invalidate()
+    render_cache.reset_stats()
+    svg = to_svg("did:peer:abc123")
+    assert svg.startswith("<svg")
+    assert ">abc1<" in svg and ">23<" in svg
+    assert to_svg(" did:peer:abc123 ") is svg
+    assert render_cache.stats.hits == 1
+    try:
+        to_svg("")
+        assert False, "Expected ValueError"
+    except ValueError:
+        pass
+
+def expand_uses(svg: str):
+    """
+    The drawn elements of an SVG, with each <use> replaced by the elements it
+    refers to, moved into place and given the use's fill.
+    """
+    root = etree.fromstring(svg)
+    symbols = {g.get("id"): list(g) for g in root.iter("{*}g")}
+    drawn = []
+    for el in root:
+        tag = etree.QName(el).localname
+        if tag == "defs":
+            continue
+        if tag != "use":
+            drawn.append(el)
+            continue
+        dx, dy = float(el.get("x")), float(el.get("y"))
+        for child in symbols[el.get("href")[1:]]:
+            copy = etree.Element(etree.QName(child).localname, dict(child.attrib), fill=el.get("fill"))
+            if "points" in copy.attrib:
+                points = [map(float, p.split(",")) for p in copy.get("points").split()]
+                copy.set("points", " ".join(f"{x + dx},{y + dy}" for x, y in points))
+            else:
+                copy.set("x", f"{float(copy.get('x')) + dx}")
+                copy.set("y", f"{float(copy.get('y')) + dy}")
+            drawn.append(copy)
+    return drawn
+
+def test_use_defs_looks_the_same():
+    def numbers(el):
+        return [round(float(n), 9) for n in el.get("points", "").replace(",", " ").split()] + \
+               [round(float(el.get(a)), 9) for a in ("x", "y", "width", "height") if el.get(a)]
+    for entropy in ["did:peer:abc123", "AAAAC3NzaC1lZDI1NTE5AAAAIB0UIIW091sZULC1ojG1x7N+/SybeFJMu9dGGKCBRiR+"]:
+        plain = to_svg(entropy, 16, 9)
+        shared = to_svg(entropy, 16, 9, use_defs=True)
+        assert "<use" in shared and len(shared) < len(plain)
+        expected = sorted((etree.QName(el).localname, el.get("fill"), numbers(el)) for el in expand_uses(plain))
+        actual = sorted((etree.QName(el).localname, el.get("fill"), numbers(el)) for el in expand_uses(shared))
+        assert actual == expected
+
+def test_scaled_svg_looks_the_same():
+    def drawn(svg, scale=1):
+        root = etree.fromstring(svg)
+        def numbers(el):
+            values = el.get("points", "").replace(",", " ").split() + \
+                     [el.get(a) for a in ("x", "y", "width", "height", "cx", "cy", "r") if el.get(a)]
+            return [round(float(n) * scale, 6) for n in values]
+        return sorted((etree.QName(el).localname, el.get("fill"), el.text, numbers(el)) for el in root)
+    for entropy in ["did:peer:abc123", "AAAAC3NzaC1lZDI1NTE5AAAAIB0UIIW091sZULC1ojG1x7N+/SybeFJMu9dGGKCBRiR+"]:
+        for fontsize in [8, 12, 24]:
+            plain = etree.fromstring(to_svg(entropy, 16, 9, fontsize))
+            scaled = to_scaled_svg(entropy, 16, 9, fontsize)
+            root = etree.fromstring(scaled)
+            assert (root.get("width"), root.get("height")) == (plain.get("width"), plain.get("height"))
+            view_box = [float(n) for n in root.get("viewBox").split()]
+            scale = float(root.get("width")) / view_box[2]
+            assert scale == fontsize / UNIT_FONTSIZE
+            assert drawn(scaled, scale) == drawn(to_svg(entropy, 16, 9, fontsize))
+
+def test_export_sizes_share_one_drawing():
+    render_cache.invalidate()
+    entropy = "087f9afc-5e79-4c14-98eb-3217e477242c"
+    svgs = export_sizes(entropy)
+    assert list(svgs) == list(EXPORT_SIZES)
+    assert render_cache.stats.entries == 1
+    assert svgs["12pt"] == to_scaled_svg(entropy, size=12)
+    bodies = {svg[svg.index(">"):] for svg in svgs.values()}
+    assert len(bodies) == 1
+    thumbnail = etree.fromstring(svgs["16px"])
+    assert max(float(thumbnail.get("width")), float(thumbnail.get("height"))) == 16
+    assert scale_of("24pt", Size(8, 4)) == scale_of(24, Size(8, 4)) == 2 * scale_of("12PT", Size(8, 4))
+    for size in ["0px", "0", "-1pt"]:
+        try:
+            scale_of(size, Size(8, 4))
+            assert False, size
+        except ValueError:
+            pass
+
+def test_defs_ids_are_safe_to_inline_together():
+    import re
+    entropy = "AAAAC3NzaC1lZDI1NTE5AAAAIB0UIIW091sZULC1ojG1x7N+/SybeFJMu9dGGKCBRiR+"
+    small, large = to_svg(entropy, fontsize=8, use_defs=True), to_svg(entropy, fontsize=24, use_defs=True)
+    ids = [set(re.findall(r'<g id="([^"]+)"', svg)) for svg in (small, large)]
+    assert ids[0] and ids[1] and not ids[0] & ids[1]
+    # The same id is the same geometry, whichever document defines it.
+    again = to_svg("did:peer:abc123", fontsize=8, use_defs=True)
+    def definitions(svg):
+        return {g.get("id"): etree.tostring(g) for g in etree.fromstring(svg).iter("{*}g")}
+    shared = definitions(small).keys() & definitions(again).keys()
+    assert shared and all(definitions(small)[id] == definitions(again)[id] for id in shared)
+    use = next(etree.fromstring(small).iter("{*}use"))
+    assert use.get("{http://www.w3.org/1999/xlink}href") == use.get("href")
@@ -0,0 +1,71 @@
+import io
+import random
+
+from ..scan import *
+from ..entropy import parse
+from .test_entropy import expected_parsers
+
+SAMPLES = [entropy.strip() for entropy, func in expected_parsers
+           if func is not None and parse(entropy) and not parse(entropy).type.startswith(('CESR', 'EOS'))
+           and (parse(entropy).type != 'hex' or len(entropy) >= MIN_HEX_DIGITS)]
+
+def document(count: int=3000, seed: int=20):
+    rng = random.Random(seed)
+    words = ['the', 'error', 'user', 'key:', '"id":', 'ok', 'x=1,', '\n', 'value_42', 'path/to']
+    expected = []
+    parts = []
+    offset = 0
+    for _ in range(count):
+        if rng.random() < 0.2:
+            value = rng.choice(SAMPLES)
+            expected.append((offset, value))
+        else:
+            value = rng.choice(words)
+        parts.append(value)
+        offset += len(value) + 1
+    return ' '.join(parts), expected
+
+def test_finds_every_sample_on_its_own():
+    for value in SAMPLES:
+        for text in [value, f'key: "{value}",', f'({value})\n']:
+            found = list(scan(text))
+            assert [(f.text, f.parsed) for f in found] == [(value, parse(value))], text
+
+def test_finds_values_in_a_document():
+    text, expected = document()
+    found = list(scan(text))
+    assert [(f.offset, f.text) for f in found] == expected
+    assert all(f.parsed == parse(f.text) for f in found)
+
+def test_not_inside_bigger_words():
+    value = '1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa'
+    for text in [f'x{value}', f'{value}_suffix', f'base64+{value}', f'path/{value}']:
+        assert list(scan(text)) == []
+    assert [f.text for f in scan(f'did:web:example.com/a/b?x=1 and {value}')] == \
+        ['did:web:example.com/a/b?x=1', value]
+
+def test_streams_and_files_match_scan(tmp_path):
+    text, _ = document(count=8000)
+    expected = list(scan(text))
+    for chunk_size in [50, 4000, 1 << 20]:
+        assert list(scan_stream(io.StringIO(text), chunk_size=chunk_size)) == expected
+    assert list(scan_stream(io.BytesIO(text.encode('ascii')), chunk_size=333)) == expected
+    path = tmp_path / 'doc.txt'
+    path.write_text(text)
+    assert list(scan_file(path)) == expected
+    (tmp_path / 'empty').write_bytes(b'')
+    assert list(scan_file(tmp_path / 'empty')) == []
+
+def test_strict():
+    made_up = 'nipcBbFg9gMiCh81Kj8tqqdgoZub1ZJRfn'
+    real = '1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa'
+    assert [f.text for f in scan(f'{made_up} {real}')] == [made_up, real]
+    assert [f.text for f in scan(f'{made_up} {real}', strict=True)] == [real]
+
+def test_bytes_tails_stop_before_non_ascii():
+    data = 'x did:key:z6Mkabc/péth y'.encode('utf-8')
+    found = list(scan(data))
+    assert [(f.offset, f.text) for f in found] == [(2, 'did:key:z6Mkabc/p')]
+    assert [(f.offset, f.text) for f in scan_stream(io.BytesIO(data), chunk_size=4)] == [(2, 'did:key:z6Mkabc/p')]
+    # str input has no such limit.
+    assert [f.text for f in scan(data.decode('utf-8'))] == ['did:key:z6Mkabc/péth']
@@ -0,0 +1,130 @@
+import asyncio
+import concurrent.futures
+import json
+import threading
+import time
+
+from ..server import *
+from ..render import to_svg
+
+async def get(port, target, headers=()):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    request = [f"GET {target} HTTP/1.1", "Host: localhost", "Connection: close"] + list(headers)
+    writer.write(('\r\n'.join(request) + '\r\n\r\n').encode('latin-1'))
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = dict((k.lower(), v.strip()) for k, _, v in (line.partition(':') for line in lines[1:]))
+    return status, headers, body
+
+def serve(test, renderer=render_svg):
+    async def run():
+        service = EntvizService(concurrent.futures.ThreadPoolExecutor(4), renderer=renderer)
+        server = await start('127.0.0.1', 0, service)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            await test(service, port)
+    asyncio.run(run())
+
+def test_svg_and_etags():
+    async def test(service, port):
+        status, headers, body = await get(port, '/svg?entropy=did%3Apeer%3Aabc123&ar=3:2&fs=10')
+        assert status == 200 and headers['content-type'] == 'image/svg+xml'
+        assert body.decode('utf-8') == to_svg('did:peer:abc123', 3, 2, 10)
+        tag = headers['etag']
+        status, headers, body = await get(port, '/svg?entropy=did%3Apeer%3Aabc123&ar=3:2&fs=10',
+                                          [f'If-None-Match: {tag}'])
+        assert status == 304 and body == b'' and headers['etag'] == tag
+        # Same normalized value, same tag; different options, different tag.
+        _, same, _ = await get(port, '/svg?entropy=0xABCDEF0123&ar=3:2&fs=10')
+        _, lower, _ = await get(port, '/svg?entropy=0xabcdef0123&ar=3:2&fs=10')
+        _, other, _ = await get(port, '/svg?entropy=0xabcdef0123&ar=3:2&fs=11')
+        assert same['etag'] == lower['etag'] != other['etag']
+        assert service.renders == 3
+    serve(test)
+
+def test_parse_and_errors():
+    async def test(service, port):
+        status, headers, body = await get(port, '/parse?entropy=eosio.token')
+        assert status == 200 and headers['content-type'] == 'application/json'
+        assert json.loads(body) == {"type": "EOS", "prefix": None, "core": "eosio.token", "suffix": None}
+        assert (await get(port, '/svg'))[0] == 400
+        assert (await get(port, '/svg?entropy=abc&ar=0:1'))[0] == 400
+        assert (await get(port, '/svg?entropy=abc&fs=99'))[0] == 400
+        assert (await get(port, '/nothing'))[0] == 404
+    serve(test)
+
+def test_identical_requests_are_coalesced():
+    calls = []
+    lock = threading.Lock()
+    def slow_renderer(*options):
+        with lock:
+            calls.append(options)
+        time.sleep(0.2)
+        return render_svg(*options)
+    async def test(service, port):
+        results = await asyncio.gather(*[get(port, '/svg?entropy=did%3Apeer%3Aabc123') for _ in range(5)])
+        assert all(status == 200 for status, _, _ in results)
+        assert len(set(body for _, _, body in results)) == 1
+        assert len(calls) == 1 and service.renders == 1 and service.coalesced == 4
+        # Now it is cached.
+        assert (await get(port, '/svg?entropy=did%3Apeer%3Aabc123'))[0] == 200
+        assert len(calls) == 1
+    serve(test, slow_renderer)
+
+def test_disk_cache_survives_a_restart(tmp_path):
+    async def run():
+        for expected_renders in [1, 0]:
+            service = EntvizService(concurrent.futures.ThreadPoolExecutor(2), cache_dir=str(tmp_path))
+            server = await start('127.0.0.1', 0, service)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                status, _, body = await get(port, '/svg?entropy=eosio.token&fs=10')
+            assert status == 200 and body.decode('utf-8') == to_svg('eosio.token', 1, 1, 10)
+            assert service.renders == expected_renders
+            service.disk.close()
+    asyncio.run(run())
+
+async def raw(port, data: bytes):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(data)
+    response = await reader.read()
+    writer.close()
+    return int(response.split(b' ', 2)[1]), response.partition(b'\r\n\r\n')[2]
+
+def test_unreadable_requests_get_a_response():
+    async def test(service, port):
+        assert (await raw(port, b'GET /svg?entropy=' + b'a' * MAX_LINE + b' HTTP/1.1\r\n\r\n'))[0] == 414
+        assert (await raw(port, b'GET /svg?entropy=' + b'a' * (MAX_LINE * 3) + b' HTTP/1.1\r\n\r\n'))[0] == 414
+        assert (await raw(port, b'GET /svg\r\n\r\n'))[0] == 400
+        assert (await raw(port, b'GET / HTTP/1.1\r\n' + b'X: y\r\n' * (MAX_HEADERS + 1) + b'\r\n'))[0] == 431
+        assert (await raw(port, b'GET / HTTP/1.1\r\nX: ' + b'y' * (MAX_LINE * 3) + b'\r\n\r\n'))[0] == 431
+    serve(test)
+
+def test_internal_errors_are_not_shown_to_clients(capsys):
+    def broken_renderer(*options):
+        raise RuntimeError('secret detail')
+    async def test(service, port):
+        status, _, body = await get(port, '/svg?entropy=did%3Apeer%3Aabc123')
+        assert status == 500 and b'secret' not in body
+    serve(test, broken_renderer)
+    assert 'secret detail' in capsys.readouterr().err
+
+def test_etags_change_with_the_renderer(monkeypatch):
+    from .. import render
+    async def test(service, port):
+        _, before, _ = await get(port, '/svg?entropy=eosio.token')
+        monkeypatch.setattr(render, 'RENDER_VERSION', render.RENDER_VERSION + 1)
+        status, after, _ = await get(port, '/svg?entropy=eosio.token', [f"If-None-Match: {before['etag']}"])
+        assert status == 200 and after['etag'] != before['etag']
+    serve(test)
+
+def test_if_none_match_compares_whole_tags():
+    tag = '"0123456789abcdef"'
+    assert not_modified(tag, {'if-none-match': f'"x", W/{tag}'})
+    assert not_modified(tag, {'if-none-match': '*'})
+    # Containing the tag isn't listing it.
+    assert not not_modified(tag, {'if-none-match': f'"x{tag}x"'})
+    assert not not_modified(tag, {})
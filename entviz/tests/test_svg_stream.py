@@ -0,0 +1,39 @@
+import io
+
+from .. import svg_stream
+from ..shapes import etree
+from ..layout import Size, Point, Rect
+from ..render import render, stream_svg
+from .test_entropy import expected_parsers
+
+def test_stream_matches_tree():
+    for input, _ in expected_parsers[:30]:
+        if not input:
+            continue
+        out = io.StringIO()
+        stream_svg(input, out, 3, 2, 10, buffer_size=100)
+        assert out.getvalue() == etree.tostring(render(input, 3, 2, 10), encoding='unicode')
+
+def test_stream_matches_tree_with_defs():
+    for input in ["did:peer:abc123", "AAAAC3NzaC1lZDI1NTE5AAAAIB0UIIW091sZULC1ojG1x7N+/SybeFJMu9dGGKCBRiR+"]:
+        out = io.StringIO()
+        stream_svg(input, out, 3, 2, 10, buffer_size=100, use_defs=True)
+        assert out.getvalue() == etree.tostring(render(input, 3, 2, 10, use_defs=True), encoding='unicode')
+
+def test_elements_are_escaped():
+    out = io.StringIO()
+    with svg_stream.canvas(Size(10, 10), out) as svg:
+        svg_stream.text(svg, Rect(Point(0, 0), Size(4, 4)), 'a<&>"b', '"red"', 3)
+        svg_stream.circle(svg, Rect(Point(0, 0), Size(4, 4)), "blue")
+    assert '>a&lt;&amp;&gt;"b</text>' in out.getvalue()
+    assert 'fill="&quot;red&quot;"' in out.getvalue()
+    assert out.getvalue().endswith('<circle cx="2.0" cy="2.0" r="2.0" fill="blue"/></svg>')
+    assert svg.element_count == 2
+
+def test_output_starts_before_close():
+    out = io.StringIO()
+    svg = svg_stream.canvas(Size(10, 10), out, buffer_size=1)
+    assert out.getvalue().startswith("<svg")
+    svg_stream.right_triangle(svg, Rect(Point(0, 0), Size(4, 4)), 90, "green")
+    assert '<polygon points="0,0 4,0 0,4" fill="green"/>' in out.getvalue()
+    svg.close()
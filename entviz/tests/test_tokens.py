@@ -0,0 +1,42 @@
+from ..tokens import *
+
+def test_extend_quant():
+    assert extend_quant(0xabcdef, 24) == 0xabcdef
+    assert extend_quant(0xabc, 12) == 0xabcabc
+    # 20 bits repeat their low 4 bits.
+    assert extend_quant(0x12345, 20) == 0x123455
+    assert extend_quant(0x5, 3) == 0b101101101101101101101101
+    assert extend_quant(0, 0) == 0
+
+def test_tokenize_hex():
+    tokens = tokenize("0123456789ABCDEF", HEX)
+    assert [t.text for t in tokens] == ["012345", "6789AB", "CDEF"]
+    assert [t.index for t in tokens] == [0, 1, 2]
+    assert tokens[0].quant == 0x012345
+    assert tokens[2].quant == 0xcdefef
+
+def test_tokenize_base64():
+    tokens = tokenize("AAAB_-", BASE64)
+    assert tokens[0].quant == 1
+    assert tokens[1].text == "_-"
+    assert tokens[1].quant == extend_quant((63 << 6) | 62, 12)
+
+def test_encoding_of():
+    assert encoding_of("UUID") == HEX
+    assert encoding_of("hex multihash sha2-256") == HEX
+    assert encoding_of("Stellar") == BASE32
+    assert encoding_of("Ripple") == BASE58
+    assert encoding_of("CESR Ed25519 pubkey") == BASE64
+
+def test_median_and_quartiles():
+    # The example from the README.
+    texts = ["Ead-", "k992", "cxJ3", "29v4", "f_G8", "23v9", "BA4m", "79rX"]
+    tokens = [Token(text, i, 0) for i, text in enumerate(texts)]
+    assert median_token(tokens).text == "BA4m"
+    assert [t.text for t in quartile_tokens(tokens)] == ["Ead-", "cxJ3", "f_G8", "79rX"]
+    assert [t.text for t in first_and_last_tokens(tokens)] == ["23v9", "k992"]
+
+def test_quartiles_with_blanks():
+    tokens = [Token("abcd", 0, 0), Token("abcd", 1, 0)]
+    assert quartile_tokens(tokens) == [tokens[0], tokens[1], None, None]
+    assert median_token(tokens) == tokens[0]
@@ -0,0 +1,144 @@
+from collections import namedtuple
+
+from .entropy import BASE32_ALPHABET, BASE58_ALPHABET
+
+Token = namedtuple('Token', ['text', 'index', 'quant'])
+
+HEX = "hex"
+BASE32 = "base32"
+BASE58 = "base58"
+BASE64 = "base64"
+
+# Each token should carry 24 bits, or as close to that as we can get on
+# whole characters.
+TOKEN_LENGTHS = {HEX: 6, BASE32: 4, BASE58: 4, BASE64: 4}
+BITS_PER_CHAR = {HEX: 4, BASE32: 5, BASE58: 6, BASE64: 6}
+QUANT_BITS = 24
+
+ENCODINGS = {
+    "UUID": HEX,
+    "Ethereum": HEX,
+    "hex": HEX,
+    "Bitcoin legacy": BASE58,
+    "Ripple": BASE58,
+    "Litecoin legacy": BASE58,
+    "Litecoin": BASE58,
+    "Cardano Byron": BASE58,
+    "IPFS CID v0": BASE58,
+    "Bitcoin SegWit": BASE32,
+    "Bitcoin Cash": BASE32,
+    "Cardano Shelley": BASE32,
+    "EOS": BASE32,
+    "Stellar": BASE32,
+    "IPFS CID v1 256": BASE32,
+    "SSH key": BASE64,
+    "DID": BASE64,
+    "bits": BASE64,
+}
+
+def encoding_of(entropy_type: str) -> str:
+    """
+    Say how the core of a given Parsed.type is encoded, which determines how
+    it is split into tokens.
+    """
+    encoding = ENCODINGS.get(entropy_type)
+    if encoding:
+        return encoding
+    if entropy_type.startswith("hex "):
+        return HEX
+    return BASE64
+
+def _char_values(alphabet, mask, case_insensitive=False):
+    # Characters outside the alphabet (separators in DIDs, the "1" in a
+    # bech32 string, etc.) still need a stable value; use their low bits.
+    values = {chr(i): i & mask for i in range(128)}
+    for i, c in enumerate(alphabet):
+        values[c] = i
+        if case_insensitive:
+            values[c.lower()] = i
+    return values
+
+CHAR_VALUES = {
+    HEX: _char_values("0123456789ABCDEF", 0xf, True),
+    BASE32: _char_values(BASE32_ALPHABET, 0x1f, True),
+    BASE58: _char_values(BASE58_ALPHABET, 0x3f),
+    BASE64: _char_values("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/", 0x3f),
+}
+CHAR_VALUES[BASE64].update({'-': 62, '_': 63})
+
+def extend_quant(value: int, bits: int) -> int:
+    """
+    Widen a value of the given bit length to 24 bits by repeating its
+    low-order bits.
+    """
+    if bits <= 0:
+        return 0
+    while bits < QUANT_BITS:
+        n = min(bits, QUANT_BITS - bits)
+        value = (value << n) | (value & ((1 << n) - 1))
+        bits += n
+    return value
+
+def quantize(text: str, encoding: str) -> int:
+    values = CHAR_VALUES[encoding]
+    bits_per_char = BITS_PER_CHAR[encoding]
+    mask = (1 << bits_per_char) - 1
+    value = 0
+    for c in text:
+        v = values.get(c)
+        value = (value << bits_per_char) | (v if v is not None else ord(c) & mask)
+    return extend_quant(value, len(text) * bits_per_char)
+
+# Cores at least this long get their quants from the NumPy code in
+# entviz.quants, if NumPy is installed. Below it, plain Python is faster.
+VECTOR_THRESHOLD = 512
+
+_core_quants = None
+
+def _vector_quants():
+    global _core_quants
+    if _core_quants is None:
+        try:
+            from .quants import core_quants
+            _core_quants = core_quants
+        except ImportError:
+            _core_quants = False
+    return _core_quants
+
+def tokenize(core: str, encoding: str):
+    """
+    Split the core of some entropy into tokens of (about) 24 bits each.
+    """
+    length = TOKEN_LENGTHS[encoding]
+    texts = [core[i:i + length] for i in range(0, len(core), length)]
+    core_quants = _vector_quants() if len(core) >= VECTOR_THRESHOLD else None
+    if core_quants:
+        quants = core_quants(core, encoding).tolist()
+    else:
+        quants = [quantize(text, encoding) for text in texts]
+    return [Token(text, i, quant) for i, (text, quant) in enumerate(zip(texts, quants))]
+
+def median_token(tokens) -> Token:
+    """
+    The token in the middle of an ASCII sort (ties broken by token index).
+    If there is an even number of tokens, the first of the middle pair.
+    """
+    ordered = sorted(tokens, key=lambda t: (t.text, t.index))
+    return ordered[(len(ordered) - 1) // 2]
+
+def quartile_tokens(tokens):
+    """
+    Sort tokens by their mirror image (ties broken by token index), pad the
+    list with blanks to a multiple of 4, and return the first token of each
+    quarter. A quarter that holds only blanks yields None.
+    """
+    ordered = sorted(tokens, key=lambda t: (t.text[::-1], t.index))
+    size = -(-len(ordered) // 4)
+    return [ordered[i * size] if i * size < len(ordered) else None for i in range(4)]
+
+def first_and_last_tokens(tokens):
+    """
+    The first and last tokens in the same ASCII sort used by median_token().
+    """
+    key = lambda t: (t.text, t.index)
+    return min(tokens, key=key), max(tokens, key=key)